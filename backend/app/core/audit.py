@@ -0,0 +1,243 @@
+"""
+NavTools - 审计日志异步批量写入
+
+路由只把审计事件放入内存队列 (不访问数据库), 由后台任务定时 (或积压达到批量大小时)
+用一条多行 INSERT 批量写入 audit_logs, 应用关闭时再写入剩余事件。
+
+队列有容量上限: 队列已满时丢弃新事件并计数, 审计不会阻塞或拖慢管理端请求。
+
+写入失败时:
+- 连接类错误 (断线 / 超时 / 数据库锁): 整批放回队首, 下次再试
+- 其他错误 (如外键约束): 逐条重试, 失败的事件单独排队重试,
+  累计失败 AUDIT_MAX_WRITE_ATTEMPTS 次后丢弃并计数, 不阻塞后续事件
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, DisconnectionError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """连接类错误, 稍后重试可能成功"""
+    if isinstance(exc, DBAPIError):
+        return exc.connection_invalidated or isinstance(exc, (OperationalError, InterfaceError))
+    return isinstance(exc, (DisconnectionError, PoolTimeoutError, asyncio.TimeoutError, OSError))
+
+
+class AuditLogWriter:
+    """审计事件队列与后台批量写入"""
+    
+    def __init__(self, flush_interval: float, batch_size: int, max_queue_size: int, max_attempts: int = 3):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_queue_size = max_queue_size
+        self.max_attempts = max_attempts
+        self._queue: Deque[Dict[str, Any]] = deque()
+        # 逐条写入失败的事件: (事件, 已失败次数)
+        self._retry: Deque[Tuple[Dict[str, Any], int]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        # 积压指标
+        self.enqueued_total = 0
+        self.written_total = 0
+        self.dropped_total = 0
+        self.failed_flushes = 0
+        self.discarded_total = 0
+        self.max_queue_depth = 0
+    
+    @property
+    def queue_depth(self) -> int:
+        """尚未写入的事件数"""
+        return len(self._queue) + len(self._retry)
+    
+    def stats(self) -> Dict[str, Any]:
+        """队列积压指标"""
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "max_queue_depth": self.max_queue_depth,
+            "enqueued_total": self.enqueued_total,
+            "written_total": self.written_total,
+            "dropped_total": self.dropped_total,
+            "failed_flushes": self.failed_flushes,
+            "discarded_total": self.discarded_total,
+        }
+    
+    def record(
+        self,
+        action: str,
+        target_type: str,
+        target_id: Optional[int] = None,
+        admin_id: Optional[int] = None,
+        details: Optional[dict] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> bool:
+        """记录审计事件 (不访问数据库), 队列已满时丢弃并返回 False"""
+        if self.queue_depth >= self.max_queue_size:
+            self.dropped_total += 1
+            if self.dropped_total == 1 or self.dropped_total % 1000 == 0:
+                logger.warning(f"审计日志队列已满, 累计丢弃 {self.dropped_total} 条")
+            return False
+        
+        self._queue.append({
+            "admin_id": admin_id,
+            "action": action,
+            "target_type": target_type,
+            "target_id": target_id,
+            "details": json.dumps(details, ensure_ascii=False, default=str) if details else None,
+            "ip_address": ip_address[:50] if ip_address else None,
+            "user_agent": user_agent[:500] if user_agent else None,
+            "created_at": datetime.utcnow(),
+        })
+        self.enqueued_total += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+    
+    async def flush(self) -> int:
+        """写入队列中的全部事件, 返回写入条数"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        
+        written = 0
+        async with self._flush_lock:
+            try:
+                # 先重试上次逐条写入失败的事件 (每条只试一次)
+                for _ in range(len(self._retry)):
+                    row, attempts = self._retry.popleft()
+                    written += await self._write_one(row, attempts)
+                
+                while self._queue:
+                    batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                    try:
+                        await self._write(batch)
+                    except (Exception, asyncio.CancelledError) as exc:
+                        if isinstance(exc, asyncio.CancelledError) or _is_transient(exc):
+                            # 放回队首, 下次再试
+                            self._queue.extendleft(reversed(batch))
+                            raise
+                        self.failed_flushes += 1
+                        logger.warning(f"审计日志批量写入失败, 改为逐条写入: {exc!r}")
+                        for i, row in enumerate(batch):
+                            try:
+                                written += await self._write_one(row, 0)
+                            except BaseException:
+                                self._queue.extendleft(reversed(batch[i + 1:]))
+                                raise
+                        continue
+                    written += len(batch)
+                    self.written_total += len(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed_flushes += 1
+                logger.exception("审计日志写入失败")
+        return written
+    
+    async def _write_one(self, row: Dict[str, Any], attempts: int) -> int:
+        """逐条写入, 返回写入条数; 连接类错误时放回重试队列并抛出"""
+        try:
+            await self._write([row])
+        except (Exception, asyncio.CancelledError) as exc:
+            if isinstance(exc, asyncio.CancelledError) or _is_transient(exc):
+                self._retry.appendleft((row, attempts))
+                raise
+            attempts += 1
+            if attempts >= self.max_attempts:
+                self.discarded_total += 1
+                logger.error(
+                    f"审计日志写入失败 {attempts} 次, 丢弃: "
+                    f"{row['action']} {row['target_type']} {row['target_id']} ({exc!r})"
+                )
+            else:
+                self._retry.append((row, attempts))
+            return 0
+        self.written_total += 1
+        return 1
+    
+    async def _write(self, batch: List[Dict[str, Any]]):
+        from app.database import AsyncSessionLocal
+        from app.models import AuditLog
+        
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(AuditLog), batch)
+            await db.commit()
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+    
+    def start(self):
+        """启动后台写入任务"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """停止后台任务并写入剩余事件"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        flushed = await self.flush()
+        if flushed:
+            logger.info(f"关闭前写入审计日志 {flushed} 条")
+
+
+@dataclass
+class AuditContext:
+    """单个请求的审计上下文 (操作人 / IP / User-Agent)"""
+    admin_id: Optional[int]
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+    
+    def log(
+        self,
+        action: str,
+        target_type: str,
+        target_id: Optional[int] = None,
+        details: Optional[dict] = None,
+        admin_id: Optional[int] = None
+    ) -> bool:
+        """记录一条审计事件"""
+        return audit_writer.record(
+            action, target_type, target_id,
+            admin_id=admin_id if admin_id is not None else self.admin_id,
+            details=details,
+            ip_address=self.ip_address,
+            user_agent=self.user_agent
+        )
+
+
+settings = get_settings()
+
+audit_writer = AuditLogWriter(
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    max_queue_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    max_attempts=settings.AUDIT_MAX_WRITE_ATTEMPTS
+)
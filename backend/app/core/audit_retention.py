@@ -0,0 +1,360 @@
+"""
+NavTools - 审计日志保留策略 (汇总 / 过期清理 / 按月分区)
+
+后台任务每隔 AUDIT_MAINTENANCE_INTERVAL 秒执行一次:
+1. 分区维护 (可选): 预建未来月份分区, 不受保留天数影响
+2. 汇总: 从汇总表已有的最后一天开始重新统计, 写入 audit_log_daily_rollups
+3. 清理: 整月过期的分区直接删除, 其余超过 AUDIT_RETENTION_DAYS 天的日志
+   分批删除, 每批单独提交; AUDIT_RETENTION_DAYS <= 0 时不清理
+
+汇总先于清理执行, 被清理的日志已计入汇总表, 统计接口不再扫描原始日志。
+
+按月分区仅支持 PostgreSQL / MySQL, 且只在 audit_logs 为空表时自动转换
+(分区键必须进入主键, 已有数据需要手动迁移)。
+"""
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+from sqlalchemy import select, delete, insert, func, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import get_settings
+from app.core.bulk import bulk_delete
+
+logger = logging.getLogger(__name__)
+
+# 两批删除之间的间隔 (秒), 让出连接与锁
+PURGE_PAUSE = 0.05
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _add_months(d: date, months: int) -> date:
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _partition_month(name: str) -> Optional[date]:
+    """分区名 (..._pYYYYMM / pYYYYMM) 对应的月份"""
+    suffix = name.rsplit("p", 1)[-1]
+    if len(suffix) != 6 or not suffix.isdigit():
+        return None
+    return date(int(suffix[:4]), int(suffix[4:]), 1)
+
+
+class PartitionManager:
+    """分区管理基类 (不分区)"""
+    name = "none"
+    
+    async def setup(self, conn: AsyncConnection) -> bool:
+        """转换为分区表 (启动时调用, 需幂等), 返回是否已分区"""
+        return False
+    
+    async def ensure_partitions(self, conn: AsyncConnection, months_ahead: int):
+        """预建当前月及未来月份的分区"""
+        pass
+    
+    async def drop_expired(self, conn: AsyncConnection, cutoff: datetime) -> List[str]:
+        """删除整月早于 cutoff 的分区, 返回删除的分区名"""
+        return []
+
+
+class PostgresPartitionManager(PartitionManager):
+    """PostgreSQL 声明式分区 (RANGE created_at)"""
+    name = "postgres-range"
+    
+    async def setup(self, conn: AsyncConnection) -> bool:
+        result = await conn.execute(text(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass('audit_logs')"
+        ))
+        if result.scalar() == "p":
+            return True
+        
+        result = await conn.execute(text("SELECT EXISTS (SELECT 1 FROM audit_logs)"))
+        if result.scalar():
+            logger.warning("audit_logs 已有数据, 跳过按月分区转换 (需要手动迁移)")
+            return False
+        
+        for statement in [
+            "ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned",
+            "CREATE TABLE audit_logs (LIKE audit_logs_unpartitioned INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (created_at)",
+            "ALTER TABLE audit_logs ADD PRIMARY KEY (id, created_at)",
+            "ALTER TABLE audit_logs ADD FOREIGN KEY (admin_id) REFERENCES admin_users (id)",
+            "ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id",
+            "DROP TABLE audit_logs_unpartitioned",
+            "CREATE INDEX idx_audit_admin ON audit_logs (admin_id)",
+            "CREATE INDEX idx_audit_action ON audit_logs (action)",
+            "CREATE INDEX idx_audit_created ON audit_logs (created_at)",
+            "CREATE TABLE audit_logs_pdefault PARTITION OF audit_logs DEFAULT",
+        ]:
+            await conn.execute(text(statement))
+        logger.info("audit_logs 已转换为按月分区表")
+        return True
+    
+    async def _partitions(self, conn: AsyncConnection) -> List[str]:
+        result = await conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass('audit_logs')"
+        ))
+        return list(result.scalars().all())
+    
+    async def ensure_partitions(self, conn: AsyncConnection, months_ahead: int):
+        existing = set(await self._partitions(conn))
+        month = _month_start(datetime.utcnow().date())
+        for i in range(months_ahead + 1):
+            start = _add_months(month, i)
+            name = f"audit_logs_p{start:%Y%m}"
+            if name in existing:
+                continue
+            # 默认分区中已有该月数据时无法建分区, 留在默认分区由批量清理处理
+            try:
+                async with conn.begin_nested():
+                    await conn.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF audit_logs "
+                        f"FOR VALUES FROM ('{start}') TO ('{_add_months(start, 1)}')"
+                    ))
+            except Exception:
+                logger.warning(f"创建审计日志分区 {name} 失败", exc_info=True)
+    
+    async def drop_expired(self, conn: AsyncConnection, cutoff: datetime) -> List[str]:
+        dropped = []
+        for name in await self._partitions(conn):
+            month = _partition_month(name)
+            if month is not None and _add_months(month, 1) <= cutoff.date():
+                await conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+        return dropped
+
+
+class MySQLPartitionManager(PartitionManager):
+    """MySQL RANGE 分区 (TO_DAYS(created_at))"""
+    name = "mysql-range"
+    
+    async def _partitions(self, conn: AsyncConnection) -> List[str]:
+        result = await conn.execute(text(
+            "SELECT partition_name FROM information_schema.partitions "
+            "WHERE table_schema = DATABASE() AND table_name = 'audit_logs' "
+            "AND partition_name IS NOT NULL ORDER BY partition_ordinal_position"
+        ))
+        return list(result.scalars().all())
+    
+    async def setup(self, conn: AsyncConnection) -> bool:
+        if await self._partitions(conn):
+            return True
+        
+        result = await conn.execute(text("SELECT EXISTS (SELECT 1 FROM audit_logs)"))
+        if result.scalar():
+            logger.warning("audit_logs 已有数据, 跳过按月分区转换 (需要手动迁移)")
+            return False
+        
+        # 分区表不支持外键, 分区键必须进入主键
+        result = await conn.execute(text(
+            "SELECT constraint_name FROM information_schema.referential_constraints "
+            "WHERE constraint_schema = DATABASE() AND table_name = 'audit_logs'"
+        ))
+        for constraint in result.scalars().all():
+            await conn.execute(text(f"ALTER TABLE audit_logs DROP FOREIGN KEY `{constraint}`"))
+        
+        month = _month_start(datetime.utcnow().date())
+        await conn.execute(text(
+            "ALTER TABLE audit_logs MODIFY created_at DATETIME NOT NULL, "
+            "DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)"
+        ))
+        await conn.execute(text(
+            "ALTER TABLE audit_logs PARTITION BY RANGE (TO_DAYS(created_at)) ("
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{_add_months(month, 1)}')), "
+            "PARTITION pmax VALUES LESS THAN MAXVALUE)"
+        ))
+        logger.info("audit_logs 已转换为按月分区表")
+        return True
+    
+    async def ensure_partitions(self, conn: AsyncConnection, months_ahead: int):
+        existing = set(await self._partitions(conn))
+        month = _month_start(datetime.utcnow().date())
+        for i in range(months_ahead + 1):
+            start = _add_months(month, i)
+            name = f"p{start:%Y%m}"
+            if name in existing:
+                continue
+            await conn.execute(text(
+                "ALTER TABLE audit_logs REORGANIZE PARTITION pmax INTO ("
+                f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{_add_months(start, 1)}')), "
+                "PARTITION pmax VALUES LESS THAN MAXVALUE)"
+            ))
+    
+    async def drop_expired(self, conn: AsyncConnection, cutoff: datetime) -> List[str]:
+        partitions = await self._partitions(conn)
+        dropped = []
+        for name in partitions:
+            month = _partition_month(name)
+            # 至少保留一个月份分区 (第一个分区没有下界)
+            if len(partitions) - len(dropped) <= 2:
+                break
+            if month is not None and _add_months(month, 1) <= cutoff.date():
+                await conn.execute(text(f"ALTER TABLE audit_logs DROP PARTITION {name}"))
+                dropped.append(name)
+        return dropped
+
+
+_PARTITION_MANAGERS = {
+    "postgresql": PostgresPartitionManager,
+    "mysql": MySQLPartitionManager,
+}
+
+_partition_manager: PartitionManager = PartitionManager()
+
+
+async def init_audit_partitions(engine):
+    """按配置把 audit_logs 转换为按月分区表, 失败时保持普通表"""
+    global _partition_manager
+    settings = get_settings()
+    if not settings.AUDIT_PARTITIONING:
+        return
+    
+    manager_class = _PARTITION_MANAGERS.get(engine.dialect.name)
+    if manager_class is None:
+        logger.warning(f"{engine.dialect.name} 不支持审计日志分区, 使用普通表")
+        return
+    
+    manager = manager_class()
+    try:
+        async with engine.begin() as conn:
+            if not await manager.setup(conn):
+                return
+            await manager.ensure_partitions(conn, settings.AUDIT_PARTITION_PREMAKE_MONTHS)
+    except Exception:
+        logger.warning("审计日志分区初始化失败, 使用普通表", exc_info=True)
+        return
+    _partition_manager = manager
+    logger.info(f"审计日志分区: {manager.name}")
+
+
+async def rollup_audit_logs() -> int:
+    """
+    重新统计汇总表最后一天及之后的日志, 返回写入的汇总行数
+    
+    汇总表为空时统计全部日志。
+    """
+    from app.database import AsyncSessionLocal
+    from app.models import AuditLog, AuditLogDailyRollup
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(func.max(AuditLogDailyRollup.day)))
+        last_day = result.scalar()
+        
+        day = func.date(AuditLog.created_at)
+        admin_id = func.coalesce(AuditLog.admin_id, 0)
+        query = select(
+            day, admin_id, AuditLog.action, AuditLog.target_type, func.count()
+        ).group_by(day, admin_id, AuditLog.action, AuditLog.target_type)
+        
+        if last_day is not None:
+            if isinstance(last_day, str):
+                last_day = date.fromisoformat(last_day)
+            await db.execute(delete(AuditLogDailyRollup).where(AuditLogDailyRollup.day >= last_day))
+            query = query.where(AuditLog.created_at >= datetime.combine(last_day, time.min))
+        
+        result = await db.execute(
+            insert(AuditLogDailyRollup).from_select(
+                ["day", "admin_id", "action", "target_type", "count"], query
+            )
+        )
+        await db.commit()
+        return result.rowcount
+
+
+async def maintain_audit_partitions():
+    """预建未来月份的分区 (与保留天数无关, 不保留过期日志时同样需要)"""
+    from app.database import engine
+    
+    settings = get_settings()
+    async with engine.begin() as conn:
+        await _partition_manager.ensure_partitions(conn, settings.AUDIT_PARTITION_PREMAKE_MONTHS)
+
+
+async def purge_expired_audit_logs() -> int:
+    """删除超过保留天数的日志, 返回逐行删除的条数 (不含整体删除的分区)"""
+    from app.database import AsyncSessionLocal, engine
+    from app.models import AuditLog
+    
+    settings = get_settings()
+    if settings.AUDIT_RETENTION_DAYS <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=settings.AUDIT_RETENTION_DAYS)
+    batch_size = settings.AUDIT_PURGE_BATCH_SIZE
+    
+    async with engine.begin() as conn:
+        dropped = await _partition_manager.drop_expired(conn, cutoff)
+    if dropped:
+        logger.info(f"删除过期审计日志分区: {', '.join(dropped)}")
+    
+    deleted = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(AuditLog.id).where(AuditLog.created_at < cutoff).limit(batch_size)
+            )
+            ids = list(result.scalars().all())
+            if not ids:
+                break
+            deleted += await bulk_delete(db, AuditLog, ids)
+            await db.commit()
+        if len(ids) < batch_size:
+            break
+        await asyncio.sleep(PURGE_PAUSE)
+    return deleted
+
+
+class AuditMaintenance:
+    """审计日志定时维护任务"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+    
+    async def run_once(self):
+        """汇总后清理 (先汇总, 被清理的日志不会漏计)"""
+        try:
+            await maintain_audit_partitions()
+        except Exception:
+            logger.exception("审计日志分区维护失败")
+        try:
+            await rollup_audit_logs()
+        except Exception:
+            logger.exception("审计日志汇总失败")
+            return
+        try:
+            deleted = await purge_expired_audit_logs()
+            if deleted:
+                logger.info(f"清理过期审计日志 {deleted} 条")
+        except Exception:
+            logger.exception("审计日志清理失败")
+    
+    async def _run(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+    
+    def start(self):
+        """启动后台维护任务"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """停止后台维护任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+audit_maintenance = AuditMaintenance(interval=get_settings().AUDIT_MAINTENANCE_INTERVAL)
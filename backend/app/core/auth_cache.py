@@ -0,0 +1,89 @@
+"""
+NavTools - 认证缓存 (令牌 -> 管理员信息)
+
+已验证的访问令牌在 AUTH_CACHE_TTL 秒内直接命中缓存, 跳过 JWT 解码和用户查询。
+管理员被修改 / 删除 / 改密时主动失效, 并通过失效广播通知其他进程;
+未启用广播时其他进程的缓存最迟在 TTL 后过期, 禁用账号最多在一个 TTL 窗口后生效。
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from app.core.config import get_settings
+from app import schemas
+
+
+class AuthCache:
+    """有容量上限的 TTL + LRU 缓存"""
+    
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        # token -> (过期时间 monotonic, 管理员信息)
+        self._entries: "OrderedDict[str, Tuple[float, schemas.AdminUserProfile]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, token: str) -> Optional[schemas.AdminUserProfile]:
+        """命中时返回管理员信息"""
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, profile = entry
+        if expires_at <= time.monotonic():
+            self._remove(token)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return profile
+    
+    def set(self, token: str, profile: schemas.AdminUserProfile, token_exp: Optional[float] = None):
+        """缓存已验证的令牌 (不超过令牌自身的过期时间)"""
+        if self.ttl <= 0:
+            return
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+            if ttl <= 0:
+                return
+        
+        self._remove(token)
+        self._entries[token] = (time.monotonic() + ttl, profile)
+        self._tokens_by_user.setdefault(profile.id, set()).add(token)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+    
+    def invalidate_user(self, user_id: int, broadcast: bool = True):
+        """移除该管理员的全部缓存令牌 (默认同时通知其他进程)"""
+        for token in self._tokens_by_user.pop(user_id, set()):
+            self._entries.pop(token, None)
+        if broadcast:
+            from app.core.invalidation import get_invalidation_bus
+            get_invalidation_bus().publish("admin_user", str(user_id))
+    
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+    
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[1].id
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+settings = get_settings()
+
+auth_cache = AuthCache(ttl=settings.AUTH_CACHE_TTL, max_size=settings.AUTH_CACHE_MAX_SIZE)
@@ -0,0 +1,96 @@
+"""
+NavTools - 批量写操作 (按集合执行)
+
+按主键集合一次性执行 DELETE / UPDATE, 代替逐条 SELECT + ORM 修改;
+列表过长时按 BULK_CHUNK_SIZE 分批, 避免超出数据库绑定参数上限。
+返回值均为实际影响的行数。
+
+这些语句不经过 ORM 会话 (synchronize_session=False), 调用方负责提交事务。
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, update, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# 单条语句最多包含的主键数
+BULK_CHUNK_SIZE = 500
+
+
+def _unique_ids(ids: Iterable[int]) -> List[int]:
+    """去重并保持原有顺序"""
+    return list(dict.fromkeys(ids))
+
+
+def _chunks(items: List, chunk_size: int):
+    for i in range(0, len(items), chunk_size):
+        yield items[i:i + chunk_size]
+
+
+async def bulk_delete(
+    db: AsyncSession,
+    model,
+    ids: Iterable[int],
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> int:
+    """DELETE ... WHERE id IN (...)"""
+    affected = 0
+    for chunk in _chunks(_unique_ids(ids), chunk_size):
+        result = await db.execute(
+            delete(model)
+            .where(model.id.in_(chunk))
+            .execution_options(synchronize_session=False)
+        )
+        affected += result.rowcount
+    return affected
+
+
+async def bulk_update(
+    db: AsyncSession,
+    model,
+    ids: Iterable[int],
+    values: Dict[str, Any],
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> int:
+    """UPDATE ... SET 相同的值 WHERE id IN (...)"""
+    affected = 0
+    for chunk in _chunks(_unique_ids(ids), chunk_size):
+        result = await db.execute(
+            update(model)
+            .where(model.id.in_(chunk))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        affected += result.rowcount
+    return affected
+
+
+async def bulk_update_by_id(
+    db: AsyncSession,
+    model,
+    column,
+    values_by_id: Dict[int, Any],
+    increment: bool = False,
+    extra_values: Optional[Dict[str, Any]] = None,
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> int:
+    """
+    UPDATE ... SET column = CASE id WHEN ... END WHERE id IN (...)
+    
+    increment=True 时在原值上累加 (column = column + CASE ...)
+    """
+    affected = 0
+    items = list(values_by_id.items())
+    for chunk in _chunks(items, chunk_size):
+        mapping = dict(chunk)
+        if increment:
+            value = column + case(mapping, value=model.id, else_=0)
+        else:
+            value = case(mapping, value=model.id, else_=column)
+        result = await db.execute(
+            update(model)
+            .where(model.id.in_(mapping.keys()))
+            .values({column.key: value, **(extra_values or {})})
+            .execution_options(synchronize_session=False)
+        )
+        affected += result.rowcount
+    return affected
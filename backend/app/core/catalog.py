@@ -0,0 +1,299 @@
+"""
+NavTools - 公开目录快照 (进程内缓存)
+
+公开接口只读取内存中的快照; 管理端对工具 / 分类 / 网站配置的写操作
+提交后调用 invalidate_catalog() 提升代数, 下一次读取时重建快照;
+多进程部署时同时通过失效广播 (app.core.invalidation) 通知其他进程。
+快照只是超过 TTL (用于刷新浏览量等) 时先返回旧快照并在后台重建,
+避免所有请求同时等待数据库。
+"""
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.core.coalesce import SingleFlight
+from app.core.query_plans import register_query_shape
+from app.core.serialization import dumps, row_revision
+from app.core.tags import tag_key
+
+logger = logging.getLogger(__name__)
+
+# 目录代数: 每次写操作提交后 +1
+_generation = 0
+# 快照构建序号: 每构建一次 +1, 快照内容不可变, 可用作版本标识
+_build_seq = 0
+
+_snapshot: Optional["CatalogSnapshot"] = None
+# 快照命中 / 返回旧快照 / 等待重建次数 (运行指标)
+cache_stats = {"hits": 0, "stale": 0, "misses": 0}
+# 同一代数的并发重建合并为一次
+catalog_loads = SingleFlight("catalog")
+# 快照失效时的回调 (如唤醒派生缓存的后台刷新)
+_invalidate_listeners: List[Callable[[], None]] = []
+
+DEFAULT_SITE_CONFIG = {
+    "site_name": "NavTools",
+    "site_description": "实用工具集合",
+    "site_keywords": "工具,实用工具,在线工具",
+    "theme_enabled": True
+}
+
+
+@dataclass
+class CatalogSnapshot:
+    """目录快照 (构建后只读)"""
+    generation: int
+    version: int
+    built_at: float
+    # 快照内容的哈希: 同样的数据在各进程 / 重启前后一致, 用于 ETag
+    content_hash: str
+    site_config: Optional[dict]
+    categories: List[dict]  # 启用的分类, 按 sort_order 排序, 含 tool_count
+    tools: List[dict]  # 启用的工具, 按 sort_order 升序 / created_at 降序
+    tools_by_slug: Dict[str, dict] = field(default_factory=dict)
+    tools_by_id: Dict[int, dict] = field(default_factory=dict)
+    tools_by_tag: Dict[str, List[dict]] = field(default_factory=dict)  # 键为 tag_key(), 顺序同 tools
+    tag_counts: List[dict] = field(default_factory=list)  # 按工具数降序
+    
+    def is_fresh(self) -> bool:
+        """快照是否仍然有效"""
+        if self.generation != _generation:
+            return False
+        return time.monotonic() - self.built_at < get_settings().CATALOG_CACHE_TTL
+
+
+def get_generation() -> int:
+    """当前目录代数"""
+    return _generation
+
+
+def _invalidate(topic: Optional[str]) -> int:
+    global _generation
+    _generation += 1
+    for listener in _invalidate_listeners:
+        listener()
+    if topic is not None:
+        # 通知其他进程 (多 worker / 多容器部署)
+        from app.core.invalidation import get_invalidation_bus
+        get_invalidation_bus().publish(topic)
+    return _generation
+
+
+def invalidate_catalog(broadcast: bool = True) -> int:
+    """目录数据已变更, 使快照失效"""
+    return _invalidate("catalog" if broadcast else None)
+
+
+def invalidate_site_config(broadcast: bool = True) -> int:
+    """网站配置已变更 (网站配置包含在目录快照中)"""
+    return _invalidate("site_config" if broadcast else None)
+
+
+def add_invalidate_listener(callback: Callable[[], None]):
+    """注册快照失效回调 (同步调用, 不应阻塞)"""
+    if callback not in _invalidate_listeners:
+        _invalidate_listeners.append(callback)
+
+
+def _category_dict(cat) -> dict:
+    return {
+        "id": cat.id,
+        "name": cat.name,
+        "slug": cat.slug,
+        "description": cat.description,
+        "icon": cat.icon,
+        "color": cat.color,
+        "sort_order": cat.sort_order,
+        "is_active": cat.is_active,
+        "updated_at": cat.updated_at,
+        # 修订键: 用于校验已序列化的响应片段
+        "revision": row_revision(cat)
+    }
+
+
+def _tool_dict(tool, category: dict, tags: List[str]) -> dict:
+    return {
+        "id": tool.id,
+        "name": tool.name,
+        "slug": tool.slug,
+        "short_description": tool.short_description,
+        "description": tool.description,
+        "icon": tool.icon,
+        "url": tool.url,
+        "category_id": tool.category_id,
+        "is_featured": tool.is_featured,
+        "is_self_developed": tool.is_self_developed,
+        "api_endpoint": tool.api_endpoint,
+        "view_count": tool.view_count,
+        "tags": tags,
+        "sort_order": tool.sort_order,
+        "created_at": tool.created_at,
+        # 列表排序键: sort_order 升序, created_at 降序, id 降序
+        "sort_key": (
+            tool.sort_order or 0,
+            -tool.created_at.timestamp() if tool.created_at else 0.0,
+            -tool.id
+        ),
+        # 修订键: 工具行、所属分类或标签变化时不同, 用于校验已序列化的响应片段
+        "revision": (row_revision(tool), category["revision"], tuple(tags)),
+        "category": {
+            "id": category["id"],
+            "name": category["name"],
+            "slug": category["slug"],
+            "icon": category["icon"],
+            "color": category["color"]
+        }
+    }
+
+
+def _active_tools_query():
+    """全部启用的工具"""
+    from app.models import Tool
+    
+    return select(Tool).where(Tool.is_active == True)
+
+
+def _active_tool_tags_query():
+    """启用工具的标签 (不在数据库中排序, 每个工具的标签按 position 在内存中排序)"""
+    from app.models import Tool, Tag, ToolTag
+    
+    return (
+        select(ToolTag.tool_id, ToolTag.position, Tag.name)
+        .join(Tag, Tag.id == ToolTag.tag_id)
+        .join(Tool, Tool.id == ToolTag.tool_id)
+        .where(Tool.is_active == True)
+    )
+
+
+# 执行计划检查: 快照加载本就读取全部启用工具, 不标记全表扫描
+register_query_shape("catalog.tools", _active_tools_query, allow_scan=True)
+register_query_shape("catalog.tool_tags", _active_tool_tags_query, allow_scan=True)
+
+
+async def _build_snapshot(generation: int) -> CatalogSnapshot:
+    """从数据库加载完整目录"""
+    global _build_seq
+    from app.database import AsyncSessionLocal
+    from app.models import Category, SiteConfig
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(SiteConfig).limit(1))
+        config = result.scalar_one_or_none()
+        
+        result = await db.execute(select(Category).order_by(Category.sort_order.asc()))
+        all_categories = [_category_dict(c) for c in result.scalars().all()]
+        
+        result = await db.execute(_active_tools_query())
+        tool_rows = result.scalars().all()
+        
+        result = await db.execute(_active_tool_tags_query())
+        tag_rows: Dict[int, list] = {}
+        for tool_id, position, name in result.all():
+            tag_rows.setdefault(tool_id, []).append((position, name))
+    
+    tags_by_tool = {
+        tool_id: [name for _, name in sorted(rows)]
+        for tool_id, rows in tag_rows.items()
+    }
+    
+    categories_by_id = {c["id"]: c for c in all_categories}
+    tools = [
+        _tool_dict(t, categories_by_id[t.category_id], tags_by_tool.get(t.id, []))
+        for t in tool_rows if t.category_id in categories_by_id
+    ]
+    tools.sort(key=lambda t: t["sort_key"])
+    
+    # 标签唯一键 -> 工具 (保持列表顺序), 用于按标签筛选与标签统计
+    tools_by_tag: Dict[str, List[dict]] = {}
+    tag_names: Dict[str, str] = {}
+    for t in tools:
+        for tag in t["tags"]:
+            key = tag_key(tag)
+            tools_by_tag.setdefault(key, []).append(t)
+            tag_names.setdefault(key, tag)
+    tag_counts = [
+        {"name": tag_names[key], "count": len(tagged)}
+        for key, tagged in sorted(tools_by_tag.items(), key=lambda item: (-len(item[1]), item[0]))
+    ]
+    
+    tool_counts: Dict[int, int] = {}
+    for t in tools:
+        tool_counts[t["category_id"]] = tool_counts.get(t["category_id"], 0) + 1
+    
+    categories = []
+    for cat in all_categories:
+        if cat["is_active"]:
+            categories.append({**cat, "tool_count": tool_counts.get(cat["id"], 0)})
+    
+    site_config = None
+    if config:
+        site_config = {
+            "site_name": config.site_name,
+            "site_description": config.site_description,
+            "site_keywords": config.site_keywords,
+            "icp_beian": config.icp_beian,
+            "gongan_beian": config.gongan_beian,
+            "contact_email": config.contact_email,
+            "theme_enabled": config.theme_enabled,
+            "logo_url": config.logo_url,
+            "favicon_url": config.favicon_url,
+            "footer_text": config.footer_text
+        }
+    
+    _build_seq += 1
+    return CatalogSnapshot(
+        generation=generation,
+        version=_build_seq,
+        built_at=time.monotonic(),
+        content_hash=hashlib.blake2b(
+            dumps([site_config, categories, tools]), digest_size=12
+        ).hexdigest(),
+        site_config=site_config,
+        categories=categories,
+        tools=tools,
+        tools_by_slug={t["slug"]: t for t in tools},
+        tools_by_id={t["id"]: t for t in tools},
+        tools_by_tag=tools_by_tag,
+        tag_counts=tag_counts
+    )
+
+
+async def _load(generation: int) -> CatalogSnapshot:
+    global _snapshot
+    snapshot = await _build_snapshot(generation)
+    # 重建期间可能已有更新代数的快照完成, 不用旧代数覆盖
+    current = _snapshot
+    if current is None or snapshot.generation >= current.generation:
+        _snapshot = snapshot
+    logger.debug(f"目录快照已重建: 代数 {snapshot.generation}, 工具 {len(snapshot.tools)} 个")
+    return snapshot
+
+
+async def get_catalog() -> CatalogSnapshot:
+    """
+    获取目录快照
+    
+    - 快照在 CATALOG_CACHE_TTL 内直接返回
+    - 超过 TTL 但未超出 CATALOG_STALE_TTL 宽限期: 先返回旧快照, 后台重建一次
+    - 已失效 (管理端写操作) 或超出宽限期: 等待重建, 并发请求合并为一次重建
+    """
+    generation = _generation
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.generation == generation:
+        settings = get_settings()
+        age = time.monotonic() - snapshot.built_at
+        if age < settings.CATALOG_CACHE_TTL:
+            cache_stats["hits"] += 1
+            return snapshot
+        if age < settings.CATALOG_CACHE_TTL + settings.CATALOG_STALE_TTL:
+            cache_stats["stale"] += 1
+            catalog_loads.refresh(generation, lambda: _load(generation))
+            return snapshot
+    
+    cache_stats["misses"] += 1
+    return await catalog_loads.do(generation, lambda: _load(generation))
@@ -0,0 +1,55 @@
+"""
+NavTools - 并发加载合并 (single-flight)
+
+缓存未命中时, 同一键的并发请求只执行一次加载, 其余请求等待同一个结果;
+加载在独立任务中执行, 发起加载的请求被取消 (客户端断开) 不会中断其他等待者。
+refresh() 在后台发起加载 (已有同键加载时直接复用), 配合缓存实现
+stale-while-revalidate: 缓存过期但仍在宽限期内时先返回旧值, 由一次后台加载刷新。
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """按键合并进行中的异步加载"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        # 实际执行的加载 / 合并到进行中加载的调用 / 失败的加载
+        self.loads = 0
+        self.coalesced = 0
+        self.failures = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+    
+    def _start(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        self.loads += 1
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        return task
+    
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        # 取出异常, 后台加载失败时不会出现 "exception was never retrieved"
+        exc = task.exception()
+        if exc is not None:
+            self.failures += 1
+            logger.warning(f"{self.name} 加载失败: {exc!r}")
+    
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """执行加载, 或等待进行中的同键加载, 返回加载结果"""
+        return await asyncio.shield(self._start(key, loader))
+    
+    def refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """在后台执行加载 (不等待结果)"""
+        return self._start(key, loader)
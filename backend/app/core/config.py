@@ -24,6 +24,14 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     ALGORITHM: str = "HS256"
     
+    # 密码哈希
+    BCRYPT_ROUNDS: int = 12  # 修改后旧密码哈希在下次登录时自动升级
+    PASSWORD_HASH_WORKERS: int = 2  # 密码计算线程池大小
+    
+    # 认证缓存
+    AUTH_CACHE_TTL: int = 30  # 令牌验证结果缓存秒数, 未启用失效广播时也是其他进程中禁用账号的最长生效延迟
+    AUTH_CACHE_MAX_SIZE: int = 1024
+    
     # 默认管理员
     DEFAULT_ADMIN_USERNAME: str = "admin"
     DEFAULT_ADMIN_PASSWORD: str = "Admin@123"
@@ -35,12 +43,76 @@ class Settings(BaseSettings):
     # 日志
     LOG_LEVEL: str = "INFO"
     
+    # 缓存
+    CATALOG_CACHE_TTL: int = 60  # 公开目录快照最长存活秒数 (用于刷新浏览量等)
+    CATALOG_STALE_TTL: int = 30  # 快照超过 TTL 后仍先返回旧快照 (后台重建) 的宽限秒数, 0 为关闭
+    HOME_PAYLOAD_REFRESH_INTERVAL: float = 5.0  # 首页数据后台检查快照是否过期的间隔 (秒)
+    RESPONSE_FRAGMENT_CACHE_SIZE: int = 100000  # 每类实体缓存的已序列化 JSON 片段上限
+    
+    # 多进程缓存失效广播
+    INVALIDATION_BACKEND: str = "none"  # none / database / postgres / redis (见 .env.example)
+    INVALIDATION_POLL_INTERVAL: float = 1.0  # 轮询间隔 (秒), 即其他进程失效生效的最长延迟
+    REDIS_URL: str = "redis://localhost:6379/0"
+    INVALIDATION_CHANNEL: str = "navtools_invalidation"  # Redis 频道 / PostgreSQL 通知通道
+    
+    # 浏览量写缓冲
+    VIEW_COUNT_FLUSH_INTERVAL: float = 5.0  # 定时写回间隔 (秒)
+    VIEW_COUNT_FLUSH_THRESHOLD: int = 1000  # 累计浏览次数达到阈值时立即写回
+    
+    # 搜索
+    SEARCH_BACKEND: str = "auto"  # auto: 按数据库选择全文索引, like: 仅使用 LIKE
+    SEARCH_MAX_RESULTS: int = 1000  # 搜索结果上限, 超出时列表响应 truncated=true
+    
+    # HTTP 缓存 (公开接口)
+    HTTP_CACHE_MAX_AGE: int = 60
+    HTTP_CACHE_STALE_WHILE_REVALIDATE: int = 300
+    # 按路由覆盖, 格式: 路由=max_age/stale_while_revalidate, 逗号分隔
+    # 可用路由: site_config, categories, tools, tool_detail, home, suggest, tags
+    HTTP_CACHE_ROUTES: str = ""
+    
+    # 审计日志异步写入
+    AUDIT_FLUSH_INTERVAL: float = 2.0  # 定时写入间隔 (秒)
+    AUDIT_BATCH_SIZE: int = 200  # 单条 INSERT 的最大行数, 积压达到时立即写入
+    AUDIT_QUEUE_MAX_SIZE: int = 10000  # 队列上限, 超出时丢弃新事件
+    AUDIT_MAX_WRITE_ATTEMPTS: int = 3  # 单条事件写入失败 (非连接错误) 达到次数后丢弃
+    
+    # 审计日志保留
+    AUDIT_RETENTION_DAYS: int = 180  # 0 表示永久保留
+    AUDIT_PURGE_BATCH_SIZE: int = 1000  # 每批删除的条数
+    AUDIT_MAINTENANCE_INTERVAL: int = 600  # 汇总与清理间隔 (秒)
+    AUDIT_PARTITIONING: bool = False  # 按月分区 (仅 PostgreSQL / MySQL, 空表时自动转换)
+    AUDIT_PARTITION_PREMAKE_MONTHS: int = 2  # 预建未来月份分区数
+    
+    # 运行指标 (Prometheus)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""  # 抓取时需携带 Authorization: Bearer <token>; 为空时仅 DEBUG 模式开放
+    
+    # SQL 查询统计
+    SQL_DEBUG_HEADERS: bool = False  # 响应附带 Server-Timing / X-DB-Queries 头
+    SLOW_QUERY_THRESHOLD_MS: int = 200  # 慢查询日志阈值 (毫秒), 0 表示关闭
+    
+    # 请求采样分析 (默认关闭)
+    PROFILER_ENABLED: bool = False
+    PROFILER_SAMPLE_RATE: float = 0.0  # 随机抽样比例, 0 表示只分析携带令牌的请求
+    PROFILER_INTERVAL_MS: float = 5.0  # 调用栈采样间隔 (毫秒)
+    PROFILER_MAX_PROFILES: int = 50  # 保留最近的分析结果数
+    PROFILER_MAX_CONCURRENT: int = 2  # 同时分析的请求数上限
+    PROFILER_TOKEN_TTL: int = 600  # 按需分析令牌有效期 (秒)
+    
     @validator("ALLOWED_ORIGINS")
     def parse_allowed_origins(cls, v):
         if isinstance(v, str):
             return [origin.strip() for origin in v.split(",")]
         return v
     
+    @validator("HTTP_CACHE_ROUTES")
+    def parse_http_cache_routes(cls, v):
+        if isinstance(v, str):
+            # 启动时解析为 CachePolicy, 格式错误直接报错
+            from app.core.http_cache import parse_cache_routes
+            return parse_cache_routes(v)
+        return v
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
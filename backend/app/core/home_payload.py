@@ -0,0 +1,178 @@
+"""
+NavTools - 首页数据预序列化缓存
+
+首页响应完全由目录快照派生, 按快照版本缓存序列化好的 JSON 字节:
+请求路径只比较版本号并直接返回字节。目录失效 (管理端写操作) 时唤醒后台任务
+立即重建, 并按 HOME_PAYLOAD_REFRESH_INTERVAL 定时检查快照是否过期;
+并发请求遇到未命中时只有一个请求执行构建, 其余等待其结果。
+"""
+import asyncio
+import heapq
+import logging
+from typing import Optional
+
+from app.core.config import get_settings
+from app.core.serialization import dumps
+from app.core.coalesce import SingleFlight
+from app.core.catalog import (
+    CatalogSnapshot, DEFAULT_SITE_CONFIG, get_catalog, add_invalidate_listener
+)
+
+logger = logging.getLogger(__name__)
+
+# 首页精选 / 最近添加的工具数
+FEATURED_LIMIT = 10
+RECENT_LIMIT = 12
+
+
+def _category_brief(category: dict) -> dict:
+    """工具中嵌套的分类信息"""
+    return {
+        "name": category["name"],
+        "slug": category["slug"],
+        "color": category["color"]
+    }
+
+
+def build_home_payload(catalog: CatalogSnapshot) -> dict:
+    """由目录快照构建首页响应"""
+    config = catalog.site_config or DEFAULT_SITE_CONFIG
+    
+    # 网站配置
+    site_config = {
+        "site_name": config["site_name"],
+        "site_description": config["site_description"],
+        "theme_enabled": config["theme_enabled"]
+    }
+    
+    # 分类
+    categories_data = [
+        {
+            "id": cat["id"],
+            "name": cat["name"],
+            "slug": cat["slug"],
+            "icon": cat["icon"],
+            "color": cat["color"],
+            "tool_count": cat["tool_count"]
+        }
+        for cat in catalog.categories
+    ]
+    
+    # 精选工具 (快照已按列表顺序排序)
+    featured_tools = []
+    for tool in catalog.tools:
+        if not tool["is_featured"]:
+            continue
+        featured_tools.append({
+            "id": tool["id"],
+            "name": tool["name"],
+            "slug": tool["slug"],
+            "short_description": tool["short_description"],
+            "icon": tool["icon"],
+            "is_self_developed": tool["is_self_developed"],
+            "api_endpoint": tool["api_endpoint"],
+            "category": _category_brief(tool["category"])
+        })
+        if len(featured_tools) >= FEATURED_LIMIT:
+            break
+    
+    # 最近添加的工具 (只取前 N 个, 不对全部工具排序)
+    recent = heapq.nlargest(
+        RECENT_LIMIT, (t for t in catalog.tools if t["created_at"] is not None),
+        key=lambda t: t["created_at"]
+    )
+    recent_tools = [
+        {
+            "id": tool["id"],
+            "name": tool["name"],
+            "slug": tool["slug"],
+            "short_description": tool["short_description"],
+            "icon": tool["icon"],
+            "is_self_developed": tool["is_self_developed"],
+            "category": _category_brief(tool["category"])
+        }
+        for tool in recent
+    ]
+    
+    return {
+        "code": 200,
+        "message": "success",
+        "data": {
+            "site_config": site_config,
+            "categories": categories_data,
+            "featured_tools": featured_tools,
+            "recent_tools": recent_tools
+        }
+    }
+
+
+class HomePayloadCache:
+    """按目录快照版本缓存的首页响应字节"""
+    
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.builds = 0
+        self._version: Optional[int] = None
+        self._body: Optional[bytes] = None
+        self.flight = SingleFlight("home_payload")
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    async def get(self, catalog: Optional[CatalogSnapshot] = None) -> bytes:
+        """返回与快照版本一致的首页响应字节"""
+        if catalog is None:
+            catalog = await get_catalog()
+        if self._version == catalog.version:
+            return self._body
+        return await self.flight.do(catalog.version, lambda: self._build(catalog))
+    
+    async def _build(self, catalog: CatalogSnapshot) -> bytes:
+        body = dumps(build_home_payload(catalog))
+        # 不用旧快照的结果覆盖新快照的结果
+        if self._version is None or catalog.version > self._version:
+            self._body = body
+            self._version = catalog.version
+        self.builds += 1
+        logger.debug(f"首页数据已重建: 快照版本 {catalog.version}")
+        return body
+    
+    def notify(self):
+        """目录已失效, 唤醒后台任务重建"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                # 快照过期或失效时在此重建, 请求路径无需等待
+                await self.get()
+            except Exception:
+                logger.exception("首页数据后台刷新失败")
+    
+    def start(self):
+        """启动后台刷新任务"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        add_invalidate_listener(self.notify)
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """停止后台刷新任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+settings = get_settings()
+
+home_payload = HomePayloadCache(refresh_interval=settings.HOME_PAYLOAD_REFRESH_INTERVAL)
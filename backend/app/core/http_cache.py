@@ -0,0 +1,123 @@
+"""
+NavTools - HTTP 缓存 (ETag / If-None-Match / Cache-Control)
+
+公开接口的 ETag 由目录快照内容哈希和请求 URL 派生: 快照内容构建后不可变,
+数据变化时哈希随之变化; 哈希只取决于内容, 多个 worker 之间及重启前后保持一致,
+不会出现不同内容对应同一 ETag。
+"""
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from app.core.config import get_settings
+
+# 条件请求命中 (304) / 未命中次数 (运行指标)
+cache_stats = {"not_modified": 0, "modified": 0}
+
+# 可在 HTTP_CACHE_ROUTES 中覆盖策略的路由
+CACHE_ROUTES = ("site_config", "categories", "tools", "tool_detail", "home", "suggest", "tags")
+
+
+class CachePolicy:
+    """单个路由的 Cache-Control 策略"""
+    
+    def __init__(self, max_age: int, stale_while_revalidate: int = 0):
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+    
+    @property
+    def header(self) -> str:
+        value = f"public, max-age={self.max_age}"
+        if self.stale_while_revalidate:
+            value += f", stale-while-revalidate={self.stale_while_revalidate}"
+        return value
+
+
+def parse_cache_routes(value: str) -> Dict[str, CachePolicy]:
+    """
+    解析 HTTP_CACHE_ROUTES (路由=max_age/stale_while_revalidate, 逗号分隔)
+    
+    在加载配置时调用, 路由或数值无效时抛出 ValueError, 避免错误配置被静默忽略
+    """
+    routes = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        route, sep, policy = item.partition("=")
+        route = route.strip()
+        if not sep or route not in CACHE_ROUTES:
+            raise ValueError(f"HTTP_CACHE_ROUTES 路由无效: {item} (可用路由: {', '.join(CACHE_ROUTES)})")
+        max_age_text, _, swr_text = policy.partition("/")
+        try:
+            max_age, stale_while_revalidate = int(max_age_text), int(swr_text or 0)
+        except ValueError:
+            raise ValueError(f"HTTP_CACHE_ROUTES 策略无效: {item} (格式: 路由=max_age/stale_while_revalidate)")
+        if max_age < 0 or stale_while_revalidate < 0:
+            raise ValueError(f"HTTP_CACHE_ROUTES 策略不能为负数: {item}")
+        routes[route] = CachePolicy(max_age, stale_while_revalidate)
+    return routes
+
+
+def get_cache_policy(route: str, max_age: Optional[int] = None) -> CachePolicy:
+    """
+    获取路由缓存策略
+    
+    优先使用 HTTP_CACHE_ROUTES 中的配置, 其次使用路由默认 max_age, 最后使用全局默认值
+    """
+    settings = get_settings()
+    # 已在加载配置时解析为 CachePolicy
+    overrides: Dict[str, CachePolicy] = settings.HTTP_CACHE_ROUTES
+    if route in overrides:
+        return overrides[route]
+    return CachePolicy(
+        settings.HTTP_CACHE_MAX_AGE if max_age is None else max_age,
+        settings.HTTP_CACHE_STALE_WHILE_REVALIDATE
+    )
+
+
+def make_etag(version: str, request: Request) -> str:
+    """由数据版本 (内容哈希) 与请求 URL 生成强 ETag"""
+    url = request.url.path
+    if request.url.query:
+        url += "?" + request.url.query
+    digest = hashlib.blake2s(url.encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否命中 (弱比较)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def apply_cache_headers(response: Response, etag: str, policy: CachePolicy):
+    """写入 ETag 与 Cache-Control"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = policy.header
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    version: str,
+    policy: CachePolicy
+) -> Optional[Response]:
+    """
+    写入缓存响应头; 客户端缓存仍有效时返回 304 响应, 否则返回 None
+    """
+    etag = make_etag(version, request)
+    if etag_matches(request, etag):
+        cache_stats["not_modified"] += 1
+        not_modified = Response(status_code=304)
+        apply_cache_headers(not_modified, etag, policy)
+        return not_modified
+    cache_stats["modified"] += 1
+    apply_cache_headers(response, etag, policy)
+    return None
@@ -0,0 +1,422 @@
+"""
+NavTools - 多进程缓存失效广播
+
+每个 worker / 容器各自持有进程内缓存 (目录快照、认证缓存等)。本进程失效缓存后
+通过总线广播事件, 其他进程收到后执行同样的本地失效:
+
+- catalog: 工具 / 分类变更, 目录快照失效
+- site_config: 网站配置变更 (网站配置包含在目录快照中)
+- admin_user: 管理员修改 / 删除 / 改密, 移除其认证缓存 (key 为管理员 ID)
+
+后端 (INVALIDATION_BACKEND):
+
+- none: 单进程部署, 不广播
+- database: 失效时把 cache_versions 表中 (topic, key) 的版本号 +1, 各进程每隔
+  INVALIDATION_POLL_INTERVAL 秒读取版本表, 版本变化即执行失效; 任意数据库可用
+- postgres: 同 database, 并在同一事务中 NOTIFY, 其他进程收到通知后立即读取版本表;
+  监听连接断开时仍按轮询间隔生效
+- redis: Redis pub/sub; 订阅中断期间可能丢失事件, 重新订阅后整体失效一次
+
+事件在后台任务中批量发布, 失败时保留待下次重试; 后台任务未启动时发布的事件计入 dropped。
+"""
+import abc
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update, insert, text
+
+from app.core.config import get_settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # 可选依赖
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+TOPIC_CATALOG = "catalog"
+TOPIC_SITE_CONFIG = "site_config"
+TOPIC_ADMIN_USER = "admin_user"
+
+# (topic, key)
+Event = Tuple[str, str]
+
+
+def apply_event(topic: str, key: str = ""):
+    """执行其他进程广播的失效 (不再次广播)"""
+    from app.core.catalog import invalidate_catalog, invalidate_site_config
+    from app.core.auth_cache import auth_cache
+    
+    if topic == TOPIC_CATALOG:
+        invalidate_catalog(broadcast=False)
+    elif topic == TOPIC_SITE_CONFIG:
+        invalidate_site_config(broadcast=False)
+    elif topic == TOPIC_ADMIN_USER:
+        if key:
+            auth_cache.invalidate_user(int(key), broadcast=False)
+        else:
+            auth_cache.clear()
+    else:
+        logger.warning(f"未知的缓存失效事件: {topic}")
+
+
+def apply_all():
+    """可能错过了事件 (如订阅中断), 整体失效全部缓存"""
+    apply_event(TOPIC_CATALOG)
+    apply_event(TOPIC_ADMIN_USER)
+
+
+class InvalidationBus:
+    """单进程部署: 不广播"""
+    name = "none"
+    
+    def publish(self, topic: str, key: str = ""):
+        """广播失效事件 (本进程的失效由调用方完成)"""
+        pass
+    
+    def start(self):
+        pass
+    
+    async def stop(self):
+        pass
+    
+    def stats(self) -> dict:
+        return {"published": 0, "received": 0, "pending": 0, "dropped": 0}
+
+
+class BackgroundBus(InvalidationBus, abc.ABC):
+    """由后台任务批量发布 / 接收事件的总线"""
+    
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self.published = 0
+        self.received = 0
+        # 后台任务未启动 (或已停止) 时丢弃的事件数
+        self.dropped = 0
+        # 待发布事件 (去重, 保持顺序)
+        self._pending: Dict[Event, None] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def publish(self, topic: str, key: str = ""):
+        if self._task is None:
+            self.dropped += 1
+            if self.dropped == 1:
+                logger.warning(f"缓存失效广播 ({self.name}) 未启动, 事件未发布: {topic} {key}")
+            else:
+                logger.debug(f"缓存失效广播 ({self.name}) 未启动, 事件未发布: {topic} {key}")
+            return
+        self._pending[(topic, str(key))] = None
+        self._wakeup.set()
+    
+    def stats(self) -> dict:
+        return {
+            "published": self.published,
+            "received": self.received,
+            "pending": len(self._pending),
+            "dropped": self.dropped
+        }
+    
+    def _apply(self, topic: str, key: str):
+        self.received += 1
+        logger.debug(f"收到缓存失效事件: {topic} {key}")
+        apply_event(topic, key)
+    
+    async def _setup(self):
+        """建立连接 / 记录当前状态"""
+        pass
+    
+    async def _teardown(self):
+        pass
+    
+    @abc.abstractmethod
+    async def _send(self, events: List[Event]):
+        """发布一批事件 (失败时抛出异常, 事件保留待重试)"""
+    
+    async def _poll(self):
+        """检查其他进程的事件 (推送型后端无需处理)"""
+        pass
+    
+    async def _flush(self):
+        if not self._pending:
+            return
+        events = list(self._pending)
+        self._pending.clear()
+        try:
+            await self._send(events)
+        except Exception:
+            # 保留待下次重试 (期间新增的事件排在后面)
+            self._pending = {**dict.fromkeys(events), **self._pending}
+            raise
+        self.published += len(events)
+    
+    async def _run(self):
+        failed = False
+        while True:
+            try:
+                await self._setup()
+                break
+            except Exception:
+                failed = True
+                logger.warning(f"缓存失效广播 ({self.name}) 初始化失败, 稍后重试", exc_info=True)
+                await asyncio.sleep(max(self.poll_interval, 1.0))
+        if failed:
+            # 初始化失败期间可能错过了其他进程的事件
+            apply_all()
+        logger.info(f"缓存失效广播: {self.name}")
+        
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._flush()
+                await self._poll()
+            except Exception:
+                logger.warning(f"缓存失效广播 ({self.name}) 失败", exc_info=True)
+    
+    def start(self):
+        """启动后台任务"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """停止后台任务, 尽量发出剩余事件"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await self._flush()
+        except Exception:
+            logger.warning(f"缓存失效广播 ({self.name}) 关闭前发布失败", exc_info=True)
+        await self._teardown()
+
+
+class DatabaseBus(BackgroundBus):
+    """轮询 cache_versions 版本表"""
+    name = "database"
+    
+    def __init__(self, poll_interval: float):
+        super().__init__(poll_interval)
+        # 已处理的版本: (topic, key) -> version
+        self._versions: Dict[Event, int] = {}
+    
+    async def _read_versions(self) -> Dict[Event, int]:
+        from app.database import engine
+        from app.models import CacheVersion
+        
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                select(CacheVersion.topic, CacheVersion.key, CacheVersion.version)
+            )
+            return {(topic, key): version for topic, key, version in result.all()}
+    
+    async def _setup(self):
+        # 启动前的事件无需处理
+        self._versions = await self._read_versions()
+    
+    async def _poll(self):
+        versions = await self._read_versions()
+        for event, version in versions.items():
+            if self._versions.get(event) != version:
+                self._apply(*event)
+        self._versions = versions
+    
+    async def _bump(self, conn, topic: str, key: str) -> int:
+        """版本号 +1, 返回新版本号"""
+        from app.models import CacheVersion
+        
+        where = (CacheVersion.topic == topic) & (CacheVersion.key == key)
+        result = await conn.execute(
+            update(CacheVersion).where(where).values(version=CacheVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            # 首次出现的事件; 其他进程同时插入时事务失败, 事件留待下次重试
+            await conn.execute(
+                insert(CacheVersion).values(topic=topic, key=key, version=1, updated_at=datetime.utcnow())
+            )
+            return 1
+        # 行已被本事务锁定, 读到的版本号不会被其他进程改动
+        result = await conn.execute(select(CacheVersion.version).where(where))
+        return result.scalar_one()
+    
+    async def _notify(self, conn):
+        """同一事务中通知其他进程 (由子类实现)"""
+        pass
+    
+    async def _send(self, events: List[Event]):
+        from app.database import engine
+        
+        versions = {}
+        async with engine.begin() as conn:
+            for topic, key in events:
+                versions[(topic, key)] = await self._bump(conn, topic, key)
+            await self._notify(conn)
+        # 提交后再记录, 本进程的事件不会在轮询时被再次执行; 只在新版本恰好是已知版本 +1
+        # 时记录, 否则期间有其他进程的事件未处理, 留给轮询发现
+        for event, version in versions.items():
+            if self._versions.get(event, 0) + 1 == version:
+                self._versions[event] = version
+
+
+class PostgresBus(DatabaseBus):
+    """版本表 + LISTEN/NOTIFY (asyncpg)"""
+    name = "postgres"
+    
+    def __init__(self, poll_interval: float, channel: str):
+        super().__init__(poll_interval)
+        self.channel = channel
+        self._listen_conn = None
+    
+    def _on_notify(self, connection, pid, channel, payload):
+        # 收到通知后立即读取版本表
+        self._wakeup.set()
+    
+    async def _setup(self):
+        from app.database import engine
+        
+        await super()._setup()
+        conn = await engine.connect()
+        try:
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.add_listener(self.channel, self._on_notify)
+        except Exception:
+            # 初始化失败会重试, 不能遗留连接
+            await conn.close()
+            raise
+        self._listen_conn = conn
+    
+    async def _teardown(self):
+        if self._listen_conn is None:
+            return
+        try:
+            raw = await self._listen_conn.get_raw_connection()
+            await raw.driver_connection.remove_listener(self.channel, self._on_notify)
+        finally:
+            await self._listen_conn.close()
+            self._listen_conn = None
+    
+    async def _notify(self, conn):
+        await conn.execute(text("SELECT pg_notify(:channel, '')"), {"channel": self.channel})
+
+
+class RedisBus(BackgroundBus):
+    """Redis pub/sub"""
+    name = "redis"
+    
+    def __init__(self, poll_interval: float, url: str, channel: str):
+        super().__init__(poll_interval)
+        self.url = url
+        self.channel = channel
+        # 进程标识, 忽略自己发布的事件
+        self.origin = uuid.uuid4().hex
+        self._client = None
+        self._listener: Optional[asyncio.Task] = None
+    
+    async def _setup(self):
+        client = aioredis.from_url(self.url)
+        try:
+            await client.ping()
+        except Exception:
+            await client.close()
+            raise
+        self._client = client
+        self._listener = asyncio.create_task(self._listen())
+    
+    async def _teardown(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+    
+    async def _send(self, events: List[Event]):
+        for topic, key in events:
+            message = json.dumps({"origin": self.origin, "topic": topic, "key": key})
+            await self._client.publish(self.channel, message)
+    
+    def _on_message(self, data):
+        try:
+            message = json.loads(data)
+            origin, topic, key = message["origin"], message["topic"], message["key"]
+        except (ValueError, TypeError, KeyError):
+            logger.warning(f"无效的缓存失效消息: {data!r}")
+            return
+        if origin != self.origin:
+            self._apply(topic, key)
+    
+    async def _listen(self):
+        subscribed = False
+        while True:
+            pubsub = self._client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                if subscribed:
+                    # 中断期间的事件可能已丢失
+                    apply_all()
+                subscribed = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._on_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Redis 订阅中断, 稍后重新订阅", exc_info=True)
+                await asyncio.sleep(max(self.poll_interval, 1.0))
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+
+_bus: Optional[InvalidationBus] = None
+
+
+def get_invalidation_bus() -> InvalidationBus:
+    """按配置选择失效广播后端"""
+    global _bus
+    if _bus is not None:
+        return _bus
+    
+    from app.database import engine
+    
+    settings = get_settings()
+    backend = settings.INVALIDATION_BACKEND
+    interval = settings.INVALIDATION_POLL_INTERVAL
+    if backend == "redis" and aioredis is None:
+        logger.warning("未安装 redis 包, 缓存失效广播改用 database 后端")
+        backend = "database"
+    if backend == "postgres" and engine.dialect.driver != "asyncpg":
+        logger.warning("当前数据库不是 PostgreSQL (asyncpg), 缓存失效广播改用 database 后端")
+        backend = "database"
+    
+    if backend == "redis":
+        _bus = RedisBus(interval, settings.REDIS_URL, settings.INVALIDATION_CHANNEL)
+    elif backend == "postgres":
+        _bus = PostgresBus(interval, settings.INVALIDATION_CHANNEL)
+    elif backend == "database":
+        _bus = DatabaseBus(interval)
+    else:
+        if backend != "none":
+            logger.warning(f"未知的缓存失效广播后端 {backend}, 不广播")
+        _bus = InvalidationBus()
+    return _bus
@@ -0,0 +1,359 @@
+"""
+NavTools - 运行指标 (Prometheus 文本格式)
+
+- ASGI 中间件按路由模板统计请求数、耗时直方图与进行中的请求数
+- 数据库连接池: 获取连接等待耗时, 连接池大小 / 已借出 / 溢出连接数
+- 缓存命中率: 目录快照、认证缓存、HTTP 304
+- 事件循环延迟
+
+热路径只做字典查找和整数累加, 指标文本在抓取 /metrics 时才生成。
+"""
+import asyncio
+import bisect
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+
+# 请求耗时直方图分桶 (秒)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 连接池等待直方图分桶 (秒)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# 未匹配任何路由的请求统一归入该标签, 避免标签数量失控
+UNMATCHED_ROUTE = "<unmatched>"
+# 路径 -> 路由模板缓存的上限
+ROUTE_CACHE_SIZE = 4096
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+    
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    """只增计数器"""
+    type = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+    
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+    type = "gauge"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+    
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def dec(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+    
+    def set(self, *labels, value: float):
+        self._values[labels] = value
+    
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """直方图 (累积分桶在渲染时计算)"""
+    type = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [各桶计数 (含 +Inf), 总和]
+        self._values: Dict[Tuple, list] = {}
+    
+    def observe(self, value: float, *labels):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+    
+    def render(self) -> List[str]:
+        lines = self.header()
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表; collectors 在抓取时调用, 用于读取其他模块已有的统计"""
+    
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+    
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+    
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]):
+        self._collectors.append(collector)
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUESTS_TOTAL = registry.register(Counter(
+    "navtools_http_requests_total", "HTTP 请求数", ("method", "route", "status")
+))
+REQUEST_DURATION = registry.register(Histogram(
+    "navtools_http_request_duration_seconds", "HTTP 请求耗时", ("method", "route")
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "navtools_http_requests_in_flight", "进行中的 HTTP 请求数", ("method", "route")
+))
+POOL_CHECKOUT_WAIT = registry.register(Histogram(
+    "navtools_db_pool_checkout_wait_seconds", "从连接池获取连接的等待耗时", buckets=POOL_WAIT_BUCKETS
+))
+EVENT_LOOP_LAG = registry.register(Gauge(
+    "navtools_event_loop_lag_seconds", "事件循环延迟 (最近一次采样)"
+))
+EVENT_LOOP_LAG_HISTOGRAM = registry.register(Histogram(
+    "navtools_event_loop_lag_distribution_seconds", "事件循环延迟分布",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0)
+))
+
+
+# ---------- HTTP 中间件 ----------
+
+class MetricsMiddleware:
+    """按路由模板统计请求 (纯 ASGI 中间件)"""
+    
+    def __init__(self, app, excluded_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = set(excluded_paths)
+        self._route_cache: Dict[Tuple[str, str], str] = {}
+    
+    def _route_template(self, scope) -> str:
+        key = (scope["method"], scope["path"])
+        template = self._route_cache.get(key)
+        if template is not None:
+            return template
+        
+        template = UNMATCHED_ROUTE
+        router = scope["app"].router
+        for route in router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                template = getattr(route, "path", UNMATCHED_ROUTE)
+                break
+            if match == Match.PARTIAL and template == UNMATCHED_ROUTE:
+                template = getattr(route, "path", UNMATCHED_ROUTE)
+        
+        if template != UNMATCHED_ROUTE:
+            if len(self._route_cache) >= ROUTE_CACHE_SIZE:
+                self._route_cache.clear()
+            self._route_cache[key] = template
+        return template
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        route = self._route_template(scope)
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        REQUESTS_IN_FLIGHT.inc(method, route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_DURATION.observe(time.perf_counter() - start, method, route)
+            REQUESTS_TOTAL.inc(method, route, str(status_code))
+            REQUESTS_IN_FLIGHT.dec(method, route)
+
+
+# ---------- 数据库连接池 ----------
+
+def instrument_pool(engine):
+    """统计获取连接的等待耗时, 并在抓取时读取连接池状态"""
+    pool = engine.sync_engine.pool
+    original_do_get = pool._do_get
+    
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return original_do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+    
+    pool._do_get = timed_do_get
+    
+    def collect():
+        gauge = Gauge("navtools_db_pool_connections", "数据库连接池状态", ("state",))
+        for state in ("size", "checkedout", "checkedin", "overflow"):
+            reader = getattr(pool, state, None)
+            if callable(reader):
+                gauge.set(state, value=reader())
+        return [gauge]
+    
+    registry.add_collector(collect)
+
+
+# ---------- 缓存命中率 / 后台队列 ----------
+
+def _collect_caches():
+    from app.core.catalog import cache_stats as catalog_stats, catalog_loads
+    from app.core.auth_cache import auth_cache
+    from app.core.http_cache import cache_stats as http_stats
+    from app.core.home_payload import home_payload
+    
+    hits = Counter("navtools_cache_hits_total", "缓存命中次数", ("cache",))
+    misses = Counter("navtools_cache_misses_total", "缓存未命中次数", ("cache",))
+    ratio = Gauge("navtools_cache_hit_ratio", "缓存命中率", ("cache",))
+    for cache, hit, miss in (
+        ("catalog", catalog_stats["hits"], catalog_stats["misses"]),
+        ("auth", auth_cache.hits, auth_cache.misses),
+        ("http_etag", http_stats["not_modified"], http_stats["modified"]),
+    ):
+        hits.inc(cache, amount=hit)
+        misses.inc(cache, amount=miss)
+        ratio.set(cache, value=hit / (hit + miss) if hit + miss else 0.0)
+    stale = Counter("navtools_cache_stale_total", "过期后先返回旧值的次数", ("cache",))
+    stale.inc("catalog", amount=catalog_stats["stale"])
+    
+    # 并发加载合并: 实际加载 / 合并到进行中加载 / 失败
+    flights = Counter("navtools_singleflight_total", "缓存加载次数", ("loader", "result"))
+    for flight in (catalog_loads, home_payload.flight):
+        flights.inc(flight.name, "load", amount=flight.loads)
+        flights.inc(flight.name, "coalesced", amount=flight.coalesced)
+        flights.inc(flight.name, "failed", amount=flight.failures)
+    return [hits, misses, ratio, stale, flights]
+
+
+def _collect_queues():
+    from app.core.audit import audit_writer
+    from app.core.view_counter import view_counter
+    from app.core.invalidation import get_invalidation_bus
+    
+    audit = Gauge("navtools_audit_queue", "审计日志写入队列", ("stat",))
+    for key, value in audit_writer.stats().items():
+        audit.set(key, value=value)
+    pending = Gauge("navtools_view_count_pending", "尚未写回的浏览次数")
+    pending.set(value=view_counter.pending_total)
+    
+    stats = get_invalidation_bus().stats()
+    events = Counter("navtools_invalidation_events_total", "缓存失效广播事件数", ("direction",))
+    events.inc("published", amount=stats["published"])
+    events.inc("received", amount=stats["received"])
+    events.inc("dropped", amount=stats["dropped"])
+    invalidation_pending = Gauge("navtools_invalidation_pending", "尚未发布的缓存失效事件")
+    invalidation_pending.set(value=stats["pending"])
+    return [audit, pending, events, invalidation_pending]
+
+
+registry.add_collector(_collect_caches)
+registry.add_collector(_collect_queues)
+
+
+# ---------- 事件循环延迟 ----------
+
+class EventLoopLagMonitor:
+    """定时休眠, 实际唤醒时间与预期的差值即为事件循环延迟"""
+    
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            EVENT_LOOP_LAG.set(value=lag)
+            EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_lag_monitor = EventLoopLagMonitor()
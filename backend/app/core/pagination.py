@@ -0,0 +1,151 @@
+"""
+NavTools - 分页 (页码分页 / 游标分页)
+
+游标分页按排序列做 keyset 比较, 深翻页不再随 OFFSET 变慢; 总数统计改为可选。
+页码分页保持原有行为, 用于兼容旧客户端。
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, func, and_, or_
+
+from app.core.exceptions import BusinessException
+
+# 可空时间列的 SortKey 默认值 (早于所有实际时间, 降序时排在最后)
+MIN_DATETIME = datetime(1970, 1, 1)
+
+
+class SortKey:
+    """排序列 (最后一列必须唯一, 通常为 id)"""
+    
+    def __init__(self, column, descending: bool = False, default: Any = None):
+        self.column = column
+        self.descending = descending
+        # 可空列在游标模式下用 default 代替 NULL 参与比较
+        self.default = default
+    
+    @property
+    def expr(self):
+        if self.default is not None:
+            return func.coalesce(self.column, self.default)
+        return self.column
+    
+    @property
+    def order_by(self):
+        return self.expr.desc() if self.descending else self.expr.asc()
+    
+    def value(self, entity) -> Any:
+        value = getattr(entity, self.column.key)
+        if value is None:
+            return self.default
+        return value
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """编码游标 (对客户端不透明)"""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: Optional[int] = None) -> List[Any]:
+    """解码游标"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise BusinessException("无效的分页游标")
+    if not isinstance(values, list) or (size is not None and len(values) != size):
+        raise BusinessException("无效的分页游标")
+    return [_decode_value(v) for v in values]
+
+
+def keyset_after(sort_keys: Sequence[SortKey], values: Sequence[Any]):
+    """排在游标之后的行: (a > x) OR (a = x AND b > y) OR ..."""
+    clauses = []
+    for i, key in enumerate(sort_keys):
+        expr = key.expr
+        value = values[i]
+        step = expr < value if key.descending else expr > value
+        equals = [sort_keys[j].expr == values[j] for j in range(i)]
+        clauses.append(and_(*equals, step) if equals else step)
+    return or_(*clauses)
+
+
+def offset_query(
+    query,
+    sort_keys: Sequence[SortKey],
+    page: int,
+    page_size: int,
+    page_order: Optional[Sequence] = None
+):
+    """页码分页的查询语句"""
+    order = page_order if page_order is not None else [k.order_by for k in sort_keys]
+    return query.order_by(*order).offset((page - 1) * page_size).limit(page_size)
+
+
+def keyset_query(
+    query,
+    sort_keys: Sequence[SortKey],
+    page_size: int,
+    values: Optional[Sequence[Any]] = None
+):
+    """游标分页的查询语句 (多取一行用于判断是否还有下一页)"""
+    if values:
+        query = query.where(keyset_after(sort_keys, values))
+    return query.order_by(*[k.order_by for k in sort_keys]).limit(page_size + 1)
+
+
+async def paginate(
+    db,
+    query,
+    sort_keys: Sequence[SortKey],
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    page_order: Optional[Sequence] = None
+) -> Tuple[list, dict]:
+    """
+    执行分页查询, 返回 (行列表, 分页信息)
+    
+    - 未传 cursor: 页码分页, 总是返回 total (兼容旧接口)
+    - 传入 cursor (首页传空字符串): 游标分页, with_total=True 时才统计总数
+    """
+    if cursor is None:
+        count_result = await db.execute(select(func.count()).select_from(query.subquery()))
+        total = count_result.scalar()
+        
+        result = await db.execute(offset_query(query, sort_keys, page, page_size, page_order))
+        return result.all(), {"total": total, "page": page, "page_size": page_size}
+    
+    meta = {"page_size": page_size}
+    if with_total:
+        count_result = await db.execute(select(func.count()).select_from(query.subquery()))
+        meta["total"] = count_result.scalar()
+    
+    values = decode_cursor(cursor, len(sort_keys)) if cursor else None
+    result = await db.execute(keyset_query(query, sort_keys, page_size, values))
+    rows = result.all()
+    
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        entity = rows[-1][0]
+        next_cursor = encode_cursor([k.value(entity) for k in sort_keys])
+    meta["next_cursor"] = next_cursor
+    
+    return rows, meta
@@ -0,0 +1,299 @@
+"""
+NavTools - 按请求的采样分析器 (可选)
+
+- 按 PROFILER_SAMPLE_RATE 随机抽样请求, 或由超级管理员携带签名请求头按需分析
+- 后台线程按固定间隔读取事件循环线程的调用栈 (墙钟采样):
+  请求协程正在执行时记录实际调用栈 (含 ORM / Pydantic 序列化),
+  挂起等待时记录协程的 await 链, 末尾标记 <waiting>
+- 结果以折叠栈 (folded stacks) 形式保存在有界环形缓冲区中,
+  可直接用 flamegraph.pl / speedscope 查看
+"""
+import asyncio
+import hashlib
+import hmac
+import itertools
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import get_settings
+
+# 按需分析的请求头
+PROFILE_HEADER = "x-profile-token"
+# 挂起等待时追加的栈帧标记
+WAITING_FRAME = "<waiting>"
+# 单个调用栈最多保留的帧数
+MAX_STACK_DEPTH = 128
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    parts = filename.replace("\\", "/").rsplit("/", 2)
+    short = "/".join(parts[-2:])
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+def _await_chain(coro) -> List:
+    """协程的 await 链 (由外到内的栈帧)"""
+    frames = []
+    while coro is not None and len(frames) < MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+def _thread_stack(frame) -> List:
+    """线程当前调用栈 (由外到内)"""
+    frames = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+@dataclass
+class Profile:
+    """单次请求的分析结果"""
+    id: int
+    method: str
+    path: str
+    reason: str
+    started_at: datetime
+    interval: float
+    route: Optional[str] = None
+    status_code: Optional[int] = None
+    duration: float = 0.0
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+    
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status_code": self.status_code,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 2),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+        }
+    
+    def folded(self) -> str:
+        """折叠栈文本, 每行: 帧1;帧2;... 次数"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+    
+    def top_functions(self, limit: int = 30) -> List[dict]:
+        """按函数统计自身耗时与累计耗时 (毫秒, 按采样数估算)"""
+        self_samples: Counter = Counter()
+        total_samples: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_samples[frames[-1]] += count
+            for frame in set(frames):
+                total_samples[frame] += count
+        
+        ms = self.interval * 1000
+        return [
+            {
+                "function": name,
+                "self_ms": round(self_samples[name] * ms, 2),
+                "total_ms": round(count * ms, 2),
+            }
+            for name, count in total_samples.most_common(limit)
+        ]
+
+
+class StackSampler:
+    """在后台线程中对指定请求任务做墙钟采样"""
+    
+    def __init__(self, profile: Profile, task: asyncio.Task, thread_id: int):
+        self.profile = profile
+        self.task = task
+        self.thread_id = thread_id
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="navtools-profiler", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stopped.set()
+    
+    def join(self):
+        self._thread.join()
+    
+    def _sample(self):
+        coro = self.task.get_coro()
+        chain = _await_chain(coro)
+        if not chain:
+            return
+        
+        if getattr(coro, "cr_running", False):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = _thread_stack(frame)
+            root = chain[0]
+            if root in stack:
+                # 从请求协程开始截取, 去掉事件循环自身的帧
+                frames = stack[stack.index(root):]
+            else:
+                # 在 greenlet 中执行 (SQLAlchemy 异步桥接), 线程栈不含协程帧
+                frames = chain + stack
+            labels = [_frame_label(f.f_code) for f in frames]
+        else:
+            labels = [_frame_label(f.f_code) for f in chain] + [WAITING_FRAME]
+        
+        self.profile.stacks[";".join(labels)] += 1
+        self.profile.samples += 1
+    
+    def _run(self):
+        interval = self.profile.interval
+        while not self._stopped.wait(interval):
+            try:
+                self._sample()
+            except Exception:
+                # 读取其他线程的栈帧存在竞争, 单次采样失败直接跳过
+                continue
+
+
+class ProfileStore:
+    """最近 N 次分析结果 (环形缓冲区)"""
+    
+    def __init__(self, max_profiles: int = 50):
+        self._profiles: deque = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+    
+    def next_id(self) -> int:
+        return next(self._ids)
+    
+    def add(self, profile: Profile):
+        self._profiles.append(profile)
+    
+    def list(self) -> List[Profile]:
+        return list(reversed(self._profiles))
+    
+    def get(self, profile_id: int) -> Optional[Profile]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+    
+    def clear(self):
+        self._profiles.clear()
+
+
+# ---------- 按需分析令牌 ----------
+
+def _token_signature(secret: str, admin_id: int, expires: int) -> str:
+    message = f"profile:{admin_id}:{expires}".encode()
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def create_profile_token(secret: str, admin_id: int, ttl: int) -> Dict:
+    """签发按需分析令牌, 格式: 管理员ID.过期时间戳.签名"""
+    expires = int(time.time()) + ttl
+    token = f"{admin_id}.{expires}.{_token_signature(secret, admin_id, expires)}"
+    return {"header": PROFILE_HEADER, "token": token, "expires_at": datetime.utcfromtimestamp(expires)}
+
+
+def verify_profile_token(secret: str, token: str) -> bool:
+    try:
+        admin_id, expires, signature = token.split(".")
+        admin_id, expires = int(admin_id), int(expires)
+    except ValueError:
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(signature, _token_signature(secret, admin_id, expires))
+
+
+# ---------- 中间件 ----------
+
+class ProfilerMiddleware:
+    """抽样或按需分析请求 (纯 ASGI 中间件)"""
+    
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        secret: str,
+        sample_rate: float = 0.0,
+        interval: float = 0.005,
+        max_concurrent: int = 2,
+        excluded_prefixes=("/admin/debug/profiles", "/metrics"),
+    ):
+        self.app = app
+        self.store = store
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_concurrent = max_concurrent
+        self.excluded_prefixes = tuple(excluded_prefixes)
+        self._active = 0
+    
+    def _reason(self, scope) -> Optional[str]:
+        if scope["path"].startswith(self.excluded_prefixes):
+            return None
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER.encode():
+                if verify_profile_token(self.secret, value.decode("latin-1")):
+                    return "requested"
+                break
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        reason = self._reason(scope)
+        if reason is None or self._active >= self.max_concurrent:
+            await self.app(scope, receive, send)
+            return
+        
+        profile = Profile(
+            id=self.store.next_id(),
+            method=scope["method"],
+            path=scope["path"],
+            reason=reason,
+            started_at=datetime.utcnow(),
+            interval=self.interval,
+        )
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+            await send(message)
+        
+        sampler = StackSampler(profile, asyncio.current_task(), threading.get_ident())
+        self._active += 1
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.duration = time.perf_counter() - start
+            sampler.stop()
+            # 线程在下一个采样间隔内退出
+            await asyncio.to_thread(sampler.join)
+            self._active -= 1
+            route = scope.get("route")
+            profile.route = getattr(route, "path", None)
+            self.store.add(profile)
+
+
+settings = get_settings()
+
+profile_store = ProfileStore(max_profiles=settings.PROFILER_MAX_PROFILES)
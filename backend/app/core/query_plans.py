@@ -0,0 +1,131 @@
+"""
+NavTools - 查询形态登记与执行计划检查
+
+各模块把会在线上执行的查询形态 (带代表性参数) 登记在这里, 开发命令
+python -m scripts.explain_queries 在当前数据库方言上逐个执行 EXPLAIN,
+标记全表扫描与额外排序 (filesort / 临时 B 树)。
+
+- SQLite: EXPLAIN QUERY PLAN, "SCAN <表>" 且未使用索引为全表扫描,
+  "USE TEMP B-TREE FOR ORDER BY" 为额外排序
+- PostgreSQL: EXPLAIN (FORMAT JSON), Seq Scan / Sort 节点
+  (表很小时优化器本就倾向顺序扫描, 应在有代表性数据量的库上检查)
+- MySQL: EXPLAIN, type=ALL 为全表扫描, Extra 含 Using filesort 为额外排序
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from sqlalchemy.sql import Executable
+
+
+@dataclass
+class QueryShape:
+    """登记的查询形态"""
+    name: str
+    build: Callable[[], Executable]
+    # 有意读取整表的查询 (如目录快照加载), 不标记全表扫描
+    allow_scan: bool = False
+
+
+@dataclass
+class PlanReport:
+    """单个查询形态的执行计划检查结果"""
+    name: str
+    plan: List[str] = field(default_factory=list)
+    full_scans: List[str] = field(default_factory=list)
+    sorts: List[str] = field(default_factory=list)
+    
+    @property
+    def flagged(self) -> bool:
+        return bool(self.full_scans or self.sorts)
+
+
+_shapes: Dict[str, QueryShape] = {}
+
+
+def register_query_shape(name: str, build: Callable[[], Executable], allow_scan: bool = False):
+    """登记查询形态, build() 返回带代表性参数的语句"""
+    _shapes[name] = QueryShape(name, build, allow_scan)
+
+
+def get_query_shapes() -> List[QueryShape]:
+    """已登记的查询形态 (按名称排序)"""
+    return [_shapes[name] for name in sorted(_shapes)]
+
+
+def _compile(conn, statement: Executable) -> str:
+    """编译为内联参数的 SQL (EXPLAIN 不一定支持参数绑定)"""
+    return str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _explain_sqlite(conn, sql: str, report: PlanReport):
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    for row in rows:
+        detail = row[-1]
+        report.plan.append(detail)
+        words = detail.split()
+        # "SCAN tools" 为全表扫描; "SCAN tools USING INDEX ..." 为按索引顺序读取
+        if words[0] == "SCAN" and "INDEX" not in words and "SUBQUERY" not in words:
+            report.full_scans.append(detail)
+        if detail.startswith("USE TEMP B-TREE FOR"):
+            report.sorts.append(detail)
+
+
+def _explain_postgresql(conn, sql: str, report: PlanReport):
+    raw = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    plan = json.loads(raw) if isinstance(raw, str) else raw
+    
+    def walk(node: dict, depth: int):
+        node_type = node["Node Type"]
+        relation = node.get("Relation Name")
+        index = node.get("Index Name")
+        line = "  " * depth + node_type
+        if relation:
+            line += f" on {relation}"
+        if index:
+            line += f" using {index}"
+        report.plan.append(line)
+        if node_type == "Seq Scan":
+            report.full_scans.append(line.strip())
+        if node_type in ("Sort", "Incremental Sort"):
+            report.sorts.append(f"{node_type} ({', '.join(node.get('Sort Key', []))})")
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+    
+    walk(plan[0]["Plan"], 0)
+
+
+def _explain_mysql(conn, sql: str, report: PlanReport):
+    result = conn.exec_driver_sql(f"EXPLAIN {sql}")
+    for row in result.mappings().all():
+        table = row.get("table")
+        extra = row.get("Extra") or ""
+        line = f"{table}: type={row.get('type')} key={row.get('key')} {extra}".rstrip()
+        report.plan.append(line)
+        if row.get("type") == "ALL":
+            report.full_scans.append(line)
+        if "Using filesort" in extra or "Using temporary" in extra:
+            report.sorts.append(line)
+
+
+_EXPLAINERS = {
+    "sqlite": _explain_sqlite,
+    "postgresql": _explain_postgresql,
+    "mysql": _explain_mysql,
+}
+
+
+def explain_shape(conn, shape: QueryShape) -> PlanReport:
+    """
+    在同步连接上检查查询形态的执行计划 (通过 AsyncConnection.run_sync 调用)
+    
+    allow_scan 的形态不标记全表扫描。
+    """
+    explainer = _EXPLAINERS.get(conn.dialect.name)
+    if explainer is None:
+        raise NotImplementedError(f"不支持的数据库方言: {conn.dialect.name}")
+    report = PlanReport(shape.name)
+    explainer(conn, _compile(conn, shape.build()), report)
+    if shape.allow_scan:
+        report.full_scans = []
+    return report
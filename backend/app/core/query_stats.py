@@ -0,0 +1,129 @@
+"""
+NavTools - 按请求统计 SQL 查询与慢查询日志
+
+- 通过 SQLAlchemy before/after_cursor_execute 事件统计每条语句耗时
+- 当前请求的统计对象放在 contextvar 中, 查询次数与数据库总耗时归属到该请求
+- SQL_DEBUG_HEADERS 开启时在响应中附带 Server-Timing 与 X-DB-Queries 头
+- 超过 SLOW_QUERY_THRESHOLD_MS 的语句写入慢查询日志 (参数只记录类型, 不记录值)
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+slow_query_logger = logging.getLogger("navtools.slow_query")
+
+# 非请求上下文 (后台任务等) 的路由标签
+BACKGROUND_ROUTE = "<background>"
+# 慢查询日志中语句的最大长度
+MAX_STATEMENT_LENGTH = 2000
+
+
+class QueryStats:
+    """单个请求的查询统计"""
+    
+    __slots__ = ("scope", "count", "duration")
+    
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.duration = 0.0
+    
+    @property
+    def route(self) -> str:
+        """路由模板 (路由匹配前为原始路径)"""
+        if self.scope is None:
+            return BACKGROUND_ROUTE
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or self.scope.get("path", "")
+        return f"{self.scope.get('method', '')} {path}".strip()
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """当前请求的查询统计, 不在请求中时返回 None"""
+    return _current_stats.get()
+
+
+def redact_parameters(parameters, executemany: bool = False) -> str:
+    """参数脱敏: 只保留类型"""
+    if executemany:
+        return f"<{len(parameters)} 组参数>"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: <{type(v).__name__}>" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(f"<{type(v).__name__}>" for v in parameters) + ")"
+    return "<redacted>"
+
+
+def install_query_hooks(engine, slow_threshold_ms: int = 0):
+    """在引擎上注册计时事件; slow_threshold_ms 为 0 时不记录慢查询"""
+    sync_engine = engine.sync_engine
+    slow_threshold = slow_threshold_ms / 1000
+    
+    # 开始时间按执行上下文记录; 执行失败时不会触发 after_cursor_execute, 由 handle_error 移除
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", {})[id(context)] = time.perf_counter()
+    
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None:
+            conn.info.get("query_start", {}).pop(id(exception_context.execution_context), None)
+    
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop(id(context))
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+        
+        if slow_threshold and elapsed >= slow_threshold:
+            slow_query_logger.warning(
+                "慢查询 %.1fms [%s] %s 参数=%s",
+                elapsed * 1000,
+                stats.route if stats is not None else BACKGROUND_ROUTE,
+                " ".join(statement.split())[:MAX_STATEMENT_LENGTH],
+                redact_parameters(parameters, executemany),
+            )
+
+
+class QueryStatsMiddleware:
+    """为每个请求创建查询统计 (纯 ASGI 中间件)"""
+    
+    def __init__(self, app, debug_headers: bool = False):
+        self.app = app
+        self.debug_headers = debug_headers
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = QueryStats(scope)
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        
+        async def send_wrapper(message):
+            if self.debug_headers and message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - start) * 1000
+                db_ms = stats.duration * 1000
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'.encode()
+                ))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                message["headers"] = headers
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
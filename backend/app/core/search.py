@@ -0,0 +1,259 @@
+"""
+NavTools - 工具全文搜索 (按数据库方言选择后端)
+
+- SQLite: FTS5 (trigram 分词) 外部内容表, 由触发器与 tools 表保持同步
+- PostgreSQL / Supabase: tsvector 生成列 + GIN 索引
+- MySQL: FULLTEXT 索引 (ngram 解析器)
+- 其他: LIKE 兜底
+
+索引都由数据库自身维护, 工具的新增 / 修改 / 删除无需额外同步代码。
+"""
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, text, or_
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import get_settings
+from app.core.query_plans import register_query_shape
+
+logger = logging.getLogger(__name__)
+
+
+def like_query(term: str, limit: int):
+    """LIKE 搜索: 按列表顺序返回匹配的启用工具 ID"""
+    from app.models import Tool, Tag, ToolTag
+    from app.core.tags import tag_key
+    
+    # 标签按唯一键 (不区分大小写) 匹配, 避免对 JSON 原文做子串匹配产生误命中
+    tagged = select(ToolTag.tool_id).join(Tag, Tag.id == ToolTag.tag_id).where(
+        Tag.key.contains(tag_key(term))
+    )
+    return select(Tool.id).where(
+        (Tool.is_active == True) & or_(
+            Tool.name.contains(term),
+            Tool.short_description.contains(term),
+            Tool.id.in_(tagged)
+        )
+    ).order_by(Tool.sort_order.asc(), Tool.created_at.desc()).limit(limit)
+
+
+# 子串匹配无法走索引, 检查的是按列表顺序读取启用工具而不额外排序
+register_query_shape("search.like", lambda: like_query("json", 50))
+
+
+class SearchBackend:
+    """搜索后端基类 (LIKE 实现)"""
+    name = "like"
+    # 全文检索可用的最短关键词长度, 更短时退回 LIKE
+    min_term_length = 1
+    
+    async def setup(self, conn: AsyncConnection):
+        """创建索引等结构 (启动时调用, 需幂等)"""
+        pass
+    
+    async def suspend_sync(self, conn: AsyncConnection):
+        """大批量写入前暂停索引同步 (默认无需处理)"""
+        pass
+    
+    async def resume_sync(self, conn: AsyncConnection):
+        """大批量写入后恢复索引同步并重建索引"""
+        pass
+    
+    async def search(self, db: AsyncSession, term: str, limit: int) -> List[int]:
+        """返回按相关度排序的启用工具 ID"""
+        term = term.strip()
+        if not term:
+            return []
+        if len(term) >= self.min_term_length:
+            ids = await self._fulltext(db, term, limit)
+            if ids:
+                return ids
+        # 全文检索无结果时用 LIKE 兜底, 保证中文子串等场景的召回
+        return await self._like(db, term, limit)
+    
+    async def _fulltext(self, db: AsyncSession, term: str, limit: int) -> List[int]:
+        return []
+    
+    async def _like(self, db: AsyncSession, term: str, limit: int) -> List[int]:
+        result = await db.execute(like_query(term, limit))
+        return list(result.scalars().all())
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """SQLite FTS5"""
+    name = "sqlite-fts5"
+    min_term_length = 3  # trigram 分词要求至少 3 个字符
+    
+    async def setup(self, conn: AsyncConnection):
+        result = await conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'tools_fts'")
+        )
+        exists = result.scalar_one_or_none() is not None
+        
+        await conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS tools_fts USING fts5("
+            "name, short_description, tags, "
+            "content='tools', content_rowid='id', tokenize='trigram')"
+        ))
+        await self._create_triggers(conn)
+        if not exists:
+            # 首次创建时为已有数据建立索引
+            await conn.execute(text("INSERT INTO tools_fts(tools_fts) VALUES ('rebuild')"))
+    
+    async def _create_triggers(self, conn: AsyncConnection):
+        await conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS tools_fts_ai AFTER INSERT ON tools BEGIN "
+            "INSERT INTO tools_fts(rowid, name, short_description, tags) "
+            "VALUES (new.id, new.name, new.short_description, new.tags); END"
+        ))
+        await conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS tools_fts_ad AFTER DELETE ON tools BEGIN "
+            "INSERT INTO tools_fts(tools_fts, rowid, name, short_description, tags) "
+            "VALUES ('delete', old.id, old.name, old.short_description, old.tags); END"
+        ))
+        await conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS tools_fts_au "
+            "AFTER UPDATE OF name, short_description, tags ON tools BEGIN "
+            "INSERT INTO tools_fts(tools_fts, rowid, name, short_description, tags) "
+            "VALUES ('delete', old.id, old.name, old.short_description, old.tags); "
+            "INSERT INTO tools_fts(rowid, name, short_description, tags) "
+            "VALUES (new.id, new.name, new.short_description, new.tags); END"
+        ))
+    
+    async def suspend_sync(self, conn: AsyncConnection):
+        # 逐行触发器在百万级导入时比导入本身更慢, 改为导入后整体重建
+        for trigger in ("tools_fts_ai", "tools_fts_ad", "tools_fts_au"):
+            await conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    
+    async def resume_sync(self, conn: AsyncConnection):
+        await self._create_triggers(conn)
+        await conn.execute(text("INSERT INTO tools_fts(tools_fts) VALUES ('rebuild')"))
+    
+    async def _fulltext(self, db: AsyncSession, term: str, limit: int) -> List[int]:
+        # 作为短语查询, 避免关键词中的 FTS 语法字符
+        phrase = '"' + term.replace('"', '""') + '"'
+        result = await db.execute(
+            text(
+                "SELECT tools.id FROM tools_fts "
+                "JOIN tools ON tools.id = tools_fts.rowid "
+                "WHERE tools_fts MATCH :q AND tools.is_active = 1 "
+                "ORDER BY bm25(tools_fts, 10.0, 3.0, 1.0), tools.sort_order "
+                "LIMIT :limit"
+            ),
+            {"q": phrase, "limit": limit}
+        )
+        return list(result.scalars().all())
+
+
+class PostgresFTSBackend(SearchBackend):
+    """PostgreSQL tsvector + GIN"""
+    name = "postgres-tsvector"
+    
+    async def setup(self, conn: AsyncConnection):
+        await conn.execute(text(
+            "ALTER TABLE tools ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(short_description, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(tags, '')), 'C')"
+            ") STORED"
+        ))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_tool_search ON tools USING GIN (search_vector)"
+        ))
+    
+    async def _fulltext(self, db: AsyncSession, term: str, limit: int) -> List[int]:
+        result = await db.execute(
+            text(
+                "SELECT id FROM tools, plainto_tsquery('simple', :q) AS query "
+                "WHERE search_vector @@ query AND is_active = true "
+                "ORDER BY ts_rank(search_vector, query) DESC, sort_order "
+                "LIMIT :limit"
+            ),
+            {"q": term, "limit": limit}
+        )
+        return list(result.scalars().all())
+
+
+class MySQLFullTextBackend(SearchBackend):
+    """MySQL FULLTEXT (ngram)"""
+    name = "mysql-fulltext"
+    min_term_length = 2  # ngram_token_size 默认为 2
+    
+    async def setup(self, conn: AsyncConnection):
+        result = await conn.execute(text(
+            "SELECT COUNT(*) FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'tools' "
+            "AND index_name = 'idx_tool_fulltext'"
+        ))
+        if not result.scalar():
+            await conn.execute(text(
+                "ALTER TABLE tools ADD FULLTEXT INDEX idx_tool_fulltext "
+                "(name, short_description, tags) WITH PARSER ngram"
+            ))
+    
+    async def _fulltext(self, db: AsyncSession, term: str, limit: int) -> List[int]:
+        result = await db.execute(
+            text(
+                "SELECT id FROM tools "
+                "WHERE MATCH(name, short_description, tags) AGAINST (:q IN NATURAL LANGUAGE MODE) "
+                "AND is_active = 1 "
+                "ORDER BY MATCH(name, short_description, tags) AGAINST (:q IN NATURAL LANGUAGE MODE) DESC, "
+                "sort_order "
+                "LIMIT :limit"
+            ),
+            {"q": term, "limit": limit}
+        )
+        return list(result.scalars().all())
+
+
+_BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresFTSBackend,
+    "mysql": MySQLFullTextBackend,
+}
+
+_backend: Optional[SearchBackend] = None
+
+
+def get_search_backend() -> SearchBackend:
+    """按数据库方言选择搜索后端"""
+    global _backend
+    if _backend is None:
+        from app.database import engine
+        
+        if get_settings().SEARCH_BACKEND == "like":
+            _backend = SearchBackend()
+        else:
+            _backend = _BACKENDS.get(engine.dialect.name, SearchBackend)()
+    return _backend
+
+
+async def init_search(engine):
+    """初始化搜索索引, 失败时退回 LIKE 搜索"""
+    global _backend
+    backend = get_search_backend()
+    try:
+        async with engine.begin() as conn:
+            await backend.setup(conn)
+    except Exception:
+        logger.warning(f"搜索后端 {backend.name} 初始化失败, 改用 LIKE 搜索", exc_info=True)
+        _backend = SearchBackend()
+        return
+    logger.info(f"搜索后端: {backend.name}")
+
+
+async def search_tool_ids(term: str, limit: Optional[int] = None) -> Tuple[List[int], bool]:
+    """
+    搜索启用的工具, 返回 (按相关度排序的 ID, 是否因超出 limit 被截断)
+    
+    多取一行判断是否截断, 不额外执行 COUNT
+    """
+    from app.database import AsyncSessionLocal
+    
+    if limit is None:
+        limit = get_settings().SEARCH_MAX_RESULTS
+    async with AsyncSessionLocal() as db:
+        ids = await get_search_backend().search(db, term, limit + 1)
+    return ids[:limit], len(ids) > limit
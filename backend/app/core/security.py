@@ -1,26 +1,64 @@
 """
 NavTools - 安全模块 (JWT, 密码)
+
+bcrypt 单次计算耗时数百毫秒, 密码哈希与校验都放到专用的有限线程池中执行,
+避免阻塞事件循环。
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
 from app.core.config import get_settings
 
+_settings = get_settings()
+
 # 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 最小 / 最大轮数与默认轮数一致: 调整 BCRYPT_ROUNDS 后, 旧哈希在下次登录时自动重新生成
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=_settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=_settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=_settings.BCRYPT_ROUNDS
+)
+
+# 密码计算专用线程池 (限制并发, 不占用默认线程池)
+_password_executor = ThreadPoolExecutor(
+    max_workers=_settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
+
+async def _run_in_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, func, *args)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return await _run_in_executor(pwd_context.verify, plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+async def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """验证密码, 哈希参数已过期时一并返回新哈希 (否则为 None)"""
+    return await _run_in_executor(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash(password: str) -> str:
     """生成密码哈希"""
-    return pwd_context.hash(password)
+    return await _run_in_executor(pwd_context.hash, password)
+
+
+def shutdown_password_executor():
+    """关闭密码计算线程池"""
+    _password_executor.shutdown(wait=False, cancel_futures=True)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -0,0 +1,132 @@
+"""
+NavTools - 响应序列化 (直接输出字节)
+
+- dumps(): 安装 orjson 时使用 orjson, 否则回退到标准库 json, 输出与
+  FastAPI 默认 JSONResponse 一致 (UTF-8, 紧凑分隔符, datetime 为 ISO 8601)
+- FragmentCache: 按实体 id 缓存序列化好的 JSON 片段, 以修订键校验, 修订键变化时重建;
+  超出容量时淘汰最久未使用的片段。修订键取实体本身的数据 (row_revision: 行的全部列值),
+  不能只用 updated_at: MySQL DATETIME 只精确到秒, 同一秒内的两次修改时间相同
+- 列表响应由缓存片段直接拼接, 不再逐行构建字典和 Pydantic 模型
+"""
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Hashable, Iterable, Optional, Tuple
+
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import inspect
+
+from app.core.config import get_settings
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+
+def _default(obj: Any):
+    """标准库 / orjson 不支持的类型"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        """序列化为 JSON 字节"""
+        return orjson.dumps(obj, default=_default)
+else:
+    def dumps(obj: Any) -> bytes:
+        """序列化为 JSON 字节"""
+        return json.dumps(
+            obj, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+        ).encode("utf-8")
+
+
+def json_response(body: bytes, response: Optional[Response] = None) -> Response:
+    """返回已序列化的 JSON (保留注入的 response 上设置的响应头, 如 ETag)"""
+    headers = response.headers if response is not None else None
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def envelope(data: bytes, message: str = "success") -> bytes:
+    """统一响应结构 {"code":200,"message":...,"data":...}"""
+    return b'{"code":200,"message":' + dumps(message) + b',"data":' + data + b"}"
+
+
+def join_array(fragments: Iterable[bytes]) -> bytes:
+    """拼接 JSON 数组"""
+    return b"[" + b",".join(fragments) + b"]"
+
+
+def list_data(fragments: Iterable[bytes], **meta) -> bytes:
+    """列表数据 {"items":[...], **meta}, 保持 items 在前的字段顺序"""
+    body = b'{"items":' + join_array(fragments)
+    if meta:
+        body += b"," + dumps(meta)[1:]
+    else:
+        body += b"}"
+    return body
+
+
+def row_revision(row) -> tuple:
+    """ORM 行的全部列值, 用作片段修订键 (任一列变化即不同, 与时间精度无关)"""
+    return tuple(getattr(row, attr.key) for attr in inspect(type(row)).column_attrs)
+
+
+class FragmentCache:
+    """按实体 id 缓存的 JSON 片段 (LRU)"""
+    
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, bytes]]" = OrderedDict()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, entity_id: Hashable, revision: Hashable, build: Callable[[], Any]) -> bytes:
+        """返回修订键一致的片段, 否则调用 build() 构建并序列化"""
+        entry = self._entries.get(entity_id)
+        if entry is not None and entry[0] == revision:
+            self.hits += 1
+            self._entries.move_to_end(entity_id)
+            return entry[1]
+        
+        self.misses += 1
+        fragment = dumps(build())
+        self._entries[entity_id] = (revision, fragment)
+        self._entries.move_to_end(entity_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return fragment
+    
+    def discard(self, entity_id: Hashable):
+        """使单个实体的片段失效"""
+        self._entries.pop(entity_id, None)
+    
+    def clear(self):
+        self._entries.clear()
+
+
+settings = get_settings()
+
+# 公开接口 (数据来自目录快照)
+public_tool_fragments = FragmentCache("public_tool", settings.RESPONSE_FRAGMENT_CACHE_SIZE)
+public_tool_detail_fragments = FragmentCache("public_tool_detail", settings.RESPONSE_FRAGMENT_CACHE_SIZE)
+public_category_fragments = FragmentCache("public_category", settings.RESPONSE_FRAGMENT_CACHE_SIZE)
+# 管理端列表 (数据来自数据库行)
+admin_tool_fragments = FragmentCache("admin_tool", settings.RESPONSE_FRAGMENT_CACHE_SIZE)
+admin_category_fragments = FragmentCache("admin_category", settings.RESPONSE_FRAGMENT_CACHE_SIZE)
@@ -0,0 +1,41 @@
+"""
+NavTools - 流式导出工具函数 (CSV / NDJSON / gzip)
+
+导出接口按批次把记录编码为文本块, 交给 StreamingResponse 边生成边发送,
+内存占用只与批次大小有关。
+"""
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Iterable, List
+
+# UTF-8 BOM, 便于 Excel 正确识别中文 CSV
+CSV_BOM = "\ufeff"
+
+
+def encode_ndjson(records: Iterable[dict]) -> str:
+    """每条记录一行 JSON"""
+    return "".join(
+        json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records
+    )
+
+
+def encode_csv(records: Iterable[dict], fieldnames: List[str], header: bool = False) -> str:
+    """编码为 CSV 文本块"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue()
+
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """边生成边压缩 (gzip 格式)"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
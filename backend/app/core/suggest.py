@@ -0,0 +1,299 @@
+"""
+NavTools - 搜索联想 (进程内倒排索引 + 前缀树)
+
+索引工具名称、标识、简介和标签:
+- 英文 / 数字按单词切分, 最后一个单词按前缀匹配 (前缀树)
+- 中文按字符 1-gram / 2-gram 切分 (倒排索引)
+- 安装 pypinyin 后额外支持名称的全拼与首字母匹配
+
+索引跟随目录快照版本增量更新, 只重建发生变化的工具, 查询不访问数据库。
+"""
+import asyncio
+import heapq
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # 可选依赖
+    lazy_pinyin = None
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]+")
+
+# 候选过多时参与精排的数量
+RERANK_POOL_SIZE = 64
+
+
+def _cjk_grams(run: str) -> List[str]:
+    """中文连续片段的 1-gram 与 2-gram"""
+    grams = list(run)
+    grams.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return grams
+
+
+def _query_grams(run: str) -> List[str]:
+    """查询中的中文片段: 单字查 1-gram, 否则查全部 2-gram"""
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(text: str) -> Tuple[Set[str], Set[str]]:
+    """切分文本, 返回 (单词, 中文 n-gram)"""
+    text = (text or "").lower()
+    words = set(_WORD_RE.findall(text))
+    grams = set()
+    for run in _CJK_RE.findall(text):
+        grams.update(_cjk_grams(run))
+    return words, grams
+
+
+@lru_cache(maxsize=4096)
+def _run_pinyin(run: str) -> Tuple[str, ...]:
+    syllables = lazy_pinyin(run)
+    full = "".join(syllables)
+    initials = "".join(s[0] for s in syllables if s)
+    return tuple(t for t in (full, initials) if t.isascii() and t.isalnum())
+
+
+def _pinyin_tokens(name: str) -> Set[str]:
+    """名称中文部分的全拼与首字母"""
+    if lazy_pinyin is None:
+        return set()
+    tokens = set()
+    for run in _CJK_RE.findall(name or ""):
+        tokens.update(_run_pinyin(run))
+    return tokens
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+    
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # 该前缀下出现的工具 ID -> 引用次数
+        self.ids: Dict[int, int] = {}
+
+
+class SuggestIndex:
+    """倒排索引 + 前缀树"""
+    
+    def __init__(self):
+        self._root = _TrieNode()
+        self._postings: Dict[str, Set[int]] = {}
+        self._doc_tokens: Dict[int, Tuple[Set[str], Set[str]]] = {}
+        self._doc_keys: Dict[int, tuple] = {}
+        self._docs: Dict[int, dict] = {}
+        # 按浏览量降序排列的工具 ID, 用于宽泛查询的快速截断
+        self._ranked: Optional[List[int]] = None
+        self._refresh_lock = asyncio.Lock()
+        self.version: Optional[int] = None
+    
+    def __len__(self):
+        return len(self._docs)
+    
+    # ---------- 前缀树 ----------
+    
+    def _trie_add(self, word: str, doc_id: int):
+        node = self._root
+        for ch in word:
+            node = node.children.setdefault(ch, _TrieNode())
+            node.ids[doc_id] = node.ids.get(doc_id, 0) + 1
+    
+    def _trie_remove(self, word: str, doc_id: int):
+        path = []
+        node = self._root
+        for ch in word:
+            child = node.children.get(ch)
+            if child is None:
+                return
+            path.append((node, ch, child))
+            node = child
+        for parent, ch, child in reversed(path):
+            count = child.ids.get(doc_id, 0) - 1
+            if count > 0:
+                child.ids[doc_id] = count
+            else:
+                child.ids.pop(doc_id, None)
+            if not child.ids:
+                del parent.children[ch]
+    
+    def _prefix_ids(self, prefix: str):
+        node = self._root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        return node.ids.keys()
+    
+    # ---------- 文档维护 ----------
+    
+    def _index_key(self, tool: dict) -> tuple:
+        return (
+            tool["name"], tool["slug"], tool["short_description"], tuple(tool["tags"]),
+            tool["icon"], tool["category"]["slug"], tool["category"]["name"],
+            tool["category"]["color"]
+        )
+    
+    def upsert(self, tool: dict):
+        """新增或更新一个工具"""
+        doc_id = tool["id"]
+        if doc_id in self._docs:
+            self.remove(doc_id)
+        
+        words, grams = tokenize(" ".join([
+            tool["name"], tool["slug"].replace("-", " "),
+            tool["short_description"] or "", " ".join(tool["tags"])
+        ]))
+        words |= _pinyin_tokens(tool["name"])
+        
+        for word in words:
+            self._trie_add(word, doc_id)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(doc_id)
+        
+        self._doc_tokens[doc_id] = (words, grams)
+        self._doc_keys[doc_id] = self._index_key(tool)
+        self._docs[doc_id] = {
+            "id": doc_id,
+            "name": tool["name"],
+            "slug": tool["slug"],
+            "icon": tool["icon"],
+            "view_count": tool["view_count"],
+            "category": {
+                "name": tool["category"]["name"],
+                "slug": tool["category"]["slug"],
+                "color": tool["category"]["color"]
+            }
+        }
+        self._ranked = None
+    
+    def remove(self, doc_id: int):
+        """移除一个工具"""
+        tokens = self._doc_tokens.pop(doc_id, None)
+        if tokens is None:
+            return
+        words, grams = tokens
+        for word in words:
+            self._trie_remove(word, doc_id)
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[gram]
+        self._doc_keys.pop(doc_id, None)
+        self._docs.pop(doc_id, None)
+        self._ranked = None
+    
+    def sync(self, snapshot) -> int:
+        """按目录快照增量同步, 返回变更的工具数"""
+        if self.version == snapshot.version:
+            return 0
+        
+        changed = 0
+        for doc_id in list(self._docs):
+            if doc_id not in snapshot.tools_by_id:
+                self.remove(doc_id)
+                changed += 1
+        for tool in snapshot.tools:
+            if self._doc_keys.get(tool["id"]) != self._index_key(tool):
+                self.upsert(tool)
+                changed += 1
+            else:
+                # 浏览量只影响排序, 不需要重建索引
+                self._docs[tool["id"]]["view_count"] = tool["view_count"]
+        
+        self._ranked = None
+        self.version = snapshot.version
+        return changed
+    
+    async def refresh(self, snapshot):
+        """跟随目录快照更新; 首次全量构建放到线程中执行, 避免阻塞事件循环"""
+        if self.version == snapshot.version:
+            return
+        async with self._refresh_lock:
+            if self.version == snapshot.version:
+                return
+            if self._docs:
+                self.sync(snapshot)
+                return
+            fresh = await asyncio.to_thread(_build_index, snapshot)
+            self._root = fresh._root
+            self._postings = fresh._postings
+            self._doc_tokens = fresh._doc_tokens
+            self._doc_keys = fresh._doc_keys
+            self._docs = fresh._docs
+            self._ranked = None
+            self.version = fresh.version
+    
+    # ---------- 查询 ----------
+    
+    def suggest(self, query: str, limit: int = 8) -> List[dict]:
+        """返回匹配的工具 (名称前缀匹配优先, 其次按浏览量)"""
+        query = (query or "").strip().lower()
+        if not query:
+            return []
+        
+        words = _WORD_RE.findall(query)
+        runs = _CJK_RE.findall(query)
+        # 查询以英文 / 数字结尾时, 最后一个单词视为正在输入的前缀
+        prefix = words.pop() if words and query.endswith(words[-1]) else None
+        
+        candidates = None
+        
+        def narrow(ids):
+            nonlocal candidates
+            candidates = ids if candidates is None else candidates & ids
+        
+        for run in runs:
+            for gram in _query_grams(run):
+                narrow(self._postings.get(gram, set()))
+                if not candidates:
+                    return []
+        for word in words:
+            # 已输入完整的单词也按前缀匹配, 容忍词形变化
+            narrow(self._prefix_ids(word))
+            if not candidates:
+                return []
+        if prefix is not None:
+            narrow(self._prefix_ids(prefix))
+        
+        if not candidates:
+            return []
+        
+        if len(candidates) > RERANK_POOL_SIZE:
+            # 宽泛查询: 按浏览量顺序截取候选池, 只对候选池精排
+            if self._ranked is None:
+                self._ranked = sorted(self._docs, key=lambda i: -(self._docs[i]["view_count"] or 0))
+            pool = []
+            for doc_id in self._ranked:
+                if doc_id in candidates:
+                    pool.append(doc_id)
+                    if len(pool) >= RERANK_POOL_SIZE:
+                        break
+            candidates = pool
+        
+        def rank(doc_id: int):
+            doc = self._docs[doc_id]
+            name = doc["name"].lower()
+            if name.startswith(query):
+                position = 0
+            elif query in name:
+                position = 1
+            else:
+                position = 2
+            return position, -(doc["view_count"] or 0), len(name)
+        
+        return [self._docs[i] for i in heapq.nsmallest(limit, candidates, key=rank)]
+
+
+def _build_index(snapshot) -> SuggestIndex:
+    index = SuggestIndex()
+    index.sync(snapshot)
+    return index
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,193 @@
+"""
+NavTools - 工具标签 (规范化存储)
+
+标签存放在 tags 表, 工具与标签的关联 (含顺序) 存放在 tool_tags 表,
+按标签筛选与统计都走 tool_tags 的索引。Tool.tags 仍保留 JSON 副本,
+供全文索引触发器与导出使用, 写工具时两者一起更新。
+
+标签不区分大小写: tags.key 为大小写折叠后的唯一键, tags.name 保留首次录入时的写法
+用于展示; Tool.tags 保留该工具录入时的写法。
+
+旧数据只有 JSON 副本: 启动时 init_tags() 为缺少关联的工具回填,
+已回填的工具不会重复处理。
+"""
+import json
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select, delete, insert, exists, and_
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# 单条语句最多包含的主键 / 标签数
+CHUNK_SIZE = 500
+# 回填时每批处理的工具数
+BACKFILL_BATCH_SIZE = 5000
+# 单个标签的最大长度 (tags.name 为 String(100), 折叠后的 key 可能变长)
+TAG_MAX_LENGTH = 50
+
+
+def tag_key(name: str) -> str:
+    """标签的唯一键 (大小写折叠)"""
+    return name.strip().casefold()
+
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> List[str]:
+    """去除首尾空白与空标签, 按唯一键去重 (保留第一次出现的写法) 并保持顺序"""
+    if not tags:
+        return []
+    unique: Dict[str, str] = {}
+    for tag in tags:
+        tag = tag.strip() if tag else ""
+        if tag:
+            unique.setdefault(tag_key(tag), tag)
+    return list(unique.values())
+
+
+def dump_tags(tags: Optional[Iterable[str]]) -> Optional[str]:
+    """Tool.tags 的 JSON 副本 (无标签时为 None)"""
+    tags = normalize_tags(tags)
+    return json.dumps(tags, ensure_ascii=False) if tags else None
+
+
+def parse_tags(raw: Optional[str]) -> List[str]:
+    """解析 Tool.tags 的 JSON 副本"""
+    if not raw:
+        return []
+    try:
+        tags = json.loads(raw)
+    except ValueError:
+        return []
+    if not isinstance(tags, list):
+        return []
+    return normalize_tags(str(tag) for tag in tags)
+
+
+def _insert_ignore(db):
+    """忽略唯一键冲突的 INSERT (并发请求可能同时创建同一标签)"""
+    from app.models import Tag
+    
+    dialect = getattr(db, "dialect", None) or db.bind.dialect
+    if dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(Tag).on_conflict_do_nothing(index_elements=["key"])
+    if dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(Tag).on_conflict_do_nothing(index_elements=["key"])
+    if dialect.name == "mysql":
+        return insert(Tag).prefix_with("IGNORE")
+    return insert(Tag)
+
+
+async def _select_tag_ids(db, keys: List[str]) -> Dict[str, int]:
+    from app.models import Tag
+    
+    tag_ids: Dict[str, int] = {}
+    for i in range(0, len(keys), CHUNK_SIZE):
+        result = await db.execute(
+            select(Tag.key, Tag.id).where(Tag.key.in_(keys[i:i + CHUNK_SIZE]))
+        )
+        tag_ids.update(result.all())
+    return tag_ids
+
+
+async def get_tag_ids(db, names: List[str]) -> Dict[str, int]:
+    """标签唯一键 -> ID, 不存在的标签按给出的写法创建"""
+    from app.models import Tag
+    
+    names_by_key: Dict[str, str] = {}
+    for name in names:
+        names_by_key.setdefault(tag_key(name), name)
+    keys = list(names_by_key)
+    tag_ids = await _select_tag_ids(db, keys)
+    missing = [key for key in keys if key not in tag_ids]
+    if missing:
+        await db.execute(
+            _insert_ignore(db), [{"key": key, "name": names_by_key[key]} for key in missing]
+        )
+        tag_ids.update(await _select_tag_ids(db, missing))
+    
+    # 排序规则认为相同但写法不同的键 (如 MySQL 中 "café" 与 "cafe"),
+    # 按数据库的比较规则逐个查找已有的标签
+    for key in keys:
+        if key not in tag_ids:
+            result = await db.execute(select(Tag.id).where(Tag.key == key))
+            tag_ids[key] = result.scalar_one()
+    return tag_ids
+
+
+async def delete_tool_tags(db, tool_ids: Iterable[int]):
+    """删除工具的全部标签关联"""
+    from app.models import ToolTag
+    
+    tool_ids = list(tool_ids)
+    for i in range(0, len(tool_ids), CHUNK_SIZE):
+        await db.execute(delete(ToolTag).where(ToolTag.tool_id.in_(tool_ids[i:i + CHUNK_SIZE])))
+
+
+async def set_tool_tags(db, tags_by_tool: Dict[int, Optional[Iterable[str]]]) -> int:
+    """
+    替换工具的标签关联, 返回写入的关联数
+    
+    db 可以是会话或连接, 调用方负责提交事务。
+    """
+    from app.models import ToolTag
+    
+    # 接口已校验长度, 这里截断的只有回填的旧数据
+    tags_by_tool = {
+        tool_id: normalize_tags(tag[:TAG_MAX_LENGTH] for tag in tags or ())
+        for tool_id, tags in tags_by_tool.items()
+    }
+    await delete_tool_tags(db, tags_by_tool)
+    
+    names = list(dict.fromkeys(tag for tags in tags_by_tool.values() for tag in tags))
+    if not names:
+        return 0
+    tag_ids = await get_tag_ids(db, names)
+    rows = []
+    for tool_id, tags in tags_by_tool.items():
+        # 不同写法可能对应同一标签, 每个工具只关联一次
+        linked = set()
+        for tag in tags:
+            tag_id = tag_ids[tag_key(tag)]
+            if tag_id not in linked:
+                linked.add(tag_id)
+                rows.append({"tool_id": tool_id, "tag_id": tag_id, "position": len(linked) - 1})
+    await db.execute(insert(ToolTag), rows)
+    return len(rows)
+
+
+async def backfill_tool_tags(conn, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """为有 JSON 标签但没有关联记录的工具回填 tool_tags, 返回写入的关联数"""
+    from app.models import Tool, ToolTag
+    
+    has_links = exists().where(ToolTag.tool_id == Tool.id)
+    written = 0
+    last_id = 0
+    while True:
+        result = await conn.execute(
+            select(Tool.id, Tool.tags)
+            .where(and_(
+                Tool.id > last_id,
+                Tool.tags.isnot(None),
+                Tool.tags != "",
+                Tool.tags != "[]",
+                ~has_links
+            ))
+            .order_by(Tool.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return written
+        last_id = rows[-1][0]
+        written += await set_tool_tags(conn, {tool_id: parse_tags(raw) for tool_id, raw in rows})
+
+
+async def init_tags(engine: AsyncEngine):
+    """启动时回填标签关联 (幂等)"""
+    async with engine.begin() as conn:
+        written = await backfill_tool_tags(conn)
+    if written:
+        logger.info(f"已从 Tool.tags 回填 {written} 条标签关联")
@@ -0,0 +1,332 @@
+"""
+NavTools - 工具批量导入 / 导出 (CSV / NDJSON)
+
+导入: 流式解析上传文件, 每 IMPORT_CHUNK_SIZE 行为一批校验 (schemas.ToolCreate),
+分类标识一次性解析, 按 slug 批量插入新工具 / 批量更新已有工具, 每批提交一次,
+并返回逐行错误报告。更新已有工具时只写入文件中提供的字段 (缺少的列 / 空单元格
+保留原值); 某一批写入失败时回滚该批并记入报告, 其余批次继续导入。
+
+导出: 服务端游标分批读取, 边查边输出, 不把整张表读入内存。
+"""
+import asyncio
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update
+
+from app import schemas
+from app.core.streaming import CSV_BOM, encode_csv, encode_ndjson
+from app.core.tags import dump_tags, set_tool_tags
+
+logger = logging.getLogger(__name__)
+
+# 每批校验 / 写入的行数
+IMPORT_CHUNK_SIZE = 500
+# 错误报告最多返回的行数
+MAX_ERROR_REPORT = 1000
+# 导出时每次从游标读取的行数
+EXPORT_BATCH_SIZE = 500
+
+# 导入 / 导出的列 (category 为分类标识)
+TOOL_COLUMNS = [
+    "name", "slug", "short_description", "description", "url", "category",
+    "icon", "tags", "is_active", "is_featured", "is_self_developed",
+    "api_endpoint", "sort_order",
+]
+
+FORMATS = ("csv", "ndjson")
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    """按文件名 / Content-Type 判断格式, 默认 CSV"""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    if content_type and ("ndjson" in content_type or "jsonl" in content_type):
+        return "ndjson"
+    return "csv"
+
+
+def _iter_csv(stream) -> Iterator[Any]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for row in csv.DictReader(text):
+        yield row
+
+
+def _iter_ndjson(stream) -> Iterator[Any]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    for line in text:
+        line = line.strip()
+        if not line:
+            yield None
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"JSON 解析失败: {e}")
+
+
+def _parse_tags(value) -> Optional[List[str]]:
+    if value is None or isinstance(value, list):
+        return value
+    value = str(value).strip()
+    if not value:
+        return None
+    if value.startswith("["):
+        return json.loads(value)
+    return [tag.strip() for tag in value.split(",") if tag.strip()]
+
+
+def _normalize_row(raw: dict, category_ids: Dict[str, int]) -> dict:
+    """把一行原始数据转换为 ToolCreate 的输入"""
+    row = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        key = key.strip()
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                # CSV 空单元格视为未填写: 新建时使用默认值, 更新时保留原值
+                continue
+        row[key] = value
+    
+    if "tags" in row:
+        try:
+            row["tags"] = _parse_tags(row["tags"])
+        except ValueError:
+            raise ValueError("tags 格式错误")
+    
+    category = row.pop("category", None) or row.pop("category_slug", None)
+    if category is not None and "category_id" not in row:
+        if category not in category_ids:
+            raise ValueError(f"分类不存在: {category}")
+        row["category_id"] = category_ids[category]
+    return row
+
+
+def _format_errors(e: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}"
+        for err in e.errors()
+    ]
+
+
+class ToolImporter:
+    """工具导入 (按 slug 新增或更新)"""
+    
+    def __init__(self, db, on_conflict: str = "update", dry_run: bool = False):
+        self.db = db
+        self.on_conflict = on_conflict
+        self.dry_run = dry_run
+        self.total = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.failed = 0
+        # 已提交的行数 (不含 dry_run)
+        self.committed = 0
+        self.errors: List[dict] = []
+        self._seen_slugs = set()
+        self._category_ids: Dict[str, int] = {}
+        self._valid_category_ids = set()
+    
+    def _error(self, line: int, slug: Optional[str], messages: List[str]):
+        self.failed += 1
+        if len(self.errors) < MAX_ERROR_REPORT:
+            self.errors.append({"row": line, "slug": slug, "errors": messages})
+    
+    @property
+    def report(self) -> dict:
+        return {
+            "total": self.total,
+            "created": self.created,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "dry_run": self.dry_run,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+    
+    async def run(self, stream, fmt: str) -> dict:
+        """导入整个文件, 返回导入报告"""
+        from app.models import Category
+        
+        result = await self.db.execute(select(Category.id, Category.slug))
+        for category_id, slug in result.all():
+            self._category_ids[slug] = category_id
+            self._valid_category_ids.add(category_id)
+        
+        rows = _iter_ndjson(stream) if fmt == "ndjson" else _iter_csv(stream)
+        # 数据行号: CSV 第 1 行为表头
+        line = 1 if fmt == "csv" else 0
+        while True:
+            # 文件读取与解析放到线程中执行
+            try:
+                chunk = await asyncio.to_thread(list, islice(rows, IMPORT_CHUNK_SIZE))
+            except (UnicodeDecodeError, csv.Error) as e:
+                self._error(line + 1, None, [f"文件解析失败: {e}"])
+                break
+            if not chunk:
+                break
+            
+            valid = []
+            for raw in chunk:
+                line += 1
+                if raw is None:
+                    continue
+                self.total += 1
+                tool = self._validate(line, raw)
+                if tool is not None:
+                    valid.append((line, tool))
+            
+            if valid:
+                await self._write_chunk(valid)
+        
+        return self.report
+    
+    def _validate(self, line: int, raw) -> Optional[schemas.ToolCreate]:
+        if isinstance(raw, Exception):
+            self._error(line, None, [str(raw)])
+            return None
+        if not isinstance(raw, dict):
+            self._error(line, None, ["每行必须是 JSON 对象"])
+            return None
+        
+        slug = raw.get("slug")
+        try:
+            tool = schemas.ToolCreate.model_validate(
+                _normalize_row(raw, self._category_ids)
+            )
+        except ValueError as e:
+            messages = _format_errors(e) if isinstance(e, ValidationError) else [str(e)]
+            self._error(line, slug, messages)
+            return None
+        
+        if tool.category_id not in self._valid_category_ids:
+            self._error(line, tool.slug, [f"分类不存在: {tool.category_id}"])
+            return None
+        if tool.slug in self._seen_slugs:
+            self._error(line, tool.slug, ["文件中工具标识重复"])
+            return None
+        self._seen_slugs.add(tool.slug)
+        return tool
+    
+    async def _write_chunk(self, tools: List[Tuple[int, schemas.ToolCreate]]):
+        """写入一批 (行号, 工具); 失败时回滚该批, 批内各行记为失败"""
+        try:
+            await self._write([tool for _, tool in tools])
+        except Exception as e:
+            await self.db.rollback()
+            logger.warning(f"工具导入写入失败, 回滚 {len(tools)} 行: {e!r}")
+            for line, tool in tools:
+                self._error(line, tool.slug, [f"写入失败: {type(e).__name__}"])
+    
+    async def _write(self, tools: List[schemas.ToolCreate]):
+        from app.models import Tool
+        
+        result = await self.db.execute(
+            select(Tool.slug, Tool.id).where(Tool.slug.in_([t.slug for t in tools]))
+        )
+        existing = dict(result.all())
+        
+        # 新工具写入全部字段 (含默认值); 已有工具只更新文件中提供的字段
+        new_rows = [t.model_dump() for t in tools if t.slug not in existing]
+        old_rows = [t.model_dump(exclude_unset=True) for t in tools if t.slug in existing]
+        
+        skipped = 0
+        if self.on_conflict == "skip":
+            skipped = len(old_rows)
+            old_rows = []
+        
+        # 标签列表单独写入 tool_tags
+        tag_lists = {}
+        for row in new_rows + old_rows:
+            if "tags" in row:
+                tag_lists[row["slug"]] = row["tags"]
+                row["tags"] = dump_tags(row["tags"])
+        
+        if not self.dry_run:
+            if new_rows:
+                # 多行 INSERT
+                await self.db.execute(insert(Tool), new_rows)
+                result = await self.db.execute(
+                    select(Tool.slug, Tool.id).where(Tool.slug.in_([t["slug"] for t in new_rows]))
+                )
+                existing.update(result.all())
+            if old_rows:
+                # 按主键批量 UPDATE
+                now = datetime.utcnow()
+                await self.db.execute(
+                    update(Tool),
+                    [{**t, "id": existing[t["slug"]], "updated_at": now} for t in old_rows]
+                )
+            await set_tool_tags(self.db, {
+                existing[slug]: tags for slug, tags in tag_lists.items()
+            })
+            await self.db.commit()
+            self.committed += len(new_rows) + len(old_rows)
+        
+        self.created += len(new_rows)
+        self.updated += len(old_rows)
+        self.skipped += skipped
+
+
+def _export_record(tool, category_slug: str) -> dict:
+    return {
+        "name": tool.name,
+        "slug": tool.slug,
+        "short_description": tool.short_description,
+        "description": tool.description,
+        "url": tool.url,
+        "category": category_slug,
+        "icon": tool.icon,
+        "tags": json.loads(tool.tags) if tool.tags else [],
+        "is_active": tool.is_active,
+        "is_featured": tool.is_featured,
+        "is_self_developed": tool.is_self_developed,
+        "api_endpoint": tool.api_endpoint,
+        "sort_order": tool.sort_order,
+    }
+
+
+def _csv_chunk(records: List[dict]) -> str:
+    for record in records:
+        record["tags"] = ",".join(record["tags"])
+    return encode_csv(records, TOOL_COLUMNS)
+
+
+async def export_tools(
+    fmt: str,
+    category_id: Optional[int] = None,
+    is_active: Optional[bool] = None
+) -> AsyncIterator[str]:
+    """
+    流式导出工具
+    
+    响应开始输出时依赖注入的会话已关闭, 这里自己创建会话并用服务端游标分批读取。
+    """
+    from app.database import AsyncSessionLocal
+    from app.models import Tool, Category
+    
+    query = select(Tool, Category.slug).join(Category).order_by(Tool.id)
+    if category_id:
+        query = query.where(Tool.category_id == category_id)
+    if is_active is not None:
+        query = query.where(Tool.is_active == is_active)
+    
+    if fmt == "csv":
+        yield CSV_BOM + encode_csv([], TOOL_COLUMNS, header=True)
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            records = [_export_record(tool, slug) for tool, slug in partition]
+            yield _csv_chunk(records) if fmt == "csv" else encode_ndjson(records)
@@ -0,0 +1,114 @@
+"""
+NavTools - 浏览量写缓冲
+
+请求路径只在内存中累加各工具的浏览次数, 由后台任务定时 (或累计达到阈值时)
+用 UPDATE ... CASE 批量写回数据库, 应用关闭时再写回剩余计数。
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from app.core.config import get_settings
+from app.core.bulk import bulk_update_by_id
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounterBuffer:
+    """按工具 ID 聚合浏览次数的写缓冲"""
+    
+    def __init__(self, flush_interval: float, flush_threshold: int):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending: Dict[int, int] = {}
+        self._pending_total = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def pending_total(self) -> int:
+        """尚未写回的浏览次数"""
+        return self._pending_total
+    
+    def add(self, tool_id: int, count: int = 1):
+        """记录浏览 (不访问数据库)"""
+        self._pending[tool_id] = self._pending.get(tool_id, 0) + count
+        self._pending_total += count
+        if self._pending_total >= self.flush_threshold and self._wakeup is not None:
+            self._wakeup.set()
+    
+    async def flush(self) -> int:
+        """将缓冲写回数据库, 返回写回的浏览次数"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+            total, self._pending_total = self._pending_total, 0
+            
+            try:
+                await self._write(pending)
+            except (Exception, asyncio.CancelledError) as exc:
+                # 写回失败 (或被取消) 时把计数放回缓冲, 下次再试
+                for tool_id, count in pending.items():
+                    self._pending[tool_id] = self._pending.get(tool_id, 0) + count
+                self._pending_total += total
+                if isinstance(exc, asyncio.CancelledError):
+                    raise
+                logger.exception("浏览量写回失败")
+                return 0
+            
+            return total
+    
+    async def _write(self, pending: Dict[int, int]):
+        from app.database import AsyncSessionLocal
+        from app.models import Tool
+        
+        async with AsyncSessionLocal() as db:
+            await bulk_update_by_id(
+                db, Tool, Tool.view_count, pending, increment=True,
+                # 浏览量不算内容修改, 保持 updated_at 不变
+                extra_values={"updated_at": Tool.updated_at}
+            )
+            await db.commit()
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+    
+    def start(self):
+        """启动后台写回任务"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """停止后台任务并写回剩余计数"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        flushed = await self.flush()
+        if flushed:
+            logger.info(f"关闭前写回浏览量 {flushed} 次")
+
+
+settings = get_settings()
+
+view_counter = ViewCounterBuffer(
+    flush_interval=settings.VIEW_COUNT_FLUSH_INTERVAL,
+    flush_threshold=settings.VIEW_COUNT_FLUSH_THRESHOLD
+)
@@ -1,14 +1,26 @@
 """
 NavTools - 数据库配置 (支持 SQLite / MySQL / PostgreSQL / Supabase)
 """
+from sqlalchemy import inspect
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import StaticPool, NullPool
+from sqlalchemy.pool import StaticPool, NullPool, AsyncAdaptedQueuePool
 
 from app.core.config import get_settings
 
 settings = get_settings()
 
+
+def is_sqlite_memory(db_url: str) -> bool:
+    """SQLite 内存数据库 (sqlite://, sqlite:///:memory:, file::memory:?uri=true 等)"""
+    url = make_url(db_url)
+    database = url.database or ""
+    if database in ("", ":memory:") or database.startswith("file::memory:"):
+        return True
+    return url.query.get("mode") == "memory"
+
+
 def get_engine():
     """创建数据库引擎"""
     db_url = settings.DATABASE_URL
@@ -32,10 +44,13 @@ def get_engine():
     
     # SQLite 配置
     elif db_url.startswith("sqlite"):
+        db_url = db_url.replace("sqlite:///", "sqlite+aiosqlite:///")
+        # 内存数据库只能共用一个连接; 文件数据库不能共用: 后台任务 (浏览量写回、审计日志写入)
+        # 与请求的会话会落在同一个事务里, 一个会话归还连接时的回滚会撤销其他会话尚未提交的写入
         return create_async_engine(
-            db_url.replace("sqlite:///", "sqlite+aiosqlite:///"),
+            db_url,
             connect_args={"check_same_thread": False},
-            poolclass=StaticPool,
+            poolclass=StaticPool if is_sqlite_memory(db_url) else AsyncAdaptedQueuePool,
             echo=settings.DEBUG
         )
     
@@ -64,6 +79,13 @@ AsyncSessionLocal = async_sessionmaker(
 # 声明基类
 Base = declarative_base()
 
+# 启动时同步索引的表 (审计日志可能已按月分区, 其索引由 audit_retention 管理)
+INDEXED_TABLES = ("tools", "categories", "tool_tags")
+# 已被复合索引取代的旧索引
+LEGACY_INDEXES = {
+    "tools": ("idx_tool_category", "idx_tool_featured", "idx_tool_active"),
+}
+
 
 async def get_db():
     """获取数据库会话 (依赖注入用)"""
@@ -79,5 +101,48 @@ async def get_db():
 
 async def init_db():
     """初始化数据库 (创建表)"""
+    # 确保所有模型已注册到 Base.metadata (脚本中可能尚未导入)
+    import app.models  # noqa: F401
+    
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(sync_indexes)
+    
+    # 标签关联回填 (旧数据只有 Tool.tags JSON)
+    from app.core.tags import init_tags
+    await init_tags(engine)
+    
+    # 全文搜索索引
+    from app.core.search import init_search
+    await init_search(engine)
+    
+    # 审计日志按月分区 (可选)
+    from app.core.audit_retention import init_audit_partitions
+    await init_audit_partitions(engine)
+
+
+def sync_indexes(conn):
+    """
+    为已有的表补建模型中新增的索引, 并删除已被取代的旧索引
+    
+    create_all 只创建缺失的表, 不会为已存在的表添加索引。
+    """
+    inspector = inspect(conn)
+    preparer = conn.dialect.identifier_preparer
+    for table_name in INDEXED_TABLES:
+        if not inspector.has_table(table_name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+        for index in Base.metadata.tables[table_name].indexes:
+            if index.name not in existing:
+                index.create(conn)
+        
+        for name in LEGACY_INDEXES.get(table_name, ()):
+            if name not in existing:
+                continue
+            if conn.dialect.name == "mysql":
+                conn.exec_driver_sql(
+                    f"DROP INDEX {preparer.quote(name)} ON {preparer.quote(table_name)}"
+                )
+            else:
+                conn.exec_driver_sql(f"DROP INDEX {preparer.quote(name)}")
@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.core.security import decode_token
+from app.core.audit import AuditContext
+from app.core.auth_cache import auth_cache
 from app import schemas
 
 # 安全 scheme
@@ -26,6 +28,11 @@ async def get_current_admin(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
+    # 已验证过的令牌直接命中缓存
+    cached = auth_cache.get(credentials.credentials)
+    if cached is not None:
+        return cached
+    
     payload = decode_token(credentials.credentials)
     if not payload:
         raise HTTPException(
@@ -34,8 +41,9 @@ async def get_current_admin(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
-    user_id: int = payload.get("sub")
-    if user_id is None:
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无效的令牌载荷",
@@ -62,7 +70,9 @@ async def get_current_admin(
             detail="用户已被禁用"
         )
     
-    return schemas.AdminUserProfile.model_validate(user)
+    profile = schemas.AdminUserProfile.model_validate(user)
+    auth_cache.set(credentials.credentials, profile, payload.get("exp"))
+    return profile
 
 
 async def get_current_superuser(
@@ -84,3 +94,16 @@ async def get_client_ip(request: Request) -> str:
     if request.client:
         return request.client.host
     return "unknown"
+
+
+async def get_audit_context(
+    request: Request,
+    client_ip: str = Depends(get_client_ip),
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+) -> AuditContext:
+    """当前请求的审计上下文 (认证依赖在同一请求内只执行一次)"""
+    return AuditContext(
+        admin_id=current_admin.id,
+        ip_address=client_ip,
+        user_agent=request.headers.get("user-agent")
+    )
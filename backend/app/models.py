@@ -2,7 +2,7 @@
 NavTools - 数据模型 (SQLAlchemy)
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -23,7 +23,8 @@ class AdminUser(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # 关系
-    audit_logs = relationship("AuditLog", back_populates="admin")
+    # 删除管理员时由数据库把审计日志的 admin_id 置空, 不逐条加载
+    audit_logs = relationship("AuditLog", back_populates="admin", passive_deletes=True)
     
     def __repr__(self):
         return f"<AdminUser {self.username}>"
@@ -47,6 +48,11 @@ class Category(Base):
     # 关系
     tools = relationship("Tool", back_populates="category")
     
+    # 索引: 与列表排序一致
+    __table_args__ = (
+        Index('idx_category_order', sort_order, created_at.desc(), id.desc()),
+    )
+    
     def __repr__(self):
         return f"<Category {self.name}>"
 
@@ -63,7 +69,7 @@ class Tool(Base):
     url = Column(String(500), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     icon = Column(String(100), nullable=True)
-    tags = Column(String(500), nullable=True)  # JSON 字符串存储标签
+    tags = Column(String(500), nullable=True)  # 标签 JSON 副本 (全文索引 / 导出), 以 tool_tags 为准
     view_count = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
     is_featured = Column(Boolean, default=False)
@@ -76,17 +82,53 @@ class Tool(Base):
     # 关系
     category = relationship("Category", back_populates="tools")
     
-    # 索引
+    # 索引: 与列表排序 (sort_order 升序, created_at / id 降序) 一致的复合索引,
+    # 按筛选列打头, 筛选后可直接按索引顺序读取, 不需要额外排序
     __table_args__ = (
-        Index('idx_tool_category', 'category_id'),
-        Index('idx_tool_featured', 'is_featured'),
-        Index('idx_tool_active', 'is_active'),
+        Index('idx_tool_order', sort_order, created_at.desc(), id.desc()),
+        Index('idx_tool_category_order', category_id, sort_order, created_at.desc(), id.desc()),
+        Index('idx_tool_active_order', is_active, sort_order, created_at.desc(), id.desc()),
+        Index(
+            'idx_tool_active_category_order',
+            is_active, category_id, sort_order, created_at.desc(), id.desc()
+        ),
+        Index('idx_tool_featured_order', is_featured, sort_order, created_at.desc(), id.desc()),
     )
     
     def __repr__(self):
         return f"<Tool {self.name}>"
 
 
+class Tag(Base):
+    """标签"""
+    __tablename__ = "tags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)  # 展示用写法 (首次录入时的大小写)
+    key = Column(String(150), unique=True, index=True, nullable=False)  # 大小写折叠后的唯一键
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Tag {self.name}>"
+
+
+class ToolTag(Base):
+    """工具与标签的关联"""
+    __tablename__ = "tool_tags"
+    
+    tool_id = Column(Integer, ForeignKey("tools.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, nullable=False, default=0)  # 标签在工具中的顺序
+    
+    # 索引: 主键覆盖按工具查询, 这里覆盖按标签查询
+    __table_args__ = (
+        Index('idx_tool_tag_tag', 'tag_id', 'tool_id'),
+    )
+    
+    def __repr__(self):
+        return f"<ToolTag {self.tool_id}:{self.tag_id}>"
+
+
 class SiteConfig(Base):
     """网站配置"""
     __tablename__ = "site_config"
@@ -131,7 +173,7 @@ class AuditLog(Base):
     __tablename__ = "audit_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    admin_id = Column(Integer, ForeignKey("admin_users.id"), nullable=True)
+    admin_id = Column(Integer, ForeignKey("admin_users.id", ondelete="SET NULL"), nullable=True)
     action = Column(String(50), nullable=False)  # create, update, delete, login, logout
     target_type = Column(String(50), nullable=False)  # tool, category, admin, config
     target_id = Column(Integer, nullable=True)
@@ -152,3 +194,38 @@ class AuditLog(Base):
     
     def __repr__(self):
         return f"<AuditLog {self.action} {self.target_type}>"
+
+
+class AuditLogDailyRollup(Base):
+    """审计日志按日汇总 (管理员 / 操作 / 目标类型)"""
+    __tablename__ = "audit_log_daily_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    admin_id = Column(Integer, nullable=False, default=0)  # 0 表示无操作人 (如登录失败)
+    action = Column(String(50), nullable=False)
+    target_type = Column(String(50), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    
+    # 索引
+    __table_args__ = (
+        UniqueConstraint('day', 'admin_id', 'action', 'target_type', name='uq_audit_rollup'),
+        Index('idx_audit_rollup_action', 'action'),
+        Index('idx_audit_rollup_target_type', 'target_type'),
+    )
+    
+    def __repr__(self):
+        return f"<AuditLogDailyRollup {self.day} {self.action} {self.count}>"
+
+
+class CacheVersion(Base):
+    """缓存版本 (多进程部署时的失效广播, 每次失效版本号 +1)"""
+    __tablename__ = "cache_versions"
+    
+    topic = Column(String(50), primary_key=True)  # catalog / site_config / admin_user
+    key = Column(String(100), primary_key=True, default="")  # 如管理员 ID, 无则为空
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<CacheVersion {self.topic}:{self.key} {self.version}>"
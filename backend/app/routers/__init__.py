@@ -1,8 +1,10 @@
-from .auth import router as auth
-from .admin import router as admin
-from .tools import router as tools
-from .categories import router as categories
-from .site_config import router as site_config
-from .icons import router as icons
-from .audit_log import router as audit_log
-from .public import router as public
+# 路由模块 (main.py 通过 <模块>.router 注册)
+from . import (
+    auth, admin, tools, categories,
+    site_config, icons, audit_log, public, debug
+)
+
+__all__ = [
+    "auth", "admin", "tools", "categories",
+    "site_config", "icons", "audit_log", "public", "debug",
+]
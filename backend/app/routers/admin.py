@@ -4,23 +4,34 @@ NavTools - 管理员管理路由
 from typing import Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, update
 
 from app.database import get_db
 from app import schemas
-from app.models import AdminUser
+from app.models import AdminUser, AuditLog
 from app.core.security import get_password_hash
-from app.deps import get_current_admin, get_current_superuser
+from app.deps import get_current_admin, get_current_superuser, get_audit_context
+from app.core.audit import AuditContext
+from app.core.auth_cache import auth_cache
 from app.core.exceptions import NotFoundException, BusinessException
+from app.core.pagination import SortKey, MIN_DATETIME, paginate
 
 router = APIRouter(prefix="/admin/users", tags=["管理员管理"])
 
+# 列表排序: created_at 降序, id 作为唯一键
+ADMIN_SORT_KEYS = [
+    SortKey(AdminUser.created_at, descending=True, default=MIN_DATETIME),
+    SortKey(AdminUser.id, descending=True),
+]
+
 
 @router.get("", response_model=schemas.ListResponse)
 async def list_admins(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="游标分页: 首页传空字符串, 之后传 next_cursor"),
+    with_total: bool = Query(False, description="游标分页时是否统计总数"),
     db: AsyncSession = Depends(get_db),
     current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
 ):
@@ -33,25 +44,18 @@ async def list_admins(
             (AdminUser.email.contains(search))
         )
     
-    # 统计总数
-    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
-    total = count_result.scalar()
-    
     # 分页
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    query = query.order_by(AdminUser.created_at.desc())
-    
-    result = await db.execute(query)
-    admins = result.scalars().all()
+    rows, pagination = await paginate(
+        db, query, ADMIN_SORT_KEYS, page, page_size, cursor, with_total,
+        page_order=[AdminUser.created_at.desc()]
+    )
     
     return {
         "code": 200,
         "message": "success",
         "data": {
-            "items": [schemas.AdminUserResponse.model_validate(a) for a in admins],
-            "total": total,
-            "page": page,
-            "page_size": page_size
+            "items": [schemas.AdminUserResponse.model_validate(a) for (a,) in rows],
+            **pagination
         }
     }
 
@@ -60,7 +64,8 @@ async def list_admins(
 async def create_admin(
     admin_data: schemas.AdminUserCreate,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """创建管理员 (仅超级管理员)"""
     # 检查用户名是否已存在
@@ -81,13 +86,14 @@ async def create_admin(
     admin = AdminUser(
         username=admin_data.username,
         email=admin_data.email,
-        hashed_password=get_password_hash(admin_data.password),
+        hashed_password=await get_password_hash(admin_data.password),
         is_superuser=admin_data.is_superuser,
         is_active=admin_data.is_active
     )
     db.add(admin)
     await db.commit()
     await db.refresh(admin)
+    audit.log("create", "admin", admin.id, {"username": admin.username})
     
     return admin
 
@@ -113,7 +119,8 @@ async def update_admin(
     admin_id: int,
     admin_data: schemas.AdminUserUpdate,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """更新管理员信息 (仅超级管理员)"""
     result = await db.execute(select(AdminUser).where(AdminUser.id == admin_id))
@@ -154,7 +161,9 @@ async def update_admin(
         admin.is_active = admin_data.is_active
     
     await db.commit()
+    auth_cache.invalidate_user(admin_id)
     await db.refresh(admin)
+    audit.log("update", "admin", admin.id, {"fields": sorted(admin_data.model_dump(exclude_unset=True))})
     
     return admin
 
@@ -163,7 +172,8 @@ async def update_admin(
 async def delete_admin(
     admin_id: int,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """删除管理员 (仅超级管理员)"""
     if admin_id == current_admin.id:
@@ -175,8 +185,13 @@ async def delete_admin(
     if not admin:
         raise NotFoundException("管理员不存在")
     
+    details = {"username": admin.username}
+    # 旧数据库的外键没有 ON DELETE SET NULL, 显式解除审计日志的引用
+    await db.execute(update(AuditLog).where(AuditLog.admin_id == admin_id).values(admin_id=None))
     await db.delete(admin)
     await db.commit()
+    auth_cache.invalidate_user(admin_id)
+    audit.log("delete", "admin", admin_id, details)
     
     return {"code": 200, "message": "删除成功"}
 
@@ -186,7 +201,8 @@ async def reset_admin_password(
     admin_id: int,
     password_data: schemas.AdminUserResetPassword,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """重置管理员密码 (仅超级管理员)"""
     result = await db.execute(select(AdminUser).where(AdminUser.id == admin_id))
@@ -195,7 +211,9 @@ async def reset_admin_password(
     if not admin:
         raise NotFoundException("管理员不存在")
     
-    admin.hashed_password = get_password_hash(password_data.new_password)
+    admin.hashed_password = await get_password_hash(password_data.new_password)
     await db.commit()
+    auth_cache.invalidate_user(admin_id)
+    audit.log("reset_password", "admin", admin_id)
     
     return {"code": 200, "message": "密码重置成功"}
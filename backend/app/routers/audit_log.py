@@ -2,36 +2,46 @@
 NavTools - 审计日志路由
 """
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, desc
 
 from app.database import get_db
 from app import schemas
-from app.models import AuditLog, AdminUser
+from app.models import AuditLog, AuditLogDailyRollup, AdminUser
 from app.deps import get_current_admin, get_current_superuser
+from app.core.pagination import SortKey, MIN_DATETIME, paginate
+from app.core.audit import audit_writer
+from app.core.streaming import CSV_BOM, encode_csv, encode_ndjson, gzip_stream
 
 router = APIRouter(prefix="/admin/audit-logs", tags=["审计日志"])
 
+# 列表排序: created_at 降序, id 作为唯一键
+AUDIT_SORT_KEYS = [
+    SortKey(AuditLog.created_at, descending=True, default=MIN_DATETIME),
+    SortKey(AuditLog.id, descending=True),
+]
 
-@router.get("", response_model=schemas.ListResponse)
-async def list_audit_logs(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
-    admin_id: Optional[int] = None,
-    action: Optional[str] = None,
-    target_type: Optional[str] = None,
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+# 导出时每次从游标读取的行数
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    "id", "created_at", "admin_id", "admin_username", "action",
+    "target_type", "target_id", "details", "ip_address", "user_agent",
+]
+
+
+def _apply_filters(
+    query,
+    admin_id: Optional[int],
+    action: Optional[str],
+    target_type: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
 ):
-    """获取审计日志列表 (仅超级管理员)"""
-    query = select(AuditLog, AdminUser.username).join(
-        AdminUser, AuditLog.admin_id == AdminUser.id, isouter=True
-    )
-    
+    """列表与导出共用的筛选条件"""
     if admin_id:
         query = query.where(AuditLog.admin_id == admin_id)
     
@@ -47,16 +57,34 @@ async def list_audit_logs(
     if end_date:
         query = query.where(AuditLog.created_at <= end_date)
     
-    # 统计总数
-    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
-    total = count_result.scalar()
+    return query
+
+
+@router.get("", response_model=schemas.ListResponse)
+async def list_audit_logs(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    admin_id: Optional[int] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cursor: Optional[str] = Query(None, description="游标分页: 首页传空字符串, 之后传 next_cursor"),
+    with_total: bool = Query(False, description="游标分页时是否统计总数"),
+    db: AsyncSession = Depends(get_db),
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+):
+    """获取审计日志列表 (仅超级管理员)"""
+    query = select(AuditLog, AdminUser.username).join(
+        AdminUser, AuditLog.admin_id == AdminUser.id, isouter=True
+    )
+    query = _apply_filters(query, admin_id, action, target_type, start_date, end_date)
     
     # 分页和排序
-    query = query.order_by(desc(AuditLog.created_at))
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    
-    result = await db.execute(query)
-    rows = result.all()
+    rows, pagination = await paginate(
+        db, query, AUDIT_SORT_KEYS, page, page_size, cursor, with_total,
+        page_order=[desc(AuditLog.created_at)]
+    )
     
     items = []
     for log, username in rows:
@@ -67,22 +95,109 @@ async def list_audit_logs(
     return {
         "code": 200,
         "message": "success",
-        "data": {
-            "items": items,
-            "total": total,
-            "page": page,
-            "page_size": page_size
-        }
+        "data": {"items": items, **pagination}
     }
 
 
+async def _export_chunks(query, fmt: str):
+    """
+    按服务端游标分批读取并编码
+    
+    响应开始输出时依赖注入的会话已关闭, 这里自己创建会话。
+    """
+    from app.database import AsyncSessionLocal
+    
+    if fmt == "csv":
+        yield CSV_BOM + encode_csv([], EXPORT_COLUMNS, header=True)
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            records = [dict(row._mapping) for row in partition]
+            if fmt == "csv":
+                yield encode_csv(records, EXPORT_COLUMNS)
+            else:
+                yield encode_ndjson(records)
+
+
+@router.get("/export")
+async def export_audit_logs(
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+    gzip: bool = Query(True, description="是否 gzip 压缩"),
+    admin_id: Optional[int] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+):
+    """导出审计日志 (流式输出, 仅超级管理员)"""
+    # 只查询需要的列, 不构造 ORM 对象
+    query = select(
+        AuditLog.id, AuditLog.created_at, AuditLog.admin_id,
+        AdminUser.username.label("admin_username"), AuditLog.action,
+        AuditLog.target_type, AuditLog.target_id, AuditLog.details,
+        AuditLog.ip_address, AuditLog.user_agent
+    ).join(AdminUser, AuditLog.admin_id == AdminUser.id, isouter=True)
+    query = _apply_filters(query, admin_id, action, target_type, start_date, end_date)
+    query = query.order_by(AuditLog.created_at, AuditLog.id)
+    
+    chunks = _export_chunks(query, format)
+    filename = f"audit-logs-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    if gzip:
+        chunks = gzip_stream(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/daily-stats")
+async def get_daily_stats(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    admin_id: Optional[int] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+):
+    """按日统计 (来自汇总表, 不扫描原始日志; 当天数据在下次汇总后更新)"""
+    query = select(AuditLogDailyRollup)
+    
+    if start_date:
+        query = query.where(AuditLogDailyRollup.day >= start_date)
+    
+    if end_date:
+        query = query.where(AuditLogDailyRollup.day <= end_date)
+    
+    if admin_id is not None:
+        query = query.where(AuditLogDailyRollup.admin_id == admin_id)
+    
+    if action:
+        query = query.where(AuditLogDailyRollup.action == action)
+    
+    if target_type:
+        query = query.where(AuditLogDailyRollup.target_type == target_type)
+    
+    result = await db.execute(query.order_by(AuditLogDailyRollup.day, AuditLogDailyRollup.id))
+    items = [schemas.AuditLogDailyStat.model_validate(r) for r in result.scalars().all()]
+    
+    return {"code": 200, "message": "success", "data": items}
+
+
 @router.get("/actions")
 async def get_action_types(
     db: AsyncSession = Depends(get_db),
     current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
 ):
-    """获取操作类型列表"""
-    result = await db.execute(select(AuditLog.action).distinct())
+    """获取操作类型列表 (来自按日汇总表)"""
+    result = await db.execute(select(AuditLogDailyRollup.action).distinct())
     actions = [a for a in result.scalars().all() if a]
     return {"code": 200, "message": "success", "data": actions}
 
@@ -92,7 +207,15 @@ async def get_target_types(
     db: AsyncSession = Depends(get_db),
     current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
 ):
-    """获取目标类型列表"""
-    result = await db.execute(select(AuditLog.target_type).distinct())
+    """获取目标类型列表 (来自按日汇总表)"""
+    result = await db.execute(select(AuditLogDailyRollup.target_type).distinct())
     types = [t for t in result.scalars().all() if t]
     return {"code": 200, "message": "success", "data": types}
+
+
+@router.get("/writer-stats")
+async def get_writer_stats(
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+):
+    """获取审计日志写入队列指标"""
+    return {"code": 200, "message": "success", "data": audit_writer.stats()}
@@ -8,11 +8,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.database import get_db
-from app.core.security import verify_password, create_access_token, create_refresh_token, decode_token
+from app.core.security import (
+    verify_password, verify_and_update_password, get_password_hash,
+    create_access_token, create_refresh_token, decode_token
+)
 from app.core.config import get_settings
 from app import schemas
 from app.models import AdminUser
-from app.deps import get_current_admin, get_client_ip
+from app.deps import get_current_admin, get_client_ip, get_audit_context
+from app.core.audit import AuditContext
+from app.core.auth_cache import auth_cache
 from app.core.exceptions import UnauthorizedException
 
 router = APIRouter(prefix="/auth", tags=["认证"])
@@ -22,16 +27,34 @@ router = APIRouter(prefix="/auth", tags=["认证"])
 async def login(
     request: Request,
     login_data: schemas.LoginRequest,
+    client_ip: str = Depends(get_client_ip),
     db: AsyncSession = Depends(get_db)
 ):
     """管理员登录"""
+    audit = AuditContext(
+        admin_id=None,
+        ip_address=client_ip,
+        user_agent=request.headers.get("user-agent")
+    )
+    
     # 查询用户
     result = await db.execute(
         select(AdminUser).where(AdminUser.username == login_data.username)
     )
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await verify_and_update_password(
+            login_data.password, user.hashed_password
+        )
+    
+    if not verified:
+        audit.log(
+            "login_failed", "admin", user.id if user else None,
+            {"username": login_data.username},
+            admin_id=user.id if user else None
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
@@ -39,22 +62,28 @@ async def login(
         )
     
     if not user.is_active:
+        audit.log("login_failed", "admin", user.id, {"reason": "disabled"}, admin_id=user.id)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="账号已被禁用"
         )
     
+    # bcrypt 轮数变更后顺带升级密码哈希
+    if new_hash:
+        user.hashed_password = new_hash
+    
     # 更新最后登录时间
     user.last_login = datetime.utcnow()
     await db.commit()
+    audit.log("login", "admin", user.id, admin_id=user.id)
     
     # 创建令牌
     access_token_expires = timedelta(minutes=get_settings().ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.id},
+        data={"sub": str(user.id)},
         expires_delta=access_token_expires
     )
-    refresh_token = create_refresh_token(data={"sub": user.id})
+    refresh_token = create_refresh_token(data={"sub": str(user.id)})
     
     return schemas.Token(
         access_token=access_token,
@@ -109,6 +138,7 @@ async def logout():
 async def change_password(
     password_data: schemas.AdminUserPasswordUpdate,
     current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context),
     db: AsyncSession = Depends(get_db)
 ):
     """修改密码"""
@@ -117,14 +147,15 @@ async def change_password(
     )
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(password_data.old_password, user.hashed_password):
+    if not user or not await verify_password(password_data.old_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="原密码错误"
         )
     
-    from app.core.security import get_password_hash
-    user.hashed_password = get_password_hash(password_data.new_password)
+    user.hashed_password = await get_password_hash(password_data.new_password)
     await db.commit()
+    auth_cache.invalidate_user(user.id)
+    audit.log("change_password", "admin", user.id)
     
     return {"code": 200, "message": "密码修改成功"}
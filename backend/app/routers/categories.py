@@ -1,6 +1,7 @@
 """
 NavTools - 分类管理路由
 """
+from datetime import datetime
 from typing import Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,12 +9,67 @@ from sqlalchemy import select, func
 
 from app.database import get_db
 from app import schemas
-from app.models import Category
-from app.deps import get_current_admin
+from app.models import Category, Tool
+from app.deps import get_current_admin, get_audit_context
+from app.core.audit import AuditContext
 from app.core.exceptions import NotFoundException, BusinessException
+from app.core.catalog import invalidate_catalog
+from app.core.pagination import SortKey, MIN_DATETIME, paginate, offset_query, keyset_query
+from app.core.query_plans import register_query_shape
+from app.core.serialization import json_response, envelope, list_data, admin_category_fragments, row_revision
 
 router = APIRouter(prefix="/admin/categories", tags=["分类管理"])
 
+# 列表排序: sort_order 升序, created_at 降序, id 作为唯一键
+CATEGORY_SORT_KEYS = [
+    SortKey(Category.sort_order, default=0),
+    SortKey(Category.created_at, descending=True, default=MIN_DATETIME),
+    SortKey(Category.id, descending=True),
+]
+# 页码分页沿用原有排序
+CATEGORY_PAGE_ORDER = [Category.sort_order.asc(), Category.created_at.desc()]
+
+
+def _category_list_query(search: Optional[str] = None, is_active: Optional[bool] = None):
+    """分类列表查询 (未排序), 附带每个分类的工具数量"""
+    query = select(Category)
+    
+    if search:
+        query = query.where(Category.name.contains(search))
+    
+    if is_active is not None:
+        query = query.where(Category.is_active == is_active)
+    
+    # 每个分类的工具数量: 一次分组聚合, 外连接到分类列表
+    tool_counts = (
+        select(Tool.category_id, func.count().label("tool_count"))
+        .group_by(Tool.category_id)
+        .subquery()
+    )
+    return query.add_columns(func.coalesce(tool_counts.c.tool_count, 0)).outerjoin(
+        tool_counts, tool_counts.c.category_id == Category.id
+    )
+
+
+# 执行计划检查 (python -m scripts.explain_queries)
+register_query_shape(
+    "admin.categories.page",
+    lambda: offset_query(_category_list_query(), CATEGORY_SORT_KEYS, 2, 20, CATEGORY_PAGE_ORDER)
+)
+register_query_shape(
+    "admin.categories.cursor",
+    lambda: keyset_query(
+        _category_list_query(), CATEGORY_SORT_KEYS, 20, [0, datetime(2024, 1, 1), 100]
+    )
+)
+
+
+def _category_item(cat: Category, tool_count: int) -> dict:
+    """分类列表项"""
+    cat_data = schemas.CategoryResponse.model_validate(cat)
+    cat_data.tool_count = tool_count
+    return cat_data.model_dump(mode="json")
+
 
 @router.get("", response_model=schemas.ListResponse)
 async def list_categories(
@@ -21,58 +77,36 @@ async def list_categories(
     page_size: int = Query(20, ge=1, le=100),
     search: Optional[str] = None,
     is_active: Optional[bool] = None,
+    cursor: Optional[str] = Query(None, description="游标分页: 首页传空字符串, 之后传 next_cursor"),
+    with_total: bool = Query(False, description="游标分页时是否统计总数"),
     db: AsyncSession = Depends(get_db),
     current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
 ):
     """获取分类列表"""
-    query = select(Category)
-    
-    if search:
-        query = query.where(Category.name.contains(search))
-    
-    if is_active is not None:
-        query = query.where(Category.is_active == is_active)
-    
-    # 统计总数
-    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
-    total = count_result.scalar()
-    
+    query = _category_list_query(search, is_active)
     # 分页和排序
-    query = query.order_by(Category.sort_order.asc(), Category.created_at.desc())
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    
-    result = await db.execute(query)
-    categories = result.scalars().all()
-    
-    # 计算每个分类的工具数量
-    from app.models import Tool
-    items = []
-    for cat in categories:
-        count_result = await db.execute(
-            select(func.count()).where(Tool.category_id == cat.id)
+    rows, pagination = await paginate(
+        db, query, CATEGORY_SORT_KEYS, page, page_size, cursor, with_total,
+        page_order=CATEGORY_PAGE_ORDER
+    )
+    
+    # 未修改的分类直接复用已序列化的片段
+    fragments = [
+        admin_category_fragments.get(
+            cat.id, (row_revision(cat), tool_count),
+            lambda cat=cat, tool_count=tool_count: _category_item(cat, tool_count)
         )
-        tool_count = count_result.scalar()
-        cat_data = schemas.CategoryResponse.model_validate(cat)
-        cat_data.tool_count = tool_count
-        items.append(cat_data)
-    
-    return {
-        "code": 200,
-        "message": "success",
-        "data": {
-            "items": items,
-            "total": total,
-            "page": page,
-            "page_size": page_size
-        }
-    }
+        for cat, tool_count in rows
+    ]
+    return json_response(envelope(list_data(fragments, **pagination)))
 
 
 @router.post("", response_model=schemas.CategoryResponse)
 async def create_category(
     category_data: schemas.CategoryCreate,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """创建分类"""
     # 检查 slug 是否已存在
@@ -85,7 +119,9 @@ async def create_category(
     category = Category(**category_data.model_dump())
     db.add(category)
     await db.commit()
+    invalidate_catalog()
     await db.refresh(category)
+    audit.log("create", "category", category.id, {"name": category.name, "slug": category.slug})
     
     return category
 
@@ -111,7 +147,8 @@ async def update_category(
     category_id: int,
     category_data: schemas.CategoryUpdate,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """更新分类"""
     result = await db.execute(select(Category).where(Category.id == category_id))
@@ -132,11 +169,14 @@ async def update_category(
             raise BusinessException("分类标识已存在")
     
     # 更新字段
-    for field, value in category_data.model_dump(exclude_unset=True).items():
+    update_dict = category_data.model_dump(exclude_unset=True)
+    for field, value in update_dict.items():
         setattr(category, field, value)
     
     await db.commit()
+    invalidate_catalog()
     await db.refresh(category)
+    audit.log("update", "category", category.id, {"fields": sorted(update_dict)})
     
     return category
 
@@ -145,7 +185,8 @@ async def update_category(
 async def delete_category(
     category_id: int,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """删除分类"""
     result = await db.execute(select(Category).where(Category.id == category_id))
@@ -155,7 +196,6 @@ async def delete_category(
         raise NotFoundException("分类不存在")
     
     # 检查是否有工具使用此分类
-    from app.models import Tool
     result = await db.execute(
         select(func.count()).where(Tool.category_id == category_id)
     )
@@ -164,7 +204,10 @@ async def delete_category(
     if tool_count > 0:
         raise BusinessException(f"该分类下还有 {tool_count} 个工具，无法删除")
     
+    details = {"name": category.name, "slug": category.slug}
     await db.delete(category)
     await db.commit()
+    invalidate_catalog()
+    audit.log("delete", "category", category_id, details)
     
     return {"code": 200, "message": "删除成功"}
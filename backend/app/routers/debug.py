@@ -0,0 +1,80 @@
+"""
+NavTools - 调试路由 (请求采样分析结果)
+"""
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from app import schemas
+from app.core.config import get_settings
+from app.core.exceptions import NotFoundException
+from app.core.profiler import profile_store, create_profile_token
+from app.deps import get_current_superuser
+
+router = APIRouter(prefix="/admin/debug/profiles", tags=["调试"])
+
+
+@router.get("")
+async def list_profiles(
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+):
+    """最近的分析结果列表 (仅超级管理员)"""
+    settings = get_settings()
+    return {
+        "code": 200,
+        "message": "success",
+        "data": {
+            "enabled": settings.PROFILER_ENABLED,
+            "sample_rate": settings.PROFILER_SAMPLE_RATE,
+            "items": [profile.summary() for profile in profile_store.list()]
+        }
+    }
+
+
+@router.post("/token")
+async def issue_profile_token(
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+):
+    """签发按需分析令牌, 请求时放在 X-Profile-Token 头中 (仅超级管理员)"""
+    settings = get_settings()
+    return {
+        "code": 200,
+        "message": "success",
+        "data": create_profile_token(settings.SECRET_KEY, current_admin.id, settings.PROFILER_TOKEN_TTL)
+    }
+
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: int,
+    format: str = Query("json", pattern="^(json|folded)$", description="folded: 折叠栈文本, 可用于火焰图"),
+    limit: int = Query(30, ge=1, le=500, description="json 格式返回的函数数"),
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+):
+    """查看或下载分析结果 (仅超级管理员)"""
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise NotFoundException("分析结果不存在")
+    
+    if format == "folded":
+        return PlainTextResponse(
+            profile.folded(),
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'}
+        )
+    
+    return {
+        "code": 200,
+        "message": "success",
+        "data": {
+            **profile.summary(),
+            "functions": profile.top_functions(limit)
+        }
+    }
+
+
+@router.delete("")
+async def clear_profiles(
+    current_admin: schemas.AdminUserProfile = Depends(get_current_superuser)
+):
+    """清空分析结果 (仅超级管理员)"""
+    profile_store.clear()
+    return {"code": 200, "message": "已清空"}
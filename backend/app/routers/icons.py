@@ -4,16 +4,24 @@ NavTools - 图标管理路由
 from typing import Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 
 from app.database import get_db
 from app import schemas
 from app.models import IconResource
 from app.deps import get_current_admin
 from app.core.exceptions import NotFoundException, BusinessException
+from app.core.pagination import SortKey, paginate
 
 router = APIRouter(prefix="/admin/icons", tags=["图标管理"])
 
+# 列表排序: 分类, 名称, id 作为唯一键
+ICON_SORT_KEYS = [
+    SortKey(IconResource.category, default=""),
+    SortKey(IconResource.name),
+    SortKey(IconResource.id),
+]
+
 # 内置图标数据
 BUILTIN_ICONS = [
     {"name": "首页", "slug": "home", "icon_type": "lucide", "content": "Home", "category": "基础"},
@@ -86,6 +94,8 @@ async def list_icons(
     page_size: int = Query(50, ge=1, le=100),
     category: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="游标分页: 首页传空字符串, 之后传 next_cursor"),
+    with_total: bool = Query(False, description="游标分页时是否统计总数"),
     db: AsyncSession = Depends(get_db),
     current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
 ):
@@ -98,25 +108,18 @@ async def list_icons(
     if search:
         query = query.where(IconResource.name.contains(search))
     
-    # 统计总数
-    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
-    total = count_result.scalar()
-    
     # 分页
-    query = query.order_by(IconResource.category, IconResource.name)
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    
-    result = await db.execute(query)
-    icons = result.scalars().all()
+    rows, pagination = await paginate(
+        db, query, ICON_SORT_KEYS, page, page_size, cursor, with_total,
+        page_order=[IconResource.category, IconResource.name]
+    )
     
     return {
         "code": 200,
         "message": "success",
         "data": {
-            "items": [schemas.IconResourceResponse.model_validate(i) for i in icons],
-            "total": total,
-            "page": page,
-            "page_size": page_size
+            "items": [schemas.IconResourceResponse.model_validate(i) for (i,) in rows],
+            **pagination
         }
     }
 
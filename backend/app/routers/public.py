@@ -1,305 +1,294 @@
 """
 NavTools - 公开接口路由 (无需认证)
 """
-import json
+import bisect
 from typing import Optional
-from fastapi import APIRouter, Query
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
-from fastapi import Depends
+from fastapi import APIRouter, Query, Request, Response
 
-from app.database import get_db
-from app import schemas
-from app.models import Tool, Category, SiteConfig
+from app.core.catalog import get_catalog, DEFAULT_SITE_CONFIG
+from app.core.view_counter import view_counter
+from app.core.search import search_tool_ids
+from app.core.suggest import suggest_index
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.exceptions import BusinessException
+from app.core.http_cache import get_cache_policy, check_not_modified
+from app.core.home_payload import home_payload
+from app.core.tags import tag_key
+from app.core.serialization import (
+    json_response, envelope, join_array, list_data,
+    public_tool_fragments, public_tool_detail_fragments, public_category_fragments
+)
 
 router = APIRouter(prefix="/api", tags=["公开接口"])
 
 
+def _tool_list_item(tool: dict) -> dict:
+    """工具列表项"""
+    return {
+        "id": tool["id"],
+        "name": tool["name"],
+        "slug": tool["slug"],
+        "short_description": tool["short_description"],
+        "icon": tool["icon"],
+        "url": tool["url"],
+        "is_featured": tool["is_featured"],
+        "is_self_developed": tool["is_self_developed"],
+        "api_endpoint": tool["api_endpoint"],
+        "view_count": tool["view_count"],
+        "tags": tool["tags"],
+        "category": tool["category"]
+    }
+
+
+def _tool_detail(tool: dict) -> dict:
+    """工具详情"""
+    return {
+        "id": tool["id"],
+        "name": tool["name"],
+        "slug": tool["slug"],
+        "short_description": tool["short_description"],
+        "description": tool["description"],
+        "icon": tool["icon"],
+        "url": tool["url"],
+        "is_featured": tool["is_featured"],
+        "is_self_developed": tool["is_self_developed"],
+        "api_endpoint": tool["api_endpoint"],
+        "view_count": tool["view_count"],
+        "tags": tool["tags"],
+        "category": tool["category"]
+    }
+
+
+def _category_item(cat: dict) -> dict:
+    """分类列表项"""
+    return {
+        "id": cat["id"],
+        "name": cat["name"],
+        "slug": cat["slug"],
+        "description": cat["description"],
+        "icon": cat["icon"],
+        "color": cat["color"],
+        "tool_count": cat["tool_count"]
+    }
+
+
+def _tool_fragments(tools):
+    """工具列表项的已序列化片段"""
+    return [
+        public_tool_fragments.get(t["id"], t["revision"], lambda t=t: _tool_list_item(t))
+        for t in tools
+    ]
+
+
 @router.get("/site-config")
-async def get_public_site_config(db: AsyncSession = Depends(get_db)):
+async def get_public_site_config(request: Request, response: Response):
     """获取网站配置 (公开)"""
-    result = await db.execute(select(SiteConfig).limit(1))
-    config = result.scalar_one_or_none()
+    catalog = await get_catalog()
+    not_modified = check_not_modified(
+        request, response, catalog.content_hash, get_cache_policy("site_config")
+    )
+    if not_modified:
+        return not_modified
     
-    if not config:
-        return {
-            "code": 200,
-            "data": {
-                "site_name": "NavTools",
-                "site_description": "实用工具集合",
-                "site_keywords": "工具,实用工具,在线工具",
-                "theme_enabled": True
-            }
-        }
+    if not catalog.site_config:
+        return {"code": 200, "data": dict(DEFAULT_SITE_CONFIG)}
     
-    return {
-        "code": 200,
-        "data": {
-            "site_name": config.site_name,
-            "site_description": config.site_description,
-            "site_keywords": config.site_keywords,
-            "icp_beian": config.icp_beian,
-            "gongan_beian": config.gongan_beian,
-            "contact_email": config.contact_email,
-            "theme_enabled": config.theme_enabled,
-            "logo_url": config.logo_url,
-            "favicon_url": config.favicon_url,
-            "footer_text": config.footer_text
-        }
-    }
+    return {"code": 200, "data": catalog.site_config}
 
 
 @router.get("/categories")
-async def get_public_categories(db: AsyncSession = Depends(get_db)):
+async def get_public_categories(request: Request, response: Response):
     """获取分类列表 (公开)"""
-    result = await db.execute(
-        select(Category).where(Category.is_active == True)
-        .order_by(Category.sort_order.asc())
+    catalog = await get_catalog()
+    not_modified = check_not_modified(
+        request, response, catalog.content_hash, get_cache_policy("categories")
     )
-    categories = result.scalars().all()
+    if not_modified:
+        return not_modified
     
-    # 计算每个分类的工具数量
-    items = []
-    for cat in categories:
-        count_result = await db.execute(
-            select(func.count()).where(
-                (Tool.category_id == cat.id) & (Tool.is_active == True)
-            )
+    fragments = [
+        public_category_fragments.get(
+            cat["id"], (cat["revision"], cat["tool_count"]), lambda cat=cat: _category_item(cat)
         )
-        tool_count = count_result.scalar()
-        
-        items.append({
-            "id": cat.id,
-            "name": cat.name,
-            "slug": cat.slug,
-            "description": cat.description,
-            "icon": cat.icon,
-            "color": cat.color,
-            "tool_count": tool_count
-        })
-    
-    return {"code": 200, "message": "success", "data": items}
+        for cat in catalog.categories
+    ]
+    return json_response(envelope(join_array(fragments)), response)
 
 
 @router.get("/tools")
 async def get_public_tools(
+    request: Request,
+    response: Response,
     category: Optional[str] = None,
     search: Optional[str] = None,
+    tag: Optional[str] = Query(None, description="按标签精确筛选 (不区分大小写)"),
     featured: Optional[bool] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="游标分页: 首页传空字符串, 之后传 next_cursor"),
+    with_total: bool = Query(False, description="游标分页时是否返回总数")
 ):
     """获取工具列表 (公开)"""
-    query = select(Tool, Category).join(Category).where(Tool.is_active == True)
+    catalog = await get_catalog()
+    not_modified = check_not_modified(
+        request, response, catalog.content_hash, get_cache_policy("tools")
+    )
+    if not_modified:
+        return not_modified
+    tools = catalog.tools
+    # 搜索结果最多 SEARCH_MAX_RESULTS 条, 超出时 truncated=true (total 为截断后的数量)
+    extra = {}
+    
+    if search:
+        # 全文索引检索, 结果按相关度排序
+        ranked_ids, extra["truncated"] = await search_tool_ids(search)
+        tools = [catalog.tools_by_id[i] for i in ranked_ids if i in catalog.tools_by_id]
+    
+    if tag:
+        # 标签索引中的工具保持列表顺序, 可直接用于排序键游标
+        tagged = catalog.tools_by_tag.get(tag_key(tag), [])
+        if search:
+            tagged_ids = {t["id"] for t in tagged}
+            tools = [t for t in tools if t["id"] in tagged_ids]
+        else:
+            tools = tagged
     
     if category:
-        query = query.where(Category.slug == category)
+        tools = [t for t in tools if t["category"]["slug"] == category]
     
     if featured is not None:
-        query = query.where(Tool.is_featured == featured)
-    
-    if search:
-        query = query.where(
-            (Tool.name.contains(search)) | 
-            (Tool.short_description.contains(search)) |
-            (Tool.tags.contains(search))
-        )
+        tools = [t for t in tools if t["is_featured"] == featured]
     
-    # 统计总数
-    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
-    total = count_result.scalar()
+    if cursor is not None:
+        # 游标分页: 搜索结果按相关度位置续页, 其他按排序键续页
+        start = 0
+        if cursor:
+            values = decode_cursor(cursor, 1 if search else 3)
+            try:
+                if search:
+                    start = max(int(values[0]), 0)
+                else:
+                    start = bisect.bisect_right(tools, tuple(values), key=lambda t: t["sort_key"])
+            except (TypeError, ValueError):
+                raise BusinessException("无效的分页游标")
+        page_tools = tools[start:start + page_size]
+        
+        next_cursor = None
+        if start + page_size < len(tools):
+            next_cursor = encode_cursor(
+                [start + page_size] if search else list(page_tools[-1]["sort_key"])
+            )
+        
+        meta = {"page_size": page_size, "next_cursor": next_cursor, **extra}
+        if with_total:
+            meta["total"] = len(tools)
+        return json_response(envelope(list_data(_tool_fragments(page_tools), **meta)), response)
     
-    # 分页和排序
-    query = query.order_by(Tool.sort_order.asc(), desc(Tool.created_at))
-    query = query.offset((page - 1) * page_size).limit(page_size)
+    # 列表响应由已序列化的工具片段拼接
+    total = len(tools)
+    offset = (page - 1) * page_size
+    data = list_data(
+        _tool_fragments(tools[offset:offset + page_size]),
+        total=total, page=page, page_size=page_size, **extra
+    )
+    return json_response(envelope(data), response)
+
+
+@router.get("/tags")
+async def get_public_tags(
+    request: Request,
+    response: Response,
+    category: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """获取标签及其工具数 (公开, 只统计启用的工具)"""
+    catalog = await get_catalog()
+    not_modified = check_not_modified(
+        request, response, catalog.content_hash, get_cache_policy("tags")
+    )
+    if not_modified:
+        return not_modified
     
-    result = await db.execute(query)
-    rows = result.all()
+    if not category:
+        return {"code": 200, "message": "success", "data": catalog.tag_counts[:limit]}
     
-    items = []
-    for tool, category in rows:
-        item = {
-            "id": tool.id,
-            "name": tool.name,
-            "slug": tool.slug,
-            "short_description": tool.short_description,
-            "icon": tool.icon,
-            "url": tool.url,
-            "is_featured": tool.is_featured,
-            "is_self_developed": tool.is_self_developed,
-            "api_endpoint": tool.api_endpoint,
-            "view_count": tool.view_count,
-            "tags": json.loads(tool.tags) if tool.tags else [],
-            "category": {
-                "id": category.id,
-                "name": category.name,
-                "slug": category.slug,
-                "icon": category.icon,
-                "color": category.color
-            }
-        }
-        items.append(item)
+    counts = {}
+    for tool in catalog.tools:
+        if tool["category"]["slug"] == category:
+            for name in tool["tags"]:
+                counts[name] = counts.get(name, 0) + 1
+    items = [
+        {"name": name, "count": count}
+        for name, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    ]
+    return {"code": 200, "message": "success", "data": items}
+
+
+@router.get("/search/suggest")
+async def get_search_suggestions(
+    request: Request,
+    response: Response,
+    q: str = Query("", max_length=50),
+    limit: int = Query(8, ge=1, le=20)
+):
+    """搜索联想 (公开)"""
+    catalog = await get_catalog()
+    not_modified = check_not_modified(
+        request, response, catalog.content_hash, get_cache_policy("suggest")
+    )
+    if not_modified:
+        return not_modified
+    await suggest_index.refresh(catalog)
     
-    return {
-        "code": 200,
-        "message": "success",
-        "data": {
-            "items": items,
-            "total": total,
-            "page": page,
-            "page_size": page_size
-        }
-    }
+    return {"code": 200, "message": "success", "data": suggest_index.suggest(q, limit)}
 
 
 @router.get("/tools/{tool_slug}")
-async def get_public_tool(tool_slug: str, db: AsyncSession = Depends(get_db)):
+async def get_public_tool(tool_slug: str, request: Request, response: Response):
     """获取工具详情 (公开)"""
-    result = await db.execute(
-        select(Tool, Category).join(Category).where(
-            (Tool.slug == tool_slug) & (Tool.is_active == True)
-        )
-    )
-    row = result.first()
+    catalog = await get_catalog()
+    tool = catalog.tools_by_slug.get(tool_slug)
     
-    if not row:
+    if not tool:
         return {"code": 404, "message": "工具不存在", "data": None}
     
-    tool, category = row
+    # 增加浏览次数 (写缓冲, 定时批量写回)
+    view_counter.add(tool["id"])
     
-    # 增加浏览次数
-    tool.view_count += 1
-    await db.commit()
+    # 默认 max-age=0: 每次访问都回源验证, 保证浏览量统计
+    not_modified = check_not_modified(
+        request, response, catalog.content_hash, get_cache_policy("tool_detail", max_age=0)
+    )
+    if not_modified:
+        return not_modified
     
-    return {
-        "code": 200,
-        "message": "success",
-        "data": {
-            "id": tool.id,
-            "name": tool.name,
-            "slug": tool.slug,
-            "short_description": tool.short_description,
-            "description": tool.description,
-            "icon": tool.icon,
-            "url": tool.url,
-            "is_featured": tool.is_featured,
-            "is_self_developed": tool.is_self_developed,
-            "api_endpoint": tool.api_endpoint,
-            "view_count": tool.view_count,
-            "tags": json.loads(tool.tags) if tool.tags else [],
-            "category": {
-                "id": category.id,
-                "name": category.name,
-                "slug": category.slug,
-                "icon": category.icon,
-                "color": category.color
-            }
-        }
-    }
+    fragment = public_tool_detail_fragments.get(
+        tool["id"], tool["revision"], lambda: _tool_detail(tool)
+    )
+    return json_response(envelope(fragment), response)
 
 
 @router.get("/home")
-async def get_home_page_data(db: AsyncSession = Depends(get_db)):
+async def get_home_page_data(request: Request, response: Response):
     """获取首页数据 (公开)"""
-    # 网站配置
-    result = await db.execute(select(SiteConfig).limit(1))
-    config = result.scalar_one_or_none()
-    
-    site_config = {
-        "site_name": config.site_name if config else "NavTools",
-        "site_description": config.site_description if config else "实用工具集合",
-        "theme_enabled": config.theme_enabled if config else True
-    }
-    
-    # 分类
-    result = await db.execute(
-        select(Category).where(Category.is_active == True)
-        .order_by(Category.sort_order.asc())
+    catalog = await get_catalog()
+    not_modified = check_not_modified(
+        request, response, catalog.content_hash, get_cache_policy("home")
     )
-    categories = result.scalars().all()
+    if not_modified:
+        return not_modified
     
-    categories_data = []
-    for cat in categories:
-        count_result = await db.execute(
-            select(func.count()).where(
-                (Tool.category_id == cat.id) & (Tool.is_active == True)
-            )
-        )
-        categories_data.append({
-            "id": cat.id,
-            "name": cat.name,
-            "slug": cat.slug,
-            "icon": cat.icon,
-            "color": cat.color,
-            "tool_count": count_result.scalar()
-        })
-    
-    # 精选工具
-    result = await db.execute(
-        select(Tool, Category).join(Category).where(
-            (Tool.is_featured == True) & (Tool.is_active == True)
-        ).order_by(Tool.sort_order.asc()).limit(10)
-    )
-    featured_tools = []
-    for tool, cat in result.all():
-        featured_tools.append({
-            "id": tool.id,
-            "name": tool.name,
-            "slug": tool.slug,
-            "short_description": tool.short_description,
-            "icon": tool.icon,
-            "is_self_developed": tool.is_self_developed,
-            "api_endpoint": tool.api_endpoint,
-            "category": {
-                "name": cat.name,
-                "slug": cat.slug,
-                "color": cat.color
-            }
-        })
-    
-    # 最近添加的工具
-    result = await db.execute(
-        select(Tool, Category).join(Category).where(
-            Tool.is_active == True
-        ).order_by(desc(Tool.created_at)).limit(12)
-    )
-    recent_tools = []
-    for tool, cat in result.all():
-        recent_tools.append({
-            "id": tool.id,
-            "name": tool.name,
-            "slug": tool.slug,
-            "short_description": tool.short_description,
-            "icon": tool.icon,
-            "is_self_developed": tool.is_self_developed,
-            "category": {
-                "name": cat.name,
-                "slug": cat.slug,
-                "color": cat.color
-            }
-        })
-    
-    return {
-        "code": 200,
-        "message": "success",
-        "data": {
-            "site_config": site_config,
-            "categories": categories_data,
-            "featured_tools": featured_tools,
-            "recent_tools": recent_tools
-        }
-    }
+    # 响应体按快照版本预先序列化
+    body = await home_payload.get(catalog)
+    return json_response(body, response)
 
 
 @router.post("/tools/{tool_id}/view")
-async def record_tool_view(tool_id: int, db: AsyncSession = Depends(get_db)):
+async def record_tool_view(tool_id: int):
     """记录工具访问 (公开)"""
-    result = await db.execute(select(Tool).where(Tool.id == tool_id))
-    tool = result.scalar_one_or_none()
+    catalog = await get_catalog()
     
-    if tool:
-        tool.view_count += 1
-        await db.commit()
+    if tool_id in catalog.tools_by_id:
+        view_counter.add(tool_id)
     
     return {"code": 200, "message": "success"}
@@ -8,8 +8,10 @@ from sqlalchemy import select
 from app.database import get_db
 from app import schemas
 from app.models import SiteConfig
-from app.deps import get_current_admin
+from app.deps import get_current_admin, get_audit_context
+from app.core.audit import AuditContext
 from app.core.exceptions import NotFoundException
+from app.core.catalog import invalidate_site_config
 
 router = APIRouter(prefix="/admin/site-config", tags=["网站配置"])
 
@@ -33,7 +35,8 @@ async def get_site_config(
 async def update_site_config(
     config_data: schemas.SiteConfigUpdate,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """更新网站配置"""
     result = await db.execute(select(SiteConfig).limit(1))
@@ -43,10 +46,13 @@ async def update_site_config(
         raise NotFoundException("网站配置不存在")
     
     # 更新字段
-    for field, value in config_data.model_dump(exclude_unset=True).items():
+    update_dict = config_data.model_dump(exclude_unset=True)
+    for field, value in update_dict.items():
         setattr(config, field, value)
     
     await db.commit()
+    invalidate_site_config()
     await db.refresh(config)
+    audit.log("update", "config", config.id, {"fields": sorted(update_dict)})
     
     return config
@@ -2,33 +2,48 @@
 NavTools - 工具管理路由
 """
 import json
+from datetime import datetime
 from typing import Optional, List
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, File, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, desc
+from sqlalchemy.orm import contains_eager
 
 from app.database import get_db
 from app import schemas
 from app.models import Tool, Category
-from app.deps import get_current_admin
+from app.deps import get_current_admin, get_audit_context
+from app.core.audit import AuditContext
 from app.core.exceptions import NotFoundException, BusinessException
+from app.core.catalog import invalidate_catalog
+from app.core.pagination import SortKey, MIN_DATETIME, paginate, offset_query, keyset_query
+from app.core.query_plans import register_query_shape
+from app.core.bulk import bulk_delete, bulk_update, bulk_update_by_id
+from app.core.tool_io import ToolImporter, FORMATS, detect_format, export_tools
+from app.core.serialization import json_response, envelope, list_data, admin_tool_fragments, row_revision
+from app.core.tags import dump_tags, set_tool_tags, delete_tool_tags
 
 router = APIRouter(prefix="/admin/tools", tags=["工具管理"])
 
+# 列表排序: sort_order 升序, created_at 降序, id 作为唯一键
+TOOL_SORT_KEYS = [
+    SortKey(Tool.sort_order, default=0),
+    SortKey(Tool.created_at, descending=True, default=MIN_DATETIME),
+    SortKey(Tool.id, descending=True),
+]
+# 页码分页沿用原有排序
+TOOL_PAGE_ORDER = [Tool.sort_order.asc(), Tool.created_at.desc()]
 
-@router.get("", response_model=schemas.ListResponse)
-async def list_tools(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
+
+def _tool_list_query(
     search: Optional[str] = None,
     category_id: Optional[int] = None,
     is_active: Optional[bool] = None,
-    is_featured: Optional[bool] = None,
-    db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    is_featured: Optional[bool] = None
 ):
-    """获取工具列表"""
-    query = select(Tool).join(Category)
+    """工具列表查询 (未排序)"""
+    query = select(Tool).join(Category).options(contains_eager(Tool.category))
     
     if search:
         query = query.where(
@@ -45,34 +60,125 @@ async def list_tools(
     if is_featured is not None:
         query = query.where(Tool.is_featured == is_featured)
     
-    # 统计总数
-    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
-    total = count_result.scalar()
-    
+    return query
+
+
+# 执行计划检查 (python -m scripts.explain_queries): 各筛选组合的页码 / 游标分页
+_LIST_FILTERS = {
+    "all": {},
+    "category": {"category_id": 1},
+    "active": {"is_active": True},
+    "active_category": {"is_active": True, "category_id": 1},
+    "featured": {"is_featured": True},
+}
+for _name, _filters in _LIST_FILTERS.items():
+    register_query_shape(
+        f"admin.tools.{_name}.page",
+        lambda f=_filters: offset_query(_tool_list_query(**f), TOOL_SORT_KEYS, 5, 20, TOOL_PAGE_ORDER)
+    )
+    register_query_shape(
+        f"admin.tools.{_name}.cursor",
+        lambda f=_filters: keyset_query(
+            _tool_list_query(**f), TOOL_SORT_KEYS, 20, [0, datetime(2024, 1, 1), 1000]
+        )
+    )
+
+
+def _tool_item(tool: Tool) -> dict:
+    """工具列表项"""
+    # 解析 tags
+    if tool.tags:
+        tool.tags = json.loads(tool.tags)
+    return schemas.ToolResponse.model_validate(tool).model_dump(mode="json")
+
+
+@router.get("", response_model=schemas.ListResponse)
+async def list_tools(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    search: Optional[str] = None,
+    category_id: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    is_featured: Optional[bool] = None,
+    cursor: Optional[str] = Query(None, description="游标分页: 首页传空字符串, 之后传 next_cursor"),
+    with_total: bool = Query(False, description="游标分页时是否统计总数"),
+    db: AsyncSession = Depends(get_db),
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+):
+    """获取工具列表"""
+    query = _tool_list_query(search, category_id, is_active, is_featured)
     # 分页和排序
-    query = query.order_by(Tool.sort_order.asc(), Tool.created_at.desc())
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    
-    result = await db.execute(query)
-    tools = result.scalars().all()
+    rows, pagination = await paginate(
+        db, query, TOOL_SORT_KEYS, page, page_size, cursor, with_total,
+        page_order=TOOL_PAGE_ORDER
+    )
     
-    return {
-        "code": 200,
-        "message": "success",
-        "data": {
-            "items": [schemas.ToolResponse.model_validate(t) for t in tools],
-            "total": total,
-            "page": page,
-            "page_size": page_size
-        }
-    }
+    # 未修改的工具直接复用已序列化的片段
+    fragments = [
+        admin_tool_fragments.get(
+            tool.id, (row_revision(tool), row_revision(tool.category)),
+            lambda tool=tool: _tool_item(tool)
+        )
+        for (tool,) in rows
+    ]
+    return json_response(envelope(list_data(fragments, **pagination)))
+
+
+@router.get("/export")
+async def export_tools_file(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    category_id: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
+):
+    """导出工具 (CSV / NDJSON, 流式输出)"""
+    audit.log("export", "tool", details={"format": format, "category_id": category_id})
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"tools-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    return StreamingResponse(
+        export_tools(format, category_id, is_active),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/import")
+async def import_tools_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="默认按文件名判断"),
+    on_conflict: str = Query("update", pattern="^(update|skip)$", description="工具标识已存在时更新或跳过"),
+    dry_run: bool = Query(False, description="只校验不写入"),
+    db: AsyncSession = Depends(get_db),
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
+):
+    """批量导入工具 (CSV / NDJSON), 按工具标识新增或更新"""
+    fmt = format or detect_format(file.filename, file.content_type)
+    if fmt not in FORMATS:
+        raise BusinessException("不支持的文件格式")
+    
+    importer = ToolImporter(db, on_conflict=on_conflict, dry_run=dry_run)
+    try:
+        report = await importer.run(file.file, fmt)
+    finally:
+        # 中途出错时已提交的批次同样需要使快照失效
+        if importer.committed:
+            invalidate_catalog()
+    audit.log("import", "tool", details={
+        k: report[k] for k in ("total", "created", "updated", "skipped", "failed", "dry_run")
+    })
+    
+    return {"code": 200, "message": "导入完成", "data": report}
 
 
 @router.post("", response_model=schemas.ToolResponse)
 async def create_tool(
     tool_data: schemas.ToolCreate,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """创建工具"""
     # 检查 slug 是否已存在
@@ -87,13 +193,17 @@ async def create_tool(
     
     # 转换 tags 为 JSON 字符串
     tool_dict = tool_data.model_dump()
-    if tool_dict.get('tags'):
-        tool_dict['tags'] = json.dumps(tool_dict['tags'], ensure_ascii=False)
+    tags = tool_dict.get('tags')
+    tool_dict['tags'] = dump_tags(tags)
     
     tool = Tool(**tool_dict)
     db.add(tool)
+    await db.flush()
+    await set_tool_tags(db, {tool.id: tags})
     await db.commit()
-    await db.refresh(tool)
+    invalidate_catalog()
+    await db.refresh(tool, ["category"])
+    audit.log("create", "tool", tool.id, {"name": tool.name, "slug": tool.slug})
     
     # 解析 tags 回列表
     if tool.tags:
@@ -129,7 +239,8 @@ async def update_tool(
     tool_id: int,
     tool_data: schemas.ToolUpdate,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """更新工具"""
     result = await db.execute(select(Tool).where(Tool.id == tool_id))
@@ -154,14 +265,17 @@ async def update_tool(
     
     # 更新字段
     update_dict = tool_data.model_dump(exclude_unset=True)
-    if 'tags' in update_dict and update_dict['tags']:
-        update_dict['tags'] = json.dumps(update_dict['tags'], ensure_ascii=False)
+    if 'tags' in update_dict:
+        await set_tool_tags(db, {tool_id: update_dict['tags']})
+        update_dict['tags'] = dump_tags(update_dict['tags'])
     
     for field, value in update_dict.items():
         setattr(tool, field, value)
     
     await db.commit()
-    await db.refresh(tool)
+    invalidate_catalog()
+    await db.refresh(tool, ["category"])
+    audit.log("update", "tool", tool.id, {"fields": sorted(update_dict)})
     
     # 解析 tags
     if tool.tags:
@@ -174,7 +288,8 @@ async def update_tool(
 async def delete_tool(
     tool_id: int,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """删除工具"""
     result = await db.execute(select(Tool).where(Tool.id == tool_id))
@@ -183,8 +298,12 @@ async def delete_tool(
     if not tool:
         raise NotFoundException("工具不存在")
     
+    details = {"name": tool.name, "slug": tool.slug}
+    await delete_tool_tags(db, [tool_id])
     await db.delete(tool)
     await db.commit()
+    invalidate_catalog()
+    audit.log("delete", "tool", tool_id, details)
     
     return {"code": 200, "message": "删除成功"}
 
@@ -193,7 +312,8 @@ async def delete_tool(
 async def toggle_featured(
     tool_id: int,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """切换精选状态"""
     result = await db.execute(select(Tool).where(Tool.id == tool_id))
@@ -204,6 +324,8 @@ async def toggle_featured(
     
     tool.is_featured = not tool.is_featured
     await db.commit()
+    invalidate_catalog()
+    audit.log("update", "tool", tool_id, {"is_featured": tool.is_featured})
     
     return {
         "code": 200, 
@@ -216,34 +338,34 @@ async def toggle_featured(
 async def reorder_featured(
     reorder_data: schemas.ToolFeaturedReorder,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """重新排序精选工具"""
-    for index, tool_id in enumerate(reorder_data.tool_ids):
-        result = await db.execute(select(Tool).where(Tool.id == tool_id))
-        tool = result.scalar_one_or_none()
-        if tool:
-            tool.sort_order = index
+    sort_orders = {tool_id: index for index, tool_id in enumerate(reorder_data.tool_ids)}
+    updated = await bulk_update_by_id(db, Tool, Tool.sort_order, sort_orders)
     
     await db.commit()
-    return {"code": 200, "message": "排序已更新"}
+    invalidate_catalog()
+    audit.log("reorder", "tool", details={"tool_ids": reorder_data.tool_ids, "affected": updated})
+    return {"code": 200, "message": "排序已更新", "data": {"affected": updated}}
 
 
 @router.post("/batch-delete")
 async def batch_delete_tools(
     tool_ids: List[int],
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """批量删除工具"""
-    for tool_id in tool_ids:
-        result = await db.execute(select(Tool).where(Tool.id == tool_id))
-        tool = result.scalar_one_or_none()
-        if tool:
-            await db.delete(tool)
+    await delete_tool_tags(db, set(tool_ids))
+    deleted = await bulk_delete(db, Tool, tool_ids)
     
     await db.commit()
-    return {"code": 200, "message": f"已删除 {len(tool_ids)} 个工具"}
+    invalidate_catalog()
+    audit.log("batch_delete", "tool", details={"tool_ids": tool_ids, "affected": deleted})
+    return {"code": 200, "message": f"已删除 {deleted} 个工具", "data": {"affected": deleted}}
 
 
 @router.post("/batch-toggle")
@@ -251,15 +373,21 @@ async def batch_toggle_tools(
     tool_ids: List[int],
     is_active: bool,
     db: AsyncSession = Depends(get_db),
-    current_admin: schemas.AdminUserProfile = Depends(get_current_admin)
+    current_admin: schemas.AdminUserProfile = Depends(get_current_admin),
+    audit: AuditContext = Depends(get_audit_context)
 ):
     """批量启用/禁用工具"""
-    for tool_id in tool_ids:
-        result = await db.execute(select(Tool).where(Tool.id == tool_id))
-        tool = result.scalar_one_or_none()
-        if tool:
-            tool.is_active = is_active
+    updated = await bulk_update(db, Tool, tool_ids, {"is_active": is_active})
     
     await db.commit()
+    invalidate_catalog()
+    audit.log(
+        "batch_toggle", "tool",
+        details={"tool_ids": tool_ids, "is_active": is_active, "affected": updated}
+    )
     status_text = "启用" if is_active else "禁用"
-    return {"code": 200, "message": f"已{status_text} {len(tool_ids)} 个工具"}
+    return {
+        "code": 200,
+        "message": f"已{status_text} {updated} 个工具",
+        "data": {"affected": updated}
+    }
@@ -1,9 +1,26 @@
 """
 NavTools - Pydantic 数据模型 (请求/响应验证)
 """
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
+
+from app.core.tags import TAG_MAX_LENGTH, dump_tags
+
+# Tool.tags (JSON 副本) 为 String(500)
+TAGS_JSON_MAX_LENGTH = 500
+
+
+def _check_tags(tags: Optional[List[str]]) -> Optional[List[str]]:
+    """单个标签与 JSON 副本的长度"""
+    if tags is None:
+        return tags
+    for tag in tags:
+        if len(tag.strip()) > TAG_MAX_LENGTH:
+            raise ValueError(f"标签长度不能超过 {TAG_MAX_LENGTH} 个字符: {tag[:20]}...")
+    if len(dump_tags(tags) or "") > TAGS_JSON_MAX_LENGTH:
+        raise ValueError("标签总长度过长")
+    return tags
 
 
 # ==================== 通用响应 ====================
@@ -180,7 +197,7 @@ class ToolBase(BaseModel):
 
 class ToolCreate(ToolBase):
     """创建工具请求"""
-    pass
+    _check_tags = field_validator("tags")(_check_tags)
 
 
 class ToolUpdate(BaseModel):
@@ -198,6 +215,8 @@ class ToolUpdate(BaseModel):
     is_self_developed: Optional[bool] = None
     api_endpoint: Optional[str] = Field(None, max_length=255)
     sort_order: Optional[int] = None
+    
+    _check_tags = field_validator("tags")(_check_tags)
 
 
 class ToolResponse(ToolBase):
@@ -312,10 +331,21 @@ class AuditLogResponse(AuditLogBase):
     
     id: int
     admin_id: Optional[int]
-    admin_username: Optional[str]
+    admin_username: Optional[str] = None
     created_at: datetime
 
 
+class AuditLogDailyStat(BaseModel):
+    """审计日志按日汇总"""
+    model_config = ConfigDict(from_attributes=True)
+    
+    day: date
+    admin_id: int
+    action: str
+    target_type: str
+    count: int
+
+
 # ==================== 公开接口相关 ====================
 
 class PublicToolFilter(BaseModel):
@@ -0,0 +1,6 @@
+"""
+NavTools - 性能基准测试
+
+用法 (在 backend 目录下):
+    python -m benchmarks.run --tools 10000 --categories 200 --audit-rows 1000000
+"""
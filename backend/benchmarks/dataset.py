@@ -0,0 +1,43 @@
+"""
+NavTools - 基准测试数据集
+
+使用 scripts.generate_data 生成数据 (固定随机种子), 保证多次运行之间数据一致。
+"""
+from typing import List
+
+from sqlalchemy import select, func
+
+# 搜索场景使用的关键词 (生成器的名称 / 标签中包含这些词)
+SEARCH_KEYWORDS = ["json", "格式化", "image", "转换", "markdown"]
+
+
+async def dataset_exists(engine) -> bool:
+    from app.models import Tool
+    
+    async with engine.connect() as conn:
+        count = await conn.scalar(select(func.count()).select_from(Tool))
+    return bool(count)
+
+
+async def load_tool_slugs(engine, limit: int = 1000) -> List[str]:
+    """详情场景轮流访问的工具标识"""
+    from app.models import Tool
+    
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(Tool.slug).where(Tool.is_active == True).order_by(Tool.id).limit(limit)
+        )
+        return list(result.scalars())
+
+
+async def seed_dataset(engine, tools: int, categories: int, audit_rows: int, seed: int = 42):
+    """写入数据集 (表与默认管理员需已创建)"""
+    from scripts.generate_data import parse_args, generate
+    
+    args = parse_args([
+        "--tools", str(tools),
+        "--categories", str(categories),
+        "--audit-rows", str(audit_rows),
+        "--seed", str(seed),
+    ])
+    await generate(engine, args)
@@ -0,0 +1,291 @@
+"""
+NavTools - 进程内 ASGI 基准测试
+
+在本地 SQLite 数据库上生成指定规模的数据集, 通过 httpx.ASGITransport
+直接驱动 main.app (不经过网络), 以固定并发执行各场景并统计吞吐量与
+p50 / p95 / p99 延迟。结果保存为 JSON, 可与基线对比并在退化超过阈值时
+以非零状态退出 (用于 CI)。
+
+    python -m benchmarks.run --tools 10000 --categories 200 --audit-rows 1000000
+    python -m benchmarks.run --output benchmarks/results/base.json
+    python -m benchmarks.run --compare benchmarks/results/base.json --threshold 0.15
+
+数据库文件按数据集规模命名并复用, --reseed 强制重新生成。
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / ".data"
+RESULTS_DIR = BASE_DIR / "results"
+
+# 场景名 -> 是否需要管理员令牌
+SCENARIOS = {
+    "home": False,
+    "tools": False,
+    "tools_search": False,
+    "tool_detail": False,
+    "login": False,
+    "admin_tools": True,
+    "admin_audit_logs": True,
+    "admin_users": True,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="NavTools 进程内基准测试")
+    parser.add_argument("--tools", type=int, default=1000, help="工具数")
+    parser.add_argument("--categories", type=int, default=100, help="分类数")
+    parser.add_argument("--audit-rows", type=int, default=100000, help="审计日志行数")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发数")
+    parser.add_argument("--requests", type=int, default=500, help="每个场景的请求数")
+    parser.add_argument("--login-requests", type=int, default=50, help="登录场景的请求数 (bcrypt 较慢)")
+    parser.add_argument("--warmup", type=int, default=20, help="每个场景的预热请求数")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="逗号分隔的场景名")
+    parser.add_argument("--reseed", action="store_true", help="重新生成数据集")
+    parser.add_argument("--output", help="结果 JSON 路径 (默认 benchmarks/results/<时间>.json)")
+    parser.add_argument("--compare", help="基线结果 JSON, 与本次结果对比")
+    parser.add_argument("--threshold", type=float, default=0.10, help="允许的退化比例 (p95 / 吞吐量)")
+    return parser.parse_args(argv)
+
+
+def _configure_environment(args) -> Path:
+    """导入应用前设置环境变量 (配置在首次读取后缓存)"""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    db_path = DATA_DIR / f"bench-t{args.tools}-c{args.categories}-a{args.audit_rows}.db"
+    if args.reseed and db_path.exists():
+        db_path.unlink()
+    
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("DEBUG", "false")
+    os.environ.setdefault("ALLOWED_ORIGINS", "*")
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+    return db_path
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法百分位"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_scenario(client, make_request: Callable, total: int, concurrency: int) -> Dict:
+    """以固定并发执行 total 个请求"""
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+    
+    async def worker():
+        nonlocal errors, issued
+        while issued < total:
+            index = issued
+            issued += 1
+            start = time.perf_counter()
+            response = await make_request(client, index)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def build_requests(admin_password: str, tool_slugs: List[str]) -> Dict[str, Callable]:
+    from benchmarks.dataset import SEARCH_KEYWORDS
+    
+    async def home(client, i):
+        return await client.get("/api/home")
+    
+    async def tools(client, i):
+        return await client.get("/api/tools", params={"page": i % 5 + 1, "page_size": 20})
+    
+    async def tools_search(client, i):
+        keyword = SEARCH_KEYWORDS[i % len(SEARCH_KEYWORDS)]
+        return await client.get("/api/tools", params={"search": keyword, "page_size": 20})
+    
+    async def tool_detail(client, i):
+        return await client.get(f"/api/tools/{tool_slugs[(i * 7919) % len(tool_slugs)]}")
+    
+    async def login(client, i):
+        return await client.post(
+            "/auth/login", json={"username": "admin", "password": admin_password}
+        )
+    
+    async def admin_tools(client, i):
+        return await client.get("/admin/tools", params={"page": i % 5 + 1, "page_size": 20})
+    
+    async def admin_audit_logs(client, i):
+        return await client.get("/admin/audit-logs", params={"page": 1, "page_size": 20})
+    
+    async def admin_users(client, i):
+        return await client.get("/admin/users", params={"page": 1, "page_size": 20})
+    
+    return {
+        "home": home,
+        "tools": tools,
+        "tools_search": tools_search,
+        "tool_detail": tool_detail,
+        "login": login,
+        "admin_tools": admin_tools,
+        "admin_audit_logs": admin_audit_logs,
+        "admin_users": admin_users,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmarks(args) -> Dict:
+    db_path = _configure_environment(args)
+    
+    import httpx
+    import main
+    from app.core.config import get_settings
+    from app.database import engine, init_db
+    from benchmarks.dataset import dataset_exists, seed_dataset, load_tool_slugs
+    
+    settings = get_settings()
+    
+    # 建表与默认数据 (默认管理员 id 为 1, 审计日志引用它)
+    await init_db()
+    await main.init_default_data()
+    if not await dataset_exists(engine):
+        print(f"生成数据集: {db_path.name}", file=sys.stderr)
+        started = time.perf_counter()
+        await seed_dataset(engine, args.tools, args.categories, args.audit_rows)
+        print(f"数据集生成完成, 耗时 {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    
+    tool_slugs = await load_tool_slugs(engine)
+    requests = build_requests(settings.DEFAULT_ADMIN_PASSWORD, tool_slugs)
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"未知场景: {', '.join(unknown)}")
+    
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            response = await client.post(
+                "/auth/login",
+                json={"username": "admin", "password": settings.DEFAULT_ADMIN_PASSWORD}
+            )
+            token = response.json()["access_token"]
+            admin_headers = {"Authorization": f"Bearer {token}"}
+            
+            for name in names:
+                if SCENARIOS[name]:
+                    client.headers.update(admin_headers)
+                else:
+                    client.headers.pop("Authorization", None)
+                
+                total = args.login_requests if name == "login" else args.requests
+                await run_scenario(client, requests[name], min(args.warmup, total), args.concurrency)
+                results[name] = await run_scenario(client, requests[name], total, args.concurrency)
+                stats = results[name]
+                print(
+                    f"{name:<18} {stats['throughput_rps']:>9.1f} req/s  "
+                    f"p50 {stats['p50_ms']:>8.2f}ms  p95 {stats['p95_ms']:>8.2f}ms  "
+                    f"p99 {stats['p99_ms']:>8.2f}ms  errors {stats['errors']}",
+                    file=sys.stderr
+                )
+    
+    await engine.dispose()
+    
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {
+                "tools": args.tools,
+                "categories": args.categories,
+                "audit_rows": args.audit_rows,
+            },
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """返回超过阈值的退化项"""
+    regressions = []
+    for name, stats in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {base['p95_ms']:.2f}ms -> {stats['p95_ms']:.2f}ms"
+            )
+        if base["throughput_rps"] and stats["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: 吞吐量 {base['throughput_rps']:.1f} -> {stats['throughput_rps']:.1f} req/s"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmarks(args))
+    
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"结果已保存: {output}", file=sys.stderr)
+    
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if baseline.get("meta", {}).get("dataset") != report["meta"]["dataset"]:
+            print("警告: 基线的数据集规模不同, 对比结果仅供参考", file=sys.stderr)
+        regressions = compare_results(baseline, report, args.threshold)
+        if regressions:
+            print(f"性能退化超过 {args.threshold:.0%}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print(f"未发现超过 {args.threshold:.0%} 的退化", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,13 @@
 """
 NavTools - FastAPI 应用入口
 """
+import hmac
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.core.config import get_settings
 from app.core.exceptions import (
@@ -14,10 +15,10 @@ from app.core.exceptions import (
     UnauthorizedException, ForbiddenException,
     business_exception_handler, integrity_error_handler
 )
-from app.database import init_db
+from app.database import init_db, engine
 from app.routers import (
     auth, admin, tools, categories, 
-    site_config, icons, audit_log, public
+    site_config, icons, audit_log, public, debug
 )
 from devtools import devtools_router
 
@@ -46,7 +47,7 @@ async def init_default_data():
             admin = AdminUser(
                 username=settings.DEFAULT_ADMIN_USERNAME,
                 email=settings.DEFAULT_ADMIN_EMAIL,
-                hashed_password=get_password_hash(settings.DEFAULT_ADMIN_PASSWORD),
+                hashed_password=await get_password_hash(settings.DEFAULT_ADMIN_PASSWORD),
                 is_superuser=True,
                 is_active=True
             )
@@ -77,9 +78,44 @@ async def lifespan(app: FastAPI):
     await init_default_data()
     logger.info("数据库初始化完成")
     
+    # 预热公开目录快照与搜索联想索引
+    from app.core.catalog import get_catalog
+    from app.core.suggest import suggest_index
+    await suggest_index.refresh(await get_catalog())
+    # 首页数据预序列化与后台刷新
+    from app.core.home_payload import home_payload
+    await home_payload.get()
+    home_payload.start()
+    
+    # 多进程缓存失效广播
+    from app.core.invalidation import get_invalidation_bus
+    get_invalidation_bus().start()
+    # 浏览量写缓冲
+    from app.core.view_counter import view_counter
+    view_counter.start()
+    # 审计日志批量写入
+    from app.core.audit import audit_writer
+    audit_writer.start()
+    # 审计日志汇总与过期清理
+    from app.core.audit_retention import audit_maintenance
+    audit_maintenance.start()
+    # 事件循环延迟采样
+    if get_settings().METRICS_ENABLED:
+        from app.core.metrics import loop_lag_monitor
+        loop_lag_monitor.start()
+    
     yield
     
     # 关闭时
+    if get_settings().METRICS_ENABLED:
+        await loop_lag_monitor.stop()
+    await home_payload.stop()
+    await get_invalidation_bus().stop()
+    await view_counter.stop()
+    await audit_maintenance.stop()
+    await audit_writer.stop()
+    from app.core.security import shutdown_password_executor
+    shutdown_password_executor()
     logger.info("应用关闭")
 
 
@@ -105,6 +141,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 运行指标
+if settings.METRICS_ENABLED:
+    from app.core.metrics import MetricsMiddleware, instrument_pool
+    
+    app.add_middleware(MetricsMiddleware)
+    instrument_pool(engine)
+
+# SQL 查询统计与慢查询日志
+from app.core.query_stats import QueryStatsMiddleware, install_query_hooks
+
+app.add_middleware(QueryStatsMiddleware, debug_headers=settings.SQL_DEBUG_HEADERS)
+install_query_hooks(engine, slow_threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS)
+
+# 请求采样分析 (可选)
+if settings.PROFILER_ENABLED:
+    from app.core.profiler import ProfilerMiddleware, profile_store
+    
+    app.add_middleware(
+        ProfilerMiddleware,
+        store=profile_store,
+        secret=settings.SECRET_KEY,
+        sample_rate=settings.PROFILER_SAMPLE_RATE,
+        interval=settings.PROFILER_INTERVAL_MS / 1000,
+        max_concurrent=settings.PROFILER_MAX_CONCURRENT,
+    )
+
 # 注册异常处理器
 app.add_exception_handler(BusinessException, business_exception_handler)
 app.add_exception_handler(NotFoundException, business_exception_handler)
@@ -119,6 +181,23 @@ async def health_check():
     return {"status": "ok", "version": get_settings().APP_VERSION}
 
 
+# 运行指标 (Prometheus 文本格式)
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """运行指标接口"""
+    settings = get_settings()
+    # 未配置令牌时只在 DEBUG 模式下开放, 避免生产环境公开运行指标
+    if not settings.METRICS_ENABLED or not (settings.METRICS_TOKEN or settings.DEBUG):
+        return PlainTextResponse("metrics disabled", status_code=404)
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not hmac.compare_digest(request.headers.get("authorization", ""), expected):
+            return PlainTextResponse("unauthorized", status_code=401)
+    
+    from app.core.metrics import registry
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # 注册路由
 app.include_router(auth.router)
 app.include_router(admin.router)
@@ -128,6 +207,7 @@ app.include_router(site_config.router)
 app.include_router(icons.router)
 app.include_router(audit_log.router)
 app.include_router(public.router)
+app.include_router(debug.router)
 app.include_router(devtools_router)
 
 
@@ -0,0 +1,9 @@
+"""
+NavTools - 开发辅助脚本 (命令行, 在 backend 目录执行 python -m scripts.<脚本>)
+
+- generate_data: 生成模拟数据 (性能测试 / 执行计划检查)
+- explain_queries: 检查列表查询的执行计划
+
+与 devtools 包分开: devtools 是站点的自研工具接口 (main.py 挂载 /devtools 路由,
+导入时加载路由及其依赖), 这里的脚本只供开发 / 运维使用, 不随应用导入。
+"""
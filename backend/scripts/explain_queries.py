@@ -0,0 +1,73 @@
+"""
+NavTools - 查询执行计划检查 (索引顾问)
+
+对各模块登记的查询形态 (app.core.query_plans) 在当前数据库上执行 EXPLAIN,
+标记全表扫描与额外排序; 有标记时以非零状态退出, 可用于 CI。
+执行计划与数据量和统计信息有关, 应在接近线上规模的库上运行
+(如先用 scripts.generate_data 生成数据)。
+用法 (在 backend 目录下):
+
+    python -m scripts.explain_queries
+    python -m scripts.explain_queries --database-url postgresql://... --only admin.tools -v
+"""
+import argparse
+import asyncio
+import os
+import sys
+from typing import List
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="NavTools 查询执行计划检查")
+    parser.add_argument("--database-url", help="数据库地址 (默认读取配置 DATABASE_URL)")
+    parser.add_argument("--only", help="只检查名称以此开头的查询形态")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出全部执行计划")
+    return parser.parse_args(argv)
+
+
+async def run(args) -> List:
+    from app.database import engine, init_db
+    import app.routers  # noqa: F401  (导入时登记查询形态)
+    from app.core.query_plans import get_query_shapes, explain_shape
+    
+    # 补建缺失的索引后再检查
+    await init_db()
+    shapes = [s for s in get_query_shapes() if not args.only or s.name.startswith(args.only)]
+    reports = []
+    try:
+        async with engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                await conn.exec_driver_sql("ANALYZE")
+            for shape in shapes:
+                reports.append(await conn.run_sync(explain_shape, shape))
+    finally:
+        await engine.dispose()
+    return reports
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.database_url:
+        # 配置在首次读取后缓存, 必须在导入 app 之前设置
+        os.environ["DATABASE_URL"] = args.database_url
+    
+    reports = asyncio.run(run(args))
+    flagged = 0
+    for report in reports:
+        if report.flagged:
+            flagged += 1
+        print(f"[{'WARN' if report.flagged else ' OK '}] {report.name}")
+        for line in report.full_scans:
+            print(f"       全表扫描: {line}")
+        for line in report.sorts:
+            print(f"       额外排序: {line}")
+        if args.verbose or report.flagged:
+            for line in report.plan:
+                print(f"         | {line}")
+    
+    print(f"共 {len(reports)} 个查询形态, {flagged} 个需要关注", file=sys.stderr)
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+"""
+NavTools - 合成数据生成器
+
+生成分布接近真实站点的分类 / 工具 / 管理员 / 审计日志, 用于性能测试与本地开发:
+
+- 工具名称中英文混合 (如 "JSON 格式化" / "JSON Formatter"), 标签写入 Tool.tags JSON 后回填 tool_tags 关联
+- 分类大小按 Zipf 分布倾斜, 少数分类包含大部分工具
+- 浏览量服从 Zipf 分布, 推荐 / 停用比例可配置
+- 审计日志按操作类型加权, 时间均匀分布在最近 N 天内
+
+所有数据按批次多行 INSERT 写入, 支持 SQLite / MySQL / PostgreSQL。
+用法 (在 backend 目录下):
+
+    python -m scripts.generate_data --tools 100000 --categories 300 --audit-rows 1000000
+    python -m scripts.generate_data --database-url postgresql://... --clear
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import operator
+import os
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+# 每条 INSERT 语句的行数
+DEFAULT_BATCH_SIZE = 5000
+
+# (中文, 英文, 标识)
+SUBJECTS = [
+    ("JSON", "JSON", "json"), ("XML", "XML", "xml"), ("YAML", "YAML", "yaml"),
+    ("Markdown", "Markdown", "markdown"), ("图片", "Image", "image"), ("PDF", "PDF", "pdf"),
+    ("视频", "Video", "video"), ("音频", "Audio", "audio"), ("二维码", "QR Code", "qrcode"),
+    ("正则表达式", "Regex", "regex"), ("时间戳", "Timestamp", "timestamp"), ("Base64", "Base64", "base64"),
+    ("URL", "URL", "url"), ("颜色", "Color", "color"), ("SQL", "SQL", "sql"),
+    ("CSS", "CSS", "css"), ("HTML", "HTML", "html"), ("文本", "Text", "text"),
+    ("密码", "Password", "password"), ("UUID", "UUID", "uuid"), ("Cron", "Cron", "cron"),
+    ("字体", "Font", "font"), ("图标", "Icon", "icon"), ("Excel", "Excel", "excel"),
+]
+ACTIONS = [
+    ("格式化", "Formatter", "formatter"), ("转换", "Converter", "converter"),
+    ("压缩", "Compressor", "compressor"), ("生成器", "Generator", "generator"),
+    ("校验", "Validator", "validator"), ("在线编辑器", "Editor", "editor"),
+    ("解析", "Parser", "parser"), ("对比", "Diff", "diff"),
+    ("加密", "Encryptor", "encryptor"), ("预览", "Viewer", "viewer"),
+]
+CATEGORY_NAMES = [
+    "开发工具", "图片处理", "文本处理", "编码转换", "加密安全", "网络工具",
+    "文档工具", "设计工具", "效率工具", "数据处理", "音视频", "AI 工具",
+]
+TAG_POOL = [
+    "开发", "前端", "后端", "效率", "免费", "在线", "开源", "设计", "办公",
+    "安全", "图片", "文本", "数据", "api", "ai", "cli", "mobile", "web",
+]
+ICONS = [
+    "code", "image", "file-text", "lock", "globe", "palette", "clock", "database",
+    "terminal", "qr-code", "video", "music", "hash", "link", "wrench", "sparkles",
+]
+COLORS = ["#FFD700", "#3B82F6", "#10B981", "#F59E0B", "#EF4444", "#8B5CF6", "#EC4899"]
+# (操作, 对象类型, 权重)
+AUDIT_EVENTS = [
+    ("login", "admin", 30), ("update", "tool", 25), ("create", "tool", 12),
+    ("batch_update", "tool", 5), ("delete", "tool", 3), ("update", "category", 6),
+    ("create", "category", 2), ("update", "config", 4), ("login_failed", "admin", 8),
+    ("change_password", "admin", 1), ("batch_delete", "tool", 2), ("import", "tool", 2),
+]
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2) AppleWebKit/605.1.15 Version/17.2 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0",
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="NavTools 合成数据生成器")
+    parser.add_argument("--database-url", help="数据库地址 (默认读取配置 DATABASE_URL)")
+    parser.add_argument("--categories", type=int, default=100, help="分类数")
+    parser.add_argument("--tools", type=int, default=10000, help="工具数")
+    parser.add_argument("--admins", type=int, default=3, help="额外生成的管理员数")
+    parser.add_argument("--audit-rows", type=int, default=100000, help="审计日志行数")
+    parser.add_argument("--featured-ratio", type=float, default=0.03, help="推荐工具比例")
+    parser.add_argument("--inactive-ratio", type=float, default=0.05, help="停用工具比例")
+    parser.add_argument("--category-skew", type=float, default=1.0, help="分类大小的 Zipf 指数")
+    parser.add_argument("--view-skew", type=float, default=1.1, help="浏览量的 Zipf 指数")
+    parser.add_argument("--max-views", type=int, default=1000000, help="最热门工具的浏览量")
+    parser.add_argument("--days", type=int, default=90, help="审计日志覆盖的天数")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="每条 INSERT 的行数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--clear", action="store_true", help="先清空工具 / 分类 / 审计日志")
+    return parser.parse_args(argv)
+
+
+def zipf_weights(n: int, exponent: float) -> List[float]:
+    """第 k 名的权重为 1 / k^s"""
+    return [1 / (rank ** exponent) for rank in range(1, n + 1)]
+
+
+class WeightedChoice:
+    """按累积权重二分查找, 比每次调用 random.choices 快"""
+    
+    def __init__(self, items: List, weights: List[float], rng: random.Random):
+        self.items = items
+        self.cumulative = list(itertools.accumulate(weights))
+        self.total = self.cumulative[-1]
+        self.rng = rng
+    
+    def __call__(self):
+        index = bisect.bisect(self.cumulative, self.rng.random() * self.total)
+        return self.items[min(index, len(self.items) - 1)]
+
+
+async def insert_batches(conn, model, rows: Iterable[Dict], batch_size: int) -> int:
+    """
+    多行 INSERT, 返回写入行数
+    
+    语句只编译一次, 参数直接转换为驱动所需的元组,
+    绕过 Core 逐行构造参数的开销。
+    """
+    from sqlalchemy import insert
+    
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    
+    compiled = insert(model.__table__).compile(dialect=conn.dialect, column_keys=list(first))
+    sql = str(compiled)
+    keys = compiled.positiontup
+    get_values = operator.itemgetter(*keys)
+    # 只有少数列需要类型转换 (如 SQLite 的日期时间 / 布尔)
+    processors = [
+        (position, compiled._bind_processors[key])
+        for position, key in enumerate(keys) if key in compiled._bind_processors
+    ]
+    
+    def prepare(batch_rows) -> List[tuple]:
+        params = []
+        for row in batch_rows:
+            values = list(get_values(row))
+            for position, processor in processors:
+                values[position] = processor(values[position])
+            params.append(tuple(values))
+        return params
+    
+    count = 0
+    params = prepare(itertools.chain([first], itertools.islice(rows, batch_size - 1)))
+    while params:
+        await conn.exec_driver_sql(sql, params)
+        count += len(params)
+        params = prepare(itertools.islice(rows, batch_size))
+    return count
+
+
+@asynccontextmanager
+async def deferred_indexes(conn, table):
+    """
+    导入期间删除表上的二级索引, 导入后重建 (整体建索引比逐行维护快得多)
+    
+    仅用于 DDL 可回滚的 SQLite / PostgreSQL; MySQL 的 DDL 会隐式提交事务, 保持原样。
+    """
+    if conn.dialect.name not in ("sqlite", "postgresql"):
+        yield
+        return
+    
+    indexes = list(table.indexes)
+    for index in indexes:
+        await conn.run_sync(lambda sync_conn, index=index: index.drop(sync_conn, checkfirst=True))
+    yield
+    for index in indexes:
+        await conn.run_sync(lambda sync_conn, index=index: index.create(sync_conn))
+
+
+def _progress(label: str, count: int, started: float):
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else 0
+    print(f"{label}: {count} 行, {elapsed:.1f}s ({rate:,.0f} 行/秒)", file=sys.stderr)
+
+
+class DataGenerator:
+    """按参数生成各表的行"""
+    
+    def __init__(self, args, now: datetime):
+        self.args = args
+        self.now = now
+        self.rng = random.Random(args.seed)
+    
+    def category_rows(self, offset: int):
+        for i in range(self.args.categories):
+            number = offset + i
+            base = CATEGORY_NAMES[number % len(CATEGORY_NAMES)]
+            created = self.now - timedelta(days=self.rng.randint(30, 720))
+            yield {
+                "name": base if number < len(CATEGORY_NAMES) else f"{base} {number // len(CATEGORY_NAMES) + 1}",
+                "slug": f"category-{number}",
+                "description": f"{base}相关的在线工具",
+                "icon": self.rng.choice(ICONS),
+                "color": self.rng.choice(COLORS),
+                "sort_order": i,
+                "is_active": self.rng.random() > 0.02,
+                "created_at": created,
+                "updated_at": created,
+            }
+    
+    def _tool_variants(self) -> List[tuple]:
+        """预先拼好 (名称, 简介, 详情, 标识前缀) 的所有组合, 生成时只需随机选取"""
+        variants = []
+        for subject in SUBJECTS:
+            for action in ACTIONS:
+                base = f"{subject[2]}-{action[2]}"
+                for zh in (True, False):
+                    if zh:
+                        name = f"{subject[0]} {action[0]}"
+                        summary = f"在线{subject[0]}{action[0]}, 无需安装, 打开即用"
+                    else:
+                        name = f"{subject[1]} {action[1]}"
+                        summary = f"Free online {subject[1].lower()} {action[1].lower()}"
+                    # 中文名称约占 60%
+                    weight = 3 if zh else 2
+                    variants.extend([(name, summary, f"{summary}。\n\n支持批量处理与结果下载。", base, subject[2])] * weight)
+        return variants
+    
+    def _tag_variants(self, per_subject: int = 32) -> Dict[str, List[str]]:
+        """每个主题预生成若干标签组合 (JSON 字符串)"""
+        rng = self.rng
+        return {
+            subject[2]: [
+                json.dumps([subject[2]] + rng.sample(TAG_POOL, rng.randint(0, 4)), ensure_ascii=False)
+                for _ in range(per_subject)
+            ]
+            for subject in SUBJECTS
+        }
+    
+    def tool_rows(self, category_ids: List[int], offset: int):
+        args = self.args
+        rng = self.rng
+        random_ = rng.random
+        # 分类大小倾斜: 按随机顺序给分类分配 Zipf 权重
+        shuffled = category_ids[:]
+        rng.shuffle(shuffled)
+        pick_category = WeightedChoice(shuffled, zipf_weights(len(shuffled), args.category_skew), rng)
+        # 浏览量: 随机排名后按 Zipf 计算
+        ranks = list(range(1, args.tools + 1))
+        rng.shuffle(ranks)
+        variants = self._tool_variants()
+        tag_variants = self._tag_variants()
+        created_span = args.days * 86400 * 4
+        
+        for i in range(args.tools):
+            number = offset + i
+            name, summary, description, base, subject = variants[int(random_() * len(variants))]
+            tags = tag_variants[subject]
+            created = self.now - timedelta(seconds=int(random_() * created_span))
+            is_self_developed = random_() < 0.01
+            yield {
+                "name": name,
+                "slug": f"{base}-{number}",
+                "short_description": summary,
+                "description": description,
+                "url": f"https://tools.example.com/{base}/{number}",
+                "category_id": pick_category(),
+                "icon": ICONS[int(random_() * len(ICONS))],
+                "tags": tags[int(random_() * len(tags))],
+                "view_count": int(args.max_views / (ranks[i] ** args.view_skew)),
+                "is_active": random_() >= args.inactive_ratio,
+                "is_featured": random_() < args.featured_ratio,
+                "is_self_developed": is_self_developed,
+                "api_endpoint": f"/api/self/{base}" if is_self_developed else None,
+                "sort_order": int(random_() * 100),
+                "created_at": created,
+                "updated_at": created + timedelta(seconds=int(random_() * 86400 * 30)),
+            }
+    
+    def admin_rows(self, hashed_password: str, offset: int):
+        for i in range(self.args.admins):
+            number = offset + i
+            created = self.now - timedelta(days=self.rng.randint(1, 365))
+            yield {
+                "username": f"editor{number}",
+                "email": f"editor{number}@example.com",
+                "hashed_password": hashed_password,
+                "is_superuser": False,
+                "is_active": True,
+                "created_at": created,
+                "updated_at": created,
+            }
+    
+    def audit_rows(self, admin_ids: List[int], max_tool_id: int):
+        args = self.args
+        rng = self.rng
+        random_ = rng.random
+        pick_event = WeightedChoice(AUDIT_EVENTS, [w for _, _, w in AUDIT_EVENTS], rng)
+        # 少数管理员产生大部分操作
+        pick_admin = WeightedChoice(admin_ids, zipf_weights(len(admin_ids), 1.0), rng)
+        span = args.days * 86400
+        max_tool_id = max(max_tool_id, 1)
+        ip_addresses = [
+            f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(1024)
+        ]
+        
+        for _ in range(args.audit_rows):
+            action, target_type, _ = pick_event()
+            admin_id = pick_admin()
+            details = None
+            if action in ("update", "create"):
+                details = f'{{"name": "item-{int(random_() * 9999) + 1}"}}'
+            elif action.startswith("batch_"):
+                details = f'{{"count": {int(random_() * 199) + 2}}}'
+            elif action == "login_failed" and random_() < 0.5:
+                # 一半的失败登录来自不存在的用户名
+                admin_id = None
+            yield {
+                "admin_id": admin_id,
+                "action": action,
+                "target_type": target_type,
+                "target_id": int(random_() * max_tool_id) + 1 if target_type == "tool" else None,
+                "details": details,
+                "ip_address": ip_addresses[int(random_() * len(ip_addresses))],
+                "user_agent": USER_AGENTS[int(random_() * len(USER_AGENTS))],
+                "created_at": self.now - timedelta(seconds=int(random_() * span)),
+            }
+
+
+async def generate(engine, args) -> Dict[str, int]:
+    """生成数据, 返回各表写入的行数"""
+    from sqlalchemy import select, delete, func, text
+    from app.models import Category, Tool, Tag, ToolTag, AdminUser, AuditLog, AuditLogDailyRollup
+    from app.core.security import get_password_hash
+    from app.core.audit_retention import rollup_audit_logs
+    from app.core.search import get_search_backend
+    from app.core.tags import backfill_tool_tags
+    
+    search_backend = get_search_backend()
+    generator = DataGenerator(args, datetime.utcnow())
+    counts = {}
+    
+    async with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # 只影响本连接: 批量导入期间不等待落盘, 加大页缓存减少索引写入的磁盘读写
+            await conn.execute(text("PRAGMA synchronous = OFF"))
+            await conn.execute(text("PRAGMA cache_size = -262144"))
+        # 导入期间暂停全文索引同步, 结束后整体重建
+        await search_backend.suspend_sync(conn)
+        
+        if args.clear:
+            for model in (AuditLogDailyRollup, AuditLog, ToolTag, Tag, Tool, Category):
+                await conn.execute(delete(model))
+        
+        started = time.perf_counter()
+        offset = (await conn.scalar(select(func.max(Category.id)))) or 0
+        counts["categories"] = await insert_batches(
+            conn, Category, generator.category_rows(offset), args.batch_size
+        )
+        _progress("分类", counts["categories"], started)
+        category_ids = list((await conn.execute(select(Category.id))).scalars())
+        
+        started = time.perf_counter()
+        offset = (await conn.scalar(select(func.max(Tool.id)))) or 0
+        counts["tools"] = 0
+        if category_ids:
+            async with deferred_indexes(conn, Tool.__table__):
+                counts["tools"] = await insert_batches(
+                    conn, Tool, generator.tool_rows(category_ids, offset), args.batch_size
+                )
+        _progress("工具", counts["tools"], started)
+        
+        # 工具只写入了 Tool.tags JSON, 由此生成 tool_tags 关联
+        started = time.perf_counter()
+        counts["tool_tags"] = await backfill_tool_tags(conn)
+        _progress("标签关联", counts["tool_tags"], started)
+        
+        started = time.perf_counter()
+        await search_backend.resume_sync(conn)
+        _progress("全文索引", counts["tools"], started)
+        max_tool_id = (await conn.scalar(select(func.max(Tool.id)))) or 0
+        
+        started = time.perf_counter()
+        offset = (await conn.scalar(select(func.max(AdminUser.id)))) or 0
+        hashed_password = await get_password_hash("Editor@123")
+        counts["admins"] = await insert_batches(
+            conn, AdminUser, generator.admin_rows(hashed_password, offset), args.batch_size
+        )
+        _progress("管理员", counts["admins"], started)
+        admin_ids = list((await conn.execute(select(AdminUser.id))).scalars()) or [None]
+        
+        started = time.perf_counter()
+        async with deferred_indexes(conn, AuditLog.__table__):
+            counts["audit_logs"] = await insert_batches(
+                conn, AuditLog, generator.audit_rows(admin_ids, max_tool_id), args.batch_size
+            )
+        _progress("审计日志", counts["audit_logs"], started)
+        
+        if counts["audit_logs"]:
+            # 历史日志早于汇总表的水位线, 清空后全量重新汇总
+            await conn.execute(delete(AuditLogDailyRollup))
+    
+    if counts["audit_logs"]:
+        started = time.perf_counter()
+        counts["audit_rollups"] = await rollup_audit_logs()
+        _progress("审计日志汇总", counts["audit_rollups"], started)
+    return counts
+
+
+async def run(args) -> Dict[str, int]:
+    from app.database import engine, init_db
+    
+    await init_db()
+    try:
+        return await generate(engine, args)
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.database_url:
+        # 配置在首次读取后缓存, 必须在导入 app 之前设置
+        os.environ["DATABASE_URL"] = args.database_url
+    
+    started = time.perf_counter()
+    counts = asyncio.run(run(args))
+    total = sum(counts.values())
+    print(f"完成: 共 {total} 行, 耗时 {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    print(json.dumps(counts, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+NavTools - 测试配置
+
+使用临时 SQLite 数据库; 配置在首次读取后缓存, 必须在导入 app 之前设置环境变量。
+未安装 pytest-asyncio, 异步场景通过 run_app 在独立事件循环中执行。
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+_tmpdir = tempfile.mkdtemp(prefix="navtools-test-")
+DB_PATH = os.path.join(_tmpdir, "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["SQL_DEBUG_HEADERS"] = "true"
+os.environ["METRICS_ENABLED"] = "false"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from app import schemas  # noqa: E402
+from app.deps import get_current_admin  # noqa: E402
+
+ADMIN = schemas.AdminUserProfile(id=1, username="admin", email="admin@test.local", is_superuser=True)
+
+
+async def _current_admin():
+    return ADMIN
+
+
+def _reset_caches():
+    """清空进程内缓存 (各测试使用新的数据库)"""
+    from app.core.auth_cache import auth_cache
+    from app.core.catalog import invalidate_catalog
+    from app.core import serialization
+    
+    invalidate_catalog(broadcast=False)
+    auth_cache.clear()
+    for cache in (
+        serialization.public_tool_fragments, serialization.public_tool_detail_fragments,
+        serialization.public_category_fragments, serialization.admin_tool_fragments,
+        serialization.admin_category_fragments,
+    ):
+        cache.clear()
+
+
+async def _setup_db():
+    from app.database import AsyncSessionLocal, engine, init_db
+    from app.models import AdminUser
+    
+    await engine.dispose()
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        db.add(AdminUser(
+            id=ADMIN.id, username=ADMIN.username, email=ADMIN.email,
+            hashed_password="-", is_superuser=True, is_active=True
+        ))
+        await db.commit()
+    _reset_caches()
+
+
+@pytest.fixture
+def run_app():
+    """
+    在新建的数据库上执行 scenario(client)
+    
+    client 为直接调用 ASGI 应用的 httpx 客户端, 管理端接口以超级管理员身份访问;
+    后台任务 (浏览量缓冲、审计日志写入等) 不自动启动, 由测试按需调用。
+    """
+    from main import app
+    from app.database import engine
+    
+    async def main(scenario):
+        await _setup_db()
+        app.dependency_overrides[get_current_admin] = _current_admin
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await scenario(client)
+        finally:
+            app.dependency_overrides.clear()
+            await engine.dispose()
+    
+    def run(scenario):
+        asyncio.run(main(scenario))
+    
+    return run
+
@@ -0,0 +1,26 @@
+"""
+测试数据构造 (直接写入数据库)
+"""
+from app.database import AsyncSessionLocal
+from app.models import Category, Tool
+
+
+async def add_category(slug: str, **values) -> int:
+    """直接写入分类, 返回 ID"""
+    async with AsyncSessionLocal() as db:
+        category = Category(name=values.pop("name", slug), slug=slug, **values)
+        db.add(category)
+        await db.commit()
+        return category.id
+
+
+async def add_tool(slug: str, category_id: int, **values) -> int:
+    """直接写入工具, 返回 ID"""
+    async with AsyncSessionLocal() as db:
+        tool = Tool(
+            name=values.pop("name", slug), slug=slug, url=values.pop("url", "https://example.com"),
+            category_id=category_id, **values
+        )
+        db.add(tool)
+        await db.commit()
+        return tool.id
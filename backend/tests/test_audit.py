@@ -0,0 +1,74 @@
+"""
+审计日志批量写入: 失败处理
+"""
+from unittest import mock
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from app.core.audit import AuditLogWriter
+from app.database import AsyncSessionLocal
+from app.models import AdminUser, AuditLog
+
+
+async def _audit_actions() -> list:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(AuditLog.action).order_by(AuditLog.id))
+        return list(result.scalars().all())
+
+
+def test_poison_row_is_retried_then_discarded(run_app):
+    async def scenario(client):
+        writer = AuditLogWriter(flush_interval=60, batch_size=10, max_queue_size=100, max_attempts=2)
+        writer.record("create", "tool", 1)
+        # action 不能为空: 数据错误, 重试也不会成功
+        writer.record(None, "tool", 2)
+        writer.record("update", "tool", 3)
+        
+        assert await writer.flush() == 2
+        assert await _audit_actions() == ["create", "update"]
+        assert (writer.queue_depth, writer.discarded_total) == (1, 0)
+        
+        writer.record("delete", "tool", 4)
+        assert await writer.flush() == 1
+        assert await _audit_actions() == ["create", "update", "delete"]
+        assert (writer.queue_depth, writer.discarded_total) == (0, 1)
+    
+    run_app(scenario)
+
+
+def test_transient_error_keeps_batch_queued(run_app):
+    async def scenario(client):
+        writer = AuditLogWriter(flush_interval=60, batch_size=10, max_queue_size=100, max_attempts=1)
+        writer.record("create", "tool", 1)
+        writer.record("update", "tool", 2)
+        
+        error = OperationalError("INSERT", {}, Exception("database is locked"))
+        with mock.patch.object(AuditLogWriter, "_write", side_effect=error):
+            assert await writer.flush() == 0
+        assert (writer.queue_depth, writer.discarded_total, writer.failed_flushes) == (2, 0, 1)
+        
+        assert await writer.flush() == 2
+        assert await _audit_actions() == ["create", "update"]
+    
+    run_app(scenario)
+
+
+def test_deleting_admin_keeps_audit_logs(run_app):
+    async def scenario(client):
+        async with AsyncSessionLocal() as db:
+            admin = AdminUser(username="editor", email="editor@test.local", hashed_password="-")
+            db.add(admin)
+            await db.flush()
+            admin_id = admin.id
+            await db.execute(insert(AuditLog).values(admin_id=admin_id, action="login", target_type="admin"))
+            await db.commit()
+        
+        response = await client.delete(f"/admin/users/{admin_id}")
+        assert response.status_code == 200
+        
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(func.count()).where(AuditLog.admin_id.is_(None)))
+            assert result.scalar() == 1
+    
+    run_app(scenario)
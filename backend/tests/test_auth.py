@@ -0,0 +1,59 @@
+"""
+认证缓存: 命中时不查库, 管理员变更后立即失效
+"""
+from app.core.security import create_access_token
+from app.database import AsyncSessionLocal
+from app.models import AdminUser
+from tests.conftest import ADMIN
+
+
+async def _add_admin(username: str) -> int:
+    async with AsyncSessionLocal() as db:
+        admin = AdminUser(username=username, email=f"{username}@example.com", hashed_password="-")
+        db.add(admin)
+        await db.commit()
+        return admin.id
+
+
+def _auth(admin_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(admin_id)})}"}
+
+
+def test_auth_cache_hit_and_invalidation(run_app):
+    async def scenario(client):
+        from main import app
+        
+        # 走真实的令牌校验
+        app.dependency_overrides.clear()
+        editor = _auth(await _add_admin("editor"))
+        superuser = _auth(ADMIN.id)
+        
+        response = await client.get("/auth/me", headers=editor)
+        assert response.status_code == 200
+        assert response.headers["x-db-queries"] == "1"
+        response = await client.get("/auth/me", headers=editor)
+        assert response.headers["x-db-queries"] == "0"
+        
+        response = await client.put(
+            f"/admin/users/{response.json()['id']}", json={"is_active": False}, headers=superuser
+        )
+        assert response.status_code == 200
+        assert (await client.get("/auth/me", headers=editor)).status_code == 403
+    
+    run_app(scenario)
+
+
+def test_deleted_admin_is_locked_out(run_app):
+    async def scenario(client):
+        from main import app
+        
+        app.dependency_overrides.clear()
+        editor_id = await _add_admin("editor")
+        editor = _auth(editor_id)
+        assert (await client.get("/auth/me", headers=editor)).status_code == 200
+        
+        response = await client.delete(f"/admin/users/{editor_id}", headers=_auth(ADMIN.id))
+        assert response.status_code == 200
+        assert (await client.get("/auth/me", headers=editor)).status_code == 401
+    
+    run_app(scenario)
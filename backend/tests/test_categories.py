@@ -0,0 +1,39 @@
+"""
+分类管理列表: 查询次数不随分类数量增长
+"""
+from tests.factories import add_category, add_tool
+
+PAGE_URL = "/admin/categories?page_size=100"
+CURSOR_URL = "/admin/categories?cursor=&page_size=100"
+
+
+async def _add_categories(start: int, count: int, tools_per_category: int = 3):
+    for i in range(start, start + count):
+        category_id = await add_category(f"category-{i}", sort_order=i)
+        for j in range(tools_per_category):
+            await add_tool(f"tool-{i}-{j}", category_id)
+
+
+async def _query_count(client, url: str) -> int:
+    response = await client.get(url)
+    assert response.status_code == 200
+    return int(response.headers["x-db-queries"])
+
+
+def test_list_categories_query_count_is_constant(run_app):
+    async def scenario(client):
+        await _add_categories(0, 2)
+        small = {url: await _query_count(client, url) for url in (PAGE_URL, CURSOR_URL)}
+        
+        await _add_categories(2, 40)
+        response = await client.get(PAGE_URL)
+        data = response.json()["data"]
+        assert data["total"] == 42
+        assert all(item["tool_count"] == 3 for item in data["items"])
+        large = {url: await _query_count(client, url) for url in small}
+        
+        # 页码分页: 总数 + 列表; 游标分页: 列表
+        assert small == large
+        assert large == {PAGE_URL: 2, CURSOR_URL: 1}
+    
+    run_app(scenario)
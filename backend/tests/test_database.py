@@ -0,0 +1,19 @@
+"""
+数据库引擎配置
+"""
+import pytest
+
+from app.database import is_sqlite_memory
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite+aiosqlite://", True),
+    ("sqlite+aiosqlite:///:memory:", True),
+    ("sqlite+aiosqlite:///file::memory:?cache=shared&uri=true", True),
+    ("sqlite+aiosqlite:///file:shared?mode=memory&cache=shared&uri=true", True),
+    ("sqlite+aiosqlite:///./navtools.db", False),
+    ("sqlite+aiosqlite:////var/lib/navtools/navtools.db", False),
+    ("sqlite+aiosqlite:///data/", False),
+])
+def test_is_sqlite_memory(url, expected):
+    assert is_sqlite_memory(url) is expected
@@ -0,0 +1,45 @@
+"""
+响应片段缓存: 修订键与 LRU 淘汰
+"""
+from sqlalchemy import update
+
+from app.core.serialization import FragmentCache
+from app.database import AsyncSessionLocal
+from app.models import Tool
+from tests.factories import add_category, add_tool
+
+
+def test_same_second_edit_is_not_served_stale(run_app):
+    async def scenario(client):
+        category_id = await add_category("dev")
+        tool_id = await add_tool("json", category_id, description="旧说明")
+        
+        response = await client.get("/admin/tools")
+        assert response.json()["data"]["items"][0]["description"] == "旧说明"
+        
+        # 同一秒内的修改: updated_at 不变, 也不经过目录失效
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Tool).where(Tool.id == tool_id)
+                .values(description="新说明", updated_at=Tool.updated_at)
+            )
+            await db.commit()
+        
+        response = await client.get("/admin/tools")
+        assert response.json()["data"]["items"][0]["description"] == "新说明"
+    
+    run_app(scenario)
+
+
+def test_fragment_cache_evicts_least_recently_used():
+    cache = FragmentCache("test", max_entries=2)
+    cache.get(1, "r", lambda: {"id": 1})
+    cache.get(2, "r", lambda: {"id": 2})
+    # 命中 1 后, 2 成为最久未使用的片段
+    cache.get(1, "r", lambda: {"id": 1})
+    cache.get(3, "r", lambda: {"id": 3})
+    
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 3, 1)
+    assert cache.get(1, "r", lambda: {"id": -1}) == b'{"id":1}'
+    assert cache.get(2, "r", lambda: {"id": -2}) == b'{"id":-2}'
@@ -0,0 +1,33 @@
+"""
+HTTP 缓存策略配置
+"""
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings, get_settings
+from app.core.http_cache import parse_cache_routes
+
+
+def test_cache_routes_are_parsed_at_startup():
+    routes = Settings(HTTP_CACHE_ROUTES="home=30/600, tool_detail=0").HTTP_CACHE_ROUTES
+    assert {route: policy.header for route, policy in routes.items()} == {
+        "home": "public, max-age=30, stale-while-revalidate=600",
+        "tool_detail": "public, max-age=0",
+    }
+    assert parse_cache_routes("") == {}
+
+
+@pytest.mark.parametrize("value", ["home", "hom=30", "home=abc", "home=30/x", "home=-1"])
+def test_invalid_cache_routes_are_rejected(value):
+    with pytest.raises(ValidationError):
+        Settings(HTTP_CACHE_ROUTES=value)
+
+
+def test_cache_route_override_is_applied(run_app, monkeypatch):
+    monkeypatch.setattr(get_settings(), "HTTP_CACHE_ROUTES", parse_cache_routes("categories=5/10"))
+    
+    async def scenario(client):
+        response = await client.get("/api/categories")
+        assert response.headers["cache-control"] == "public, max-age=5, stale-while-revalidate=10"
+    
+    run_app(scenario)
@@ -0,0 +1,61 @@
+"""
+缓存失效广播: 后台总线的发布 / 重试 / 丢弃计数
+"""
+import asyncio
+import logging
+
+import pytest
+
+from app.core.invalidation import BackgroundBus, TOPIC_ADMIN_USER, TOPIC_CATALOG
+
+
+class RecordingBus(BackgroundBus):
+    name = "recording"
+    
+    def __init__(self, fail_times: int = 0):
+        super().__init__(poll_interval=60)
+        self.sent = []
+        self.fail_times = fail_times
+    
+    async def _send(self, events):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("broker unavailable")
+        self.sent.append(events)
+
+
+def test_background_bus_requires_send():
+    with pytest.raises(TypeError):
+        BackgroundBus(poll_interval=1)
+
+
+def test_publish_before_start_is_counted_and_logged(caplog):
+    bus = RecordingBus()
+    with caplog.at_level(logging.WARNING, logger="app.core.invalidation"):
+        bus.publish(TOPIC_CATALOG)
+        bus.publish(TOPIC_ADMIN_USER, 1)
+    
+    assert bus.stats() == {"published": 0, "received": 0, "pending": 0, "dropped": 2}
+    # 只在第一次丢弃时告警
+    assert len(caplog.records) == 1
+
+
+def test_events_are_deduplicated_and_retried():
+    async def scenario():
+        bus = RecordingBus(fail_times=1)
+        bus.start()
+        bus.publish(TOPIC_CATALOG)
+        bus.publish(TOPIC_ADMIN_USER, 1)
+        bus.publish(TOPIC_CATALOG)
+        
+        with pytest.raises(ConnectionError):
+            await bus._flush()
+        assert bus.stats()["pending"] == 2
+        
+        bus.publish(TOPIC_ADMIN_USER, 2)
+        await bus.stop()
+        return bus
+    
+    bus = asyncio.run(scenario())
+    assert bus.sent == [[(TOPIC_CATALOG, ""), (TOPIC_ADMIN_USER, "1"), (TOPIC_ADMIN_USER, "2")]]
+    assert bus.stats() == {"published": 3, "received": 0, "pending": 0, "dropped": 0}
@@ -0,0 +1,37 @@
+"""
+/metrics 访问控制
+"""
+import pytest
+
+from app.core.config import get_settings
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    monkeypatch.setattr(settings, "DEBUG", False)
+    return settings
+
+
+def test_metrics_without_token_is_closed_outside_debug(run_app, settings):
+    async def scenario(client):
+        assert (await client.get("/metrics")).status_code == 404
+        
+        settings.DEBUG = True
+        assert (await client.get("/metrics")).status_code == 200
+    
+    run_app(scenario)
+
+
+def test_metrics_token_is_required(run_app, settings):
+    settings.METRICS_TOKEN = "scrape-token"
+    
+    async def scenario(client):
+        assert (await client.get("/metrics")).status_code == 401
+        response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+        assert response.status_code == 200
+        assert "navtools_" in response.text
+    
+    run_app(scenario)
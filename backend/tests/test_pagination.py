@@ -0,0 +1,65 @@
+"""
+游标分页: 排序列相同或为空时逐页翻完, 不重复不遗漏
+"""
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+
+from app.core.pagination import paginate
+from app.database import AsyncSessionLocal
+from app.models import AuditLog, Tool
+from app.routers.audit_log import AUDIT_SORT_KEYS
+from app.routers.tools import TOOL_SORT_KEYS
+from tests.factories import add_category, add_tool
+
+EARLIER = datetime(2024, 1, 1, 8, 0, 0)
+LATER = datetime(2024, 1, 2, 8, 0, 0)
+
+
+async def _walk(model, sort_keys, page_size: int) -> list:
+    """
+    按 next_cursor 翻完所有页, 返回各行 id
+    
+    直接调用 paginate: 列表接口的响应模型要求 created_at / sort_order 非空
+    """
+    ids, cursor = [], ""
+    async with AsyncSessionLocal() as db:
+        while cursor is not None:
+            rows, meta = await paginate(db, select(model), sort_keys, 1, page_size, cursor)
+            ids.extend(row.id for (row,) in rows)
+            cursor = meta["next_cursor"]
+    return ids
+
+
+def test_tool_cursor_with_ties_and_nulls(run_app):
+    async def scenario(client):
+        category_id = await add_category("dev")
+        created = [EARLIER, EARLIER, EARLIER, None, None, LATER, LATER]
+        ids = [await add_tool(f"tool-{i}", category_id) for i in range(len(created))]
+        async with AsyncSessionLocal() as db:
+            for tool_id, created_at in zip(ids, created):
+                await db.execute(update(Tool).where(Tool.id == tool_id).values(created_at=created_at))
+            await db.execute(update(Tool).where(Tool.id == ids[5]).values(sort_order=None))
+            await db.commit()
+        
+        # sort_order 为空视为 0, created_at 为空排在最后, 相同时按 id 降序
+        expected = [ids[6], ids[5], ids[2], ids[1], ids[0], ids[4], ids[3]]
+        for page_size in (1, 2, 3, 100):
+            assert await _walk(Tool, TOOL_SORT_KEYS, page_size) == expected
+    
+    run_app(scenario)
+
+
+def test_audit_cursor_with_ties_and_nulls(run_app):
+    async def scenario(client):
+        async with AsyncSessionLocal() as db:
+            for created_at in (EARLIER, None, EARLIER, LATER, None):
+                await db.execute(insert(AuditLog).values(
+                    admin_id=1, action="update", target_type="tool", created_at=created_at
+                ))
+            await db.commit()
+        
+        for page_size in (1, 2, 100):
+            assert await _walk(AuditLog, AUDIT_SORT_KEYS, page_size) == [4, 3, 1, 5, 2]
+    
+    run_app(scenario)
@@ -0,0 +1,26 @@
+"""
+公开搜索: 结果上限与截断标记
+"""
+from app.core.config import get_settings
+from tests.factories import add_category, add_tool
+
+
+def test_search_reports_truncation(run_app, monkeypatch):
+    monkeypatch.setattr(get_settings(), "SEARCH_MAX_RESULTS", 2)
+    
+    async def scenario(client):
+        category_id = await add_category("dev")
+        for i in range(3):
+            await add_tool(f"json-{i}", category_id, name=f"JSON 工具 {i}")
+        
+        data = (await client.get("/api/tools", params={"search": "JSON"})).json()["data"]
+        assert (data["total"], len(data["items"]), data["truncated"]) == (2, 2, True)
+        
+        data = (await client.get("/api/tools", params={"search": "JSON 工具 1", "cursor": ""})).json()["data"]
+        assert (len(data["items"]), data["truncated"]) == (1, False)
+        
+        # 未搜索时不返回 truncated
+        data = (await client.get("/api/tools")).json()["data"]
+        assert data["total"] == 3 and "truncated" not in data
+    
+    run_app(scenario)
@@ -0,0 +1,49 @@
+"""
+标签: 保留展示写法, 按大小写折叠后的唯一键归并
+"""
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models import Tag
+from tests.factories import add_category
+
+
+async def _create_tool(client, slug: str, category_id: int, tags):
+    return await client.post("/admin/tools", json={
+        "name": slug, "slug": slug, "url": "https://example.com",
+        "category_id": category_id, "tags": tags
+    })
+
+
+def test_tags_keep_display_case_and_group_by_key(run_app):
+    async def scenario(client):
+        category_id = await add_category("dev")
+        assert (await _create_tool(client, "a", category_id, ["JSON", "格式化", "json "])).status_code == 200
+        assert (await _create_tool(client, "b", category_id, ["Json"])).status_code == 200
+        
+        async with AsyncSessionLocal() as db:
+            tags = (await db.execute(select(Tag.key, Tag.name).order_by(Tag.id))).all()
+        assert tags == [("json", "JSON"), ("格式化", "格式化")]
+        
+        items = (await client.get("/admin/tools")).json()["data"]["items"]
+        assert {t["slug"]: t["tags"] for t in items} == {"a": ["JSON", "格式化"], "b": ["Json"]}
+        
+        response = await client.get("/api/tags")
+        assert response.json()["data"] == [{"name": "JSON", "count": 2}, {"name": "格式化", "count": 1}]
+        
+        response = await client.get("/api/tools", params={"tag": "jSoN"})
+        assert sorted(t["slug"] for t in response.json()["data"]["items"]) == ["a", "b"]
+    
+    run_app(scenario)
+
+
+def test_tag_length_is_validated(run_app):
+    async def scenario(client):
+        category_id = await add_category("dev")
+        response = await _create_tool(client, "a", category_id, ["x" * 51])
+        assert response.status_code == 422
+        response = await _create_tool(client, "b", category_id, [f"tag-{i:02d}" for i in range(60)])
+        assert response.status_code == 422
+        assert (await _create_tool(client, "c", category_id, ["x" * 50])).status_code == 200
+    
+    run_app(scenario)
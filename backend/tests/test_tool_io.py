@@ -0,0 +1,103 @@
+"""
+工具导入 / 导出
+"""
+import json
+from unittest import mock
+
+from sqlalchemy import select
+
+from app.core import tool_io
+from app.database import AsyncSessionLocal
+from app.models import Tool
+from tests.factories import add_category
+
+
+async def _import(client, content: str, filename: str = "tools.csv", **params):
+    response = await client.post(
+        "/admin/tools/import", params=params,
+        files={"file": (filename, content.encode("utf-8"), "text/csv")}
+    )
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+async def _tool(slug: str) -> Tool:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(Tool).where(Tool.slug == slug))).scalar_one()
+
+
+def test_partial_reimport_keeps_unspecified_fields(run_app):
+    async def scenario(client):
+        await add_category("dev")
+        full = (
+            "name,slug,url,category,description,icon,tags,is_active,is_featured,sort_order\n"
+            "JSON 格式化,json,https://a.example,dev,说明,icon-json,\"JSON,格式化\",false,true,7\n"
+        )
+        report = await _import(client, full)
+        assert (report["created"], report["failed"]) == (1, 0)
+        
+        # 只有部分列, 且 description 为空单元格
+        partial = "name,slug,url,category,description\nJSON 工具,json,https://b.example,dev,\n"
+        report = await _import(client, partial)
+        assert (report["created"], report["updated"], report["failed"]) == (0, 1, 0)
+        
+        tool = await _tool("json")
+        assert (tool.name, tool.url) == ("JSON 工具", "https://b.example")
+        assert (tool.description, tool.icon) == ("说明", "icon-json")
+        assert (tool.is_active, tool.is_featured, tool.sort_order) == (False, True, 7)
+        assert json.loads(tool.tags) == ["JSON", "格式化"]
+        
+        response = await client.get("/admin/tools")
+        assert response.json()["data"]["items"][0]["tags"] == ["JSON", "格式化"]
+    
+    run_app(scenario)
+
+
+def test_failed_chunk_is_reported_and_earlier_chunks_are_published(run_app):
+    async def scenario(client):
+        await add_category("dev")
+        await client.get("/api/tools")
+        rows = "".join(f"工具{i},tool-{i},https://example.com,dev\n" for i in range(5))
+        original_write = tool_io.ToolImporter._write
+        calls = []
+        
+        async def write(self, tools):
+            calls.append(len(tools))
+            if len(calls) == 2:
+                raise RuntimeError("写入失败")
+            await original_write(self, tools)
+        
+        with mock.patch.object(tool_io, "IMPORT_CHUNK_SIZE", 2), \
+                mock.patch.object(tool_io.ToolImporter, "_write", write):
+            report = await _import(client, "name,slug,url,category\n" + rows)
+        
+        assert calls == [2, 2, 1]
+        assert (report["created"], report["failed"]) == (3, 2)
+        assert [(e["row"], e["slug"]) for e in report["errors"]] == [(4, "tool-2"), (5, "tool-3")]
+        
+        # 已提交的批次立即出现在公开列表中
+        response = await client.get("/api/tools?page_size=100")
+        slugs = {t["slug"] for t in response.json()["data"]["items"]}
+        assert slugs == {"tool-0", "tool-1", "tool-4"}
+    
+    run_app(scenario)
+
+
+def test_export_roundtrip(run_app):
+    async def scenario(client):
+        await add_category("dev")
+        await _import(client, "name,slug,url,category,tags\n工具,tool,https://example.com,dev,\"a,b\"\n")
+        
+        response = await client.get("/admin/tools/export", params={"format": "ndjson"})
+        records = [json.loads(line) for line in response.text.splitlines() if line]
+        assert records == [{
+            "name": "工具", "slug": "tool", "short_description": None, "description": None,
+            "url": "https://example.com", "category": "dev", "icon": None, "tags": ["a", "b"],
+            "is_active": True, "is_featured": False, "is_self_developed": False,
+            "api_endpoint": None, "sort_order": 0,
+        }]
+        
+        report = await _import(client, response.text, filename="tools.ndjson")
+        assert (report["updated"], report["failed"]) == (1, 0)
+    
+    run_app(scenario)
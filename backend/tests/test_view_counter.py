@@ -0,0 +1,60 @@
+"""
+浏览量写缓冲: 请求只累加内存计数, 批量写回
+"""
+from unittest import mock
+
+from sqlalchemy import select
+
+from app.core.view_counter import ViewCounterBuffer, view_counter
+from app.database import AsyncSessionLocal
+from app.models import Tool
+from tests.factories import add_category, add_tool
+
+
+async def _view_counts() -> dict:
+    async with AsyncSessionLocal() as db:
+        return dict((await db.execute(select(Tool.slug, Tool.view_count))).all())
+
+
+def test_views_are_buffered_then_flushed(run_app):
+    async def scenario(client):
+        category_id = await add_category("dev")
+        tool_id = await add_tool("json", category_id)
+        await add_tool("yaml", category_id)
+        await view_counter.flush()
+        # 先构建目录快照
+        await client.get("/api/tools")
+        
+        response = await client.get("/api/tools/json")
+        assert response.status_code == 200
+        # 详情接口为纯读取
+        assert response.headers["x-db-queries"] == "0"
+        await client.post(f"/api/tools/{tool_id}/view")
+        await client.post("/api/tools/999/view")
+        
+        assert view_counter.pending_total == 2
+        assert await _view_counts() == {"json": 0, "yaml": 0}
+        
+        assert await view_counter.flush() == 2
+        assert view_counter.pending_total == 0
+        assert await _view_counts() == {"json": 2, "yaml": 0}
+    
+    run_app(scenario)
+
+
+def test_failed_flush_keeps_counts(run_app):
+    async def scenario(client):
+        category_id = await add_category("dev")
+        tool_id = await add_tool("json", category_id)
+        buffer = ViewCounterBuffer(flush_interval=60, flush_threshold=100)
+        buffer.add(tool_id, 3)
+        
+        with mock.patch.object(ViewCounterBuffer, "_write", side_effect=ConnectionError):
+            assert await buffer.flush() == 0
+        assert buffer.pending_total == 3
+        
+        buffer.add(tool_id)
+        assert await buffer.flush() == 4
+        assert await _view_counts() == {"json": 4}
+    
+    run_app(scenario)